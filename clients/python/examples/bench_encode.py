@@ -0,0 +1,60 @@
+import argparse, struct, time, numpy as np
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from gateway_stream import MAGIC, VERSION, _encode_frame
+
+def legacy_pack_frame(model_id, tensors, copied):
+    """Pre-scatter-gather encoder; `copied[0]` accumulates bytes written into new objects."""
+    H = struct.pack("<4sHHIII", MAGIC, VERSION, 0, len(model_id), len(tensors), 0)
+    body = model_id.encode()
+    for a in tensors:
+        if not a.flags.c_contiguous: copied[0] += a.nbytes
+        a = np.ascontiguousarray(a)
+        dt = {np.float32: 0, np.float16: 1, np.int8: 2, np.int32: 3}[a.dtype.type]
+        nd=a.ndim; dims=a.shape
+        body += struct.pack("<BB", dt, nd); copied[0] += len(body)
+        body += struct.pack("<%di"%nd, *dims); copied[0] += len(body)
+        raw=a.tobytes(); copied[0] += len(raw)
+        body += struct.pack("<I", len(raw)); copied[0] += len(body)
+        body += raw; copied[0] += len(body)
+    frame = H + body; copied[0] += len(frame)
+    out = struct.pack("<I", len(frame)) + frame; copied[0] += len(out)
+    return out
+
+def scatter_copied(tensors, bufs):
+    """Bytes materialised by `_encode_frame`: header blocks plus copies of strided inputs."""
+    head = sum(len(b) for b in bufs if not isinstance(b, memoryview))
+    return head + sum(a.nbytes for a in tensors if not a.flags.c_contiguous)
+
+def run(fn, count):
+    fn()
+    t = time.perf_counter()
+    for _ in range(count): fn()
+    return (time.perf_counter() - t) * 1000.0 / count
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compare request encoders (no gateway needed)")
+    ap.add_argument("--model", default="yolov5n_coco")
+    ap.add_argument("--count", type=int, default=200)
+    ap.add_argument("--noncontig", action="store_true", help="encode a transposed (strided) view")
+    args = ap.parse_args()
+
+    shapes = {"yolov5": ((1,3,640,640), np.float16), "ssd": ((1,3,300,300), np.float32)}
+    shape, dtype = next((v for k, v in shapes.items() if args.model.startswith(k)), ((1,3,224,224), np.float32))
+    x = np.random.rand(*shape).astype(dtype)
+    if args.noncontig:
+        x = np.ascontiguousarray(x.transpose(0,2,3,1)).transpose(0,3,1,2)
+    tensors = [x]
+
+    copied = [0]
+    legacy = legacy_pack_frame(args.model, tensors, copied)
+    bufs = _encode_frame(args.model, tensors)
+    assert b"".join(bufs) == legacy, "encoders disagree"
+
+    t_legacy = run(lambda: legacy_pack_frame(args.model, tensors, [0]), args.count)
+    t_sg = run(lambda: _encode_frame(args.model, tensors), args.count)
+    print(f"tensor={shape} {np.dtype(dtype).name} payload={x.nbytes} bytes contiguous={x.flags.c_contiguous}")
+    print(f"legacy : encode_ms={t_legacy:.3f} bytes_copied={copied[0]}")
+    print(f"scatter: encode_ms={t_sg:.3f} bytes_copied={scatter_copied(tensors, bufs)} buffers={len(bufs)}")
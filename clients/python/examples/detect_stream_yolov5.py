@@ -42,11 +42,14 @@ def postprocess(pred_buf, orig_shape, conf_th=0.25, iou_th=0.45):
     xyxy /= gain
     xyxy[:, [0,2]] = np.clip(xyxy[:, [0,2]], 0, iw)
     xyxy[:, [1,3]] = np.clip(xyxy[:, [1,3]], 0, ih)
-    # NMS
-    keep = nms(xyxy, conf, iou_th)
+    # class-aware NMS: overlapping boxes of different classes are both kept
+    keep = nms(xyxy, conf, iou_th, classes=cls_ids)
     return xyxy[keep], conf[keep], cls_ids[keep]
 
-def nms(boxes, scores, iou_th):
+def nms(boxes, scores, iou_th, classes=None):
+    if classes is not None and boxes.size:
+        # shift each class into its own coordinate range so classes never overlap
+        boxes = boxes + (classes * (boxes.max() - boxes.min() + 1))[:, None]
     idxs = scores.argsort()[::-1]
     keep = []
     while idxs.size:
@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: Apache-2.0
+import asyncio, collections, socket, struct, sys
+
+try:
+    from .gateway_stream import Response, _RecvBuffers, _encode_frame, _parse_response
+except ImportError:  # examples import this file as a top-level module
+    from gateway_stream import Response, _RecvBuffers, _encode_frame, _parse_response
+
+class _GatewayProtocol(asyncio.BufferedProtocol):
+    """Reads reply frames straight into leased receive buffers and resolves waiters in send order."""
+    def __init__(self, bufs):
+        self.transport = None; self._bufs = bufs; self._exc = None
+        self._waiters = collections.deque()
+        self._lenbuf = bytearray(4); self._paused = None
+        self._reset()
+
+    def _reset(self):
+        self._buf = self._lenbuf; self._want = 4; self._got = 0; self._flen = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self._fail(ConnectionError("gateway connection lost") if exc is None else exc)
+        if self._paused is not None and not self._paused.done():
+            self._paused.set_result(None)
+
+    def pause_writing(self):
+        self._paused = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self):
+        if self._paused is not None and not self._paused.done():
+            self._paused.set_result(None)
+        self._paused = None
+
+    def get_buffer(self, sizehint):
+        return memoryview(self._buf)[self._got:self._want]
+
+    def buffer_updated(self, nbytes):
+        self._got += nbytes
+        if self._got < self._want: return
+        if self._flen is None:
+            flen, = struct.unpack("<I", self._lenbuf)
+            if flen < 12:
+                self._fail(OSError("malformed response")); self.transport.close(); return
+            self._flen = flen; self._buf = self._bufs.take(flen); self._want = flen; self._got = 0
+            return
+        buf, flen = self._buf, self._flen
+        self._reset()
+        try:
+            resp = _parse_response(buf, flen, self._bufs)
+        except OSError as exc:
+            self._fail(exc); self.transport.close(); return
+        fut = self._waiters.popleft() if self._waiters else None
+        if fut is None or fut.done():
+            resp.release()  # caller gave up (timeout/cancel); keep the stream in step
+        else:
+            fut.set_result(resp)
+
+    def _fail(self, exc):
+        if self._exc is None: self._exc = exc
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done(): fut.set_exception(exc)
+
+    def submit(self, bufs):
+        if self._exc is not None: raise ConnectionError("gateway connection closed") from self._exc
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        if sys.version_info >= (3, 12):
+            self.transport.writelines(bufs)  # scatter-gather sendmsg
+        else:
+            for b in bufs: self.transport.write(b)  # writelines() would join into one copy
+        return fut
+
+    async def drain(self):
+        if self._paused is not None: await self._paused
+
+class AsyncGatewayStream:
+    """asyncio counterpart of GatewayStream speaking the TRT\\x01 framing on the event loop.
+
+    With `max_inflight > 1` requests are pipelined: up to that many are written
+    before their replies arrive. The gateway answers each connection in order
+    (it echoes req_id 0), so replies are matched to requests by send order, and
+    every pending request fails with ConnectionError if the socket dies.
+    """
+    def __init__(self, transport, protocol, timeout=5.0, max_inflight=1):
+        self.transport = transport; self.timeout = timeout; self.max_inflight = max_inflight
+        self._proto = protocol; self._window = asyncio.Semaphore(max_inflight); self._last = None
+
+    @classmethod
+    async def connect(cls, host: str, port: int, timeout: float = 5.0, max_inflight: int = 1):
+        loop = asyncio.get_running_loop()
+        bufs = _RecvBuffers()
+        transport, protocol = await asyncio.wait_for(
+            loop.create_connection(lambda: _GatewayProtocol(bufs), host, port), timeout)
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(transport, protocol, timeout, max_inflight)
+
+    @property
+    def inflight(self):
+        return len(self._proto._waiters)
+
+    @property
+    def closed(self):
+        return self._proto._exc is not None or self.transport.is_closing()
+
+    async def close(self):
+        self.transport.close()
+
+    async def request(self, model_id: str, arrays) -> Response:
+        """Send one request; the returned `Response` leases a receive buffer until released."""
+        async with self._window:
+            fut = self._proto.submit(_encode_frame(model_id, arrays))
+            await self._proto.drain()
+            return await asyncio.wait_for(fut, self.timeout)
+
+    async def infer(self, model_id: str, arrays):
+        """Request/response; outputs are memoryviews valid until the next infer() call."""
+        if self._last is not None: self._last.release()
+        self._last = resp = await self.request(model_id, arrays)
+        return resp.status, resp.outputs
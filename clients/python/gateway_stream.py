@@ -1,31 +1,108 @@
 # SPDX-License-Identifier: Apache-2.0
-import socket, struct, numpy as np
+import collections, socket, struct, numpy as np
 
 MAGIC=b"TRT\x01"; VERSION=1
+_HDR = struct.Struct("<I4sHHIII")  # frame length prefix + MsgHdr
+_DTYPES = {np.dtype(np.float32): 0, np.dtype(np.float16): 1, np.dtype(np.int8): 2, np.dtype(np.int32): 3}
+_IOV_MAX = 1024
 
-def _pack_frame(model_id, tensors):
-    H = struct.pack("<4sHHIII", MAGIC, VERSION, 0, len(model_id), len(tensors), 0)
-    body = model_id.encode()
-    for a in tensors:
+def _tensor_view(a):
+    """Return (dtype code, shape, byte view) for an array, copying only if it is not C-contiguous."""
+    a = np.asarray(a)
+    dt = _DTYPES.get(a.dtype)
+    if dt is None: raise ValueError("unsupported dtype")
+    if not a.flags.c_contiguous:
         a = np.ascontiguousarray(a)
-        if   a.dtype==np.float32: dt=0
-        elif a.dtype==np.float16: dt=1
-        elif a.dtype==np.int8:    dt=2
-        elif a.dtype==np.int32:   dt=3
-        else: raise ValueError("unsupported dtype")
-        nd=a.ndim; dims=a.shape
-        body += struct.pack("<BB", dt, nd)
-        body += struct.pack("<%di"%nd, *dims)
-        raw=a.tobytes()
-        body += struct.pack("<I", len(raw))
-        body += raw
-    frame = H + body
-    return struct.pack("<I", len(frame)) + frame
+    return dt, a.shape, memoryview(a.reshape(-1).view(np.uint8))
+
+def _encode_frame(model_id, tensors):
+    """Encode a request as a buffer list for scatter-gather sends.
+
+    Only the header and tensor descriptors are packed here; tensor data is
+    referenced through memoryviews of the caller's arrays, which must not be
+    mutated until the frame has been sent.
+    """
+    mid = model_id.encode()
+    descs=[]; views=[]
+    for a in tensors:
+        dt, shape, raw = _tensor_view(a)
+        descs.append(struct.pack("<BB%diI" % len(shape), dt, len(shape), *shape, raw.nbytes))
+        views.append(raw)
+    flen = _HDR.size - 4 + len(mid) + sum(map(len, descs)) + sum(v.nbytes for v in views)
+    head = _HDR.pack(flen, MAGIC, VERSION, 0, len(mid), len(views), 0) + mid
+    bufs=[]
+    for d, v in zip(descs, views):
+        bufs.append(head + d); bufs.append(v)
+        head = b""
+    if head: bufs.append(head)
+    return bufs
+
+def _pack_frame(model_id, tensors):
+    """Single-buffer form of `_encode_frame` for transports without scatter-gather."""
+    return b"".join(_encode_frame(model_id, tensors))
+
+def _sendmsg_all(sock, bufs):
+    """sendall() for a buffer list: one sendmsg per attempt, resuming after partial writes."""
+    if not hasattr(sock, "sendmsg"):
+        for b in bufs: sock.sendall(b)
+        return
+    bufs = [memoryview(b) for b in bufs]
+    while bufs:
+        sent = sock.sendmsg(bufs[:_IOV_MAX])
+        while bufs and sent >= bufs[0].nbytes:
+            sent -= bufs[0].nbytes; bufs.pop(0)
+        if sent: bufs[0] = bufs[0][sent:]
+
+class _RecvBuffers:
+    """Receive buffers sized to the connection's high-water mark, recycled on release."""
+    def __init__(self, keep=2):
+        self.hwm = 0; self.keep = keep
+        self._free = collections.deque()  # append/pop are atomic, releases may come from any thread
+
+    def take(self, n):
+        if n > self.hwm: self.hwm = n
+        while self._free:
+            buf = self._free.pop()
+            if len(buf) >= n: return buf
+        return bytearray(self.hwm)
+
+    def put(self, buf):
+        if len(buf) >= self.hwm and len(self._free) < self.keep: self._free.append(buf)
+
+class Response:
+    """Gateway reply whose outputs are zero-copy memoryviews into a leased receive buffer.
+
+    The buffer returns to its stream on `release()`, after which the outputs (and
+    any `np.frombuffer` views of them) will be overwritten by later replies; copy
+    whatever must outlive the release. Unreleased buffers are simply garbage collected.
+    """
+    __slots__ = ("req_id", "status", "outputs", "_buf", "_owner")
+
+    def __init__(self, req_id, status, outputs, buf=None, owner=None):
+        self.req_id = req_id; self.status = status; self.outputs = outputs
+        self._buf = buf; self._owner = owner
+
+    def release(self):
+        buf, self._buf = self._buf, None
+        self.outputs = ()
+        if buf is not None and self._owner is not None: self._owner.put(buf)
+
+def _parse_response(buf, flen, owner=None):
+    if flen < 12: raise OSError("malformed response")
+    req_id, status, nout = struct.unpack_from("<III", buf, 0)
+    lens = struct.unpack_from("<%dI" % nout, buf, 12)
+    off = 12 + 4*nout
+    if off + sum(lens) > flen: raise OSError("malformed response")
+    mv = memoryview(buf); outs=[]
+    for L in lens:
+        outs.append(mv[off:off+L]); off+=L
+    return Response(req_id, status, outs, buf, owner)
 
 class GatewayStream:
     def __init__(self, host: str, port: int, timeout: float = 5.0):
         self.host = host; self.port = port; self.timeout = timeout
         self.s = socket.create_connection((host,port), timeout=timeout)
+        self._bufs = _RecvBuffers(); self._lenbuf = bytearray(4); self._last = None
 
     def close(self):
         try:
@@ -34,24 +111,24 @@ class GatewayStream:
             pass
         self.s.close()
 
-    def infer(self, model_id: str, arrays):
-        frame = _pack_frame(model_id, arrays)
-        self.s.sendall(frame)
-        def recvn(n):
-            buf=b""
-            while len(buf)<n:
-                chunk=self.s.recv(n-len(buf))
-                if not chunk: raise OSError("short read")
-                buf+=chunk
-            return buf
-        flen, = struct.unpack("<I", recvn(4))
-        payload = recvn(flen)
-        off=0
-        req_id, status, nout = struct.unpack_from("<III", payload, off); off+=12
-        lens = [struct.unpack_from("<I", payload, off+i*4)[0] for i in range(nout)]
-        off += 4*nout
-        outs=[]
-        for L in lens:
-            outs.append(payload[off:off+L]); off+=L
-        return status, outs
+    def _recv_exact(self, view):
+        got = 0
+        while got < len(view):
+            k = self.s.recv_into(view[got:])
+            if not k: raise OSError("short read")
+            got += k
 
+    def request(self, model_id: str, arrays) -> Response:
+        """Send one request; the returned `Response` leases a receive buffer until released."""
+        _sendmsg_all(self.s, _encode_frame(model_id, arrays))
+        self._recv_exact(memoryview(self._lenbuf))
+        flen, = struct.unpack("<I", self._lenbuf)
+        buf = self._bufs.take(flen)
+        self._recv_exact(memoryview(buf)[:flen])
+        return _parse_response(buf, flen, self._bufs)
+
+    def infer(self, model_id: str, arrays):
+        """Blocking request/response; outputs are memoryviews valid until the next infer() call."""
+        if self._last is not None: self._last.release()
+        self._last = resp = self.request(model_id, arrays)
+        return resp.status, resp.outputs
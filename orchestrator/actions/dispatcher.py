@@ -4,8 +4,11 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, List, Tuple
 
+from ..config import OutboxConfig
+from ..metrics import ACTION_DISPATCH_LATENCY, ACTION_FAILED, ACTION_OVERFLOW, ACTION_QUEUE_DEPTH
 from .base import Action, BaseDispatcher
 from .log import LogDispatcher
 from .mqtt import MQTTDispatcher
@@ -13,11 +16,96 @@ from .webhook import WebhookDispatcher
 
 log = logging.getLogger(__name__)
 
+# how long close() lets outboxes drain before cancelling their consumers
+DRAIN_TIMEOUT_S = 5.0
+
+# (action, agent, pipeline, enqueue time from time.perf_counter())
+_Item = Tuple[Action, str, str, float]
+
+
+class Outbox:
+    """Bounded queue in front of one dispatcher, drained by `concurrency` consumer tasks.
+
+    `put` returns as soon as the action is queued, so transport latency no longer counts
+    against the pipeline worker. When the queue holds `max_queue` actions, `drop_oldest`
+    discards the oldest queued action, `drop_new` discards the incoming one, and `block`
+    makes the producer wait for room. With one consumer, actions are dispatched in order.
+    """
+
+    def __init__(self, dispatcher: BaseDispatcher, cfg: OutboxConfig):
+        self.dispatcher = dispatcher
+        self.cfg = cfg
+        self._queue: asyncio.Queue[_Item] = asyncio.Queue(maxsize=max(1, cfg.max_queue))
+        self._consumers: List[asyncio.Task] = []
+        self._depth = ACTION_QUEUE_DEPTH.labels(dispatcher.name)
+        self._overflow = ACTION_OVERFLOW.labels(dispatcher.name, cfg.overflow)
+        self._latency = ACTION_DISPATCH_LATENCY.labels(dispatcher.name)
+
+    async def put(self, action: Action, *, agent: str, pipeline: str) -> None:
+        if not self._consumers:
+            self._start()
+        item = (action, agent, pipeline, time.perf_counter())
+        queue = self._queue
+        if queue.full():
+            self._overflow.inc()
+            if self.cfg.overflow == "drop_new":
+                return
+            if self.cfg.overflow == "drop_oldest":
+                queue.get_nowait()
+                queue.task_done()
+            else:
+                await queue.put(item)
+                self._depth.set(queue.qsize())
+                return
+        queue.put_nowait(item)
+        self._depth.set(queue.qsize())
+
+    def _start(self) -> None:
+        name = self.dispatcher.name
+        self._consumers = [
+            asyncio.create_task(self._consume(), name=f"outbox-{name}-{i}") for i in range(self.cfg.concurrency)
+        ]
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            action, agent, pipeline, enqueued = await queue.get()
+            self._depth.set(queue.qsize())
+            try:
+                await self.dispatcher.dispatch(action, agent=agent, pipeline=pipeline)
+            except Exception:
+                ACTION_FAILED.labels(self.dispatcher.name).inc()
+                log.exception("dispatcher %s failed to deliver an action from %s", self.dispatcher.name, agent)
+            else:
+                self._latency.observe((time.perf_counter() - enqueued) * 1000)
+            finally:
+                queue.task_done()
+
+    async def close(self, timeout: float = DRAIN_TIMEOUT_S) -> None:
+        if self._consumers:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                log.warning(
+                    "dispatcher %s: %d queued actions not delivered within %.0fs",
+                    self.dispatcher.name,
+                    self._queue.qsize(),
+                    timeout,
+                )
+            for task in self._consumers:
+                task.cancel()
+            await asyncio.gather(*self._consumers, return_exceptions=True)
+            self._consumers = []
+        self._depth.set(0)
+
+
 _DISPATCHERS: Dict[str, BaseDispatcher] = {}
+_OUTBOXES: Dict[str, Outbox] = {}
 
 
 def initialise(action_configs) -> None:
     _DISPATCHERS.clear()
+    _OUTBOXES.clear()
     for cfg in action_configs:
         if cfg.type == "log":
             dispatcher = LogDispatcher(cfg.name, cfg.options)
@@ -28,10 +116,17 @@ def initialise(action_configs) -> None:
         else:
             raise ValueError(f"unsupported dispatcher type '{cfg.type}'")
         _DISPATCHERS[cfg.name] = dispatcher
+        if cfg.outbox is not None:
+            _OUTBOXES[cfg.name] = Outbox(dispatcher, cfg.outbox)
     log.info("registered %d action dispatchers", len(_DISPATCHERS))
 
 
 async def dispatch(action: Action, *, agent: str, pipeline: str) -> None:
+    """Queue `action` on its dispatcher's outbox, or deliver it inline when it has none."""
+    outbox = _OUTBOXES.get(action.dispatcher)
+    if outbox is not None:
+        await outbox.put(action, agent=agent, pipeline=pipeline)
+        return
     if action.dispatcher not in _DISPATCHERS:
         log.warning("no dispatcher registered for action %s", action.dispatcher)
         return
@@ -39,4 +134,5 @@ async def dispatch(action: Action, *, agent: str, pipeline: str) -> None:
 
 
 async def close() -> None:
+    await asyncio.gather(*(outbox.close() for outbox in _OUTBOXES.values()))
     await asyncio.gather(*(d.close() for d in _DISPATCHERS.values() if hasattr(d, "close")))
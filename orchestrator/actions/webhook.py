@@ -3,45 +3,211 @@
 from __future__ import annotations
 
 import asyncio
+import collections
+import json
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 import aiohttp
 
+from ..metrics import WEBHOOK_BATCH_SIZE, WEBHOOK_DROPPED, WEBHOOK_FLUSH_LATENCY
 from .base import Action, BaseDispatcher
 
 log = logging.getLogger(__name__)
 
+BATCH_FORMATS = {"ndjson": "application/x-ndjson", "array": "application/json"}
+MAX_RETRY_DELAY_S = 30.0
+
+# (record, enqueue time from time.perf_counter())
+_Entry = Tuple[Dict[str, Any], float]
+
+
+class _Target:
+    __slots__ = ("entries", "timer", "inflight")
+
+    def __init__(self):
+        self.entries: Deque[_Entry] = collections.deque()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.inflight = 0
+
 
 class WebhookDispatcher(BaseDispatcher):
+    """Posts agent actions to HTTP endpoints over a pooled keep-alive session.
+
+    Connections come from one `aiohttp` connector bounded by `max_connections` in total
+    and `max_per_host` per endpoint. Without a `batch` block every action is one request,
+    awaited by the pipeline. With `batch`, actions are buffered per URL and `dispatch`
+    returns at once. A buffer is posted as NDJSON or a JSON array when it holds
+    `max_batch` actions or its oldest action is `max_delay_ms` old. Each URL has at most
+    `max_per_host` batches in flight. Failed posts (connection errors, timeouts, 429 and
+    5xx) are retried in the background `retries` times, with exponential backoff from
+    `retry_backoff_ms`. While an endpoint is down, actions wait in its buffer. Beyond
+    `max_pending` actions, the oldest are dropped. An action whose payload cannot be
+    encoded as JSON is dropped on its own; the rest of its batch is still posted.
+    """
+
     def __init__(self, name: str, options: Dict[str, Any]):
         super().__init__(name, options)
         self._session: aiohttp.ClientSession | None = None
         self._lock = asyncio.Lock()
+        self.max_connections = int(options.get("max_connections", 16))
+        self.max_per_host = int(options.get("max_per_host", 4))
+        self.retries = int(options.get("retries", 3))
+        self.retry_backoff = float(options.get("retry_backoff_ms", 250)) / 1000.0
+        batch = options.get("batch")
+        self.batched = bool(batch)
+        batch = batch if isinstance(batch, dict) else {}
+        self.max_batch = int(batch.get("max_batch", 100))
+        self.max_delay = float(batch.get("max_delay_ms", 250)) / 1000.0
+        self.format = batch.get("format", "ndjson")
+        if self.format not in BATCH_FORMATS:
+            raise ValueError(
+                f"webhook {name}: unknown batch format '{self.format}'; expected one of {tuple(BATCH_FORMATS)}"
+            )
+        self.max_pending = int(options.get("max_pending", 10_000))
+        self._targets: Dict[str, _Target] = {}
+        self._tasks: Set[asyncio.Task] = set()
 
     async def _ensure(self) -> aiohttp.ClientSession:
         async with self._lock:
             if self._session is not None:
                 return self._session
             timeout = aiohttp.ClientTimeout(total=self.options.get("timeout", 5))
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                keepalive_timeout=float(self.options.get("keepalive_s", 30)),
+            )
+            self._session = aiohttp.ClientSession(timeout=timeout, connector=connector)
             return self._session
 
+    def _headers(self, **extra: str) -> Dict[str, str]:
+        return {**self.options.get("headers", {}), **extra}
+
     async def dispatch(self, action: Action, *, agent: str, pipeline: str) -> None:
-        session = await self._ensure()
         url = action.target or self.options.get("url")
         if not url:
             log.warning("webhook dispatcher %s missing url", self.name)
             return
+        record = {"agent": agent, "pipeline": pipeline, **action.payload}
+        if self.batched:
+            self._enqueue(url, record)
+            return
+        session = await self._ensure()
         method = self.options.get("method", "POST").upper()
-        headers = {**self.options.get("headers", {}), "X-Agent": agent, "X-Pipeline": pipeline}
-        json_payload = {"agent": agent, "pipeline": pipeline, **action.payload}
-        async with session.request(method, url, json=json_payload, headers=headers) as resp:
+        headers = self._headers(**{"X-Agent": agent, "X-Pipeline": pipeline})
+        async with session.request(method, url, json=record, headers=headers) as resp:
             if resp.status >= 400:
                 body = await resp.text()
                 log.error("webhook %s failed status=%s body=%s", self.name, resp.status, body[:200])
 
+    def _enqueue(self, url: str, record: Dict[str, Any]) -> None:
+        target = self._targets.get(url)
+        if target is None:
+            target = self._targets[url] = _Target()
+        target.entries.append((record, time.perf_counter()))
+        if len(target.entries) > self.max_pending:
+            target.entries.popleft()
+            WEBHOOK_DROPPED.labels(self.name, "overflow").inc()
+        self._schedule(url)
+
+    def _schedule(self, url: str) -> None:
+        """Start every batch that is due and that the URL's in-flight limit allows."""
+        target = self._targets[url]
+        while target.entries and target.inflight < self.max_per_host:
+            age = time.perf_counter() - target.entries[0][1]
+            if len(target.entries) < self.max_batch and age < self.max_delay:
+                if target.timer is None:
+                    target.timer = asyncio.get_running_loop().call_later(self.max_delay - age, self._on_timer, url)
+                return
+            self._start(url, target)
+        # At the limit, the buffer waits; the next batch to finish reschedules it.
+
+    def _on_timer(self, url: str) -> None:
+        self._targets[url].timer = None
+        self._schedule(url)
+
+    def _start(self, url: str, target: _Target) -> None:
+        if target.timer is not None:
+            target.timer.cancel()
+            target.timer = None
+        batch = [target.entries.popleft() for _ in range(min(self.max_batch, len(target.entries)))]
+        target.inflight += 1
+        task = asyncio.create_task(self._send(url, batch), name=f"webhook-{self.name}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, url: str, batch: List[_Entry]) -> None:
+        try:
+            WEBHOOK_BATCH_SIZE.labels(self.name).observe(len(batch))
+            lines = self._encode_records(url, [record for record, _ in batch])
+            if lines and await self._post(url, self._join(lines), len(lines)):
+                WEBHOOK_FLUSH_LATENCY.labels(self.name).observe((time.perf_counter() - batch[0][1]) * 1000)
+        finally:
+            self._targets[url].inflight -= 1
+            self._schedule(url)
+
+    def _encode_records(self, url: str, records: List[Dict[str, Any]]) -> List[bytes]:
+        """Each record as compact JSON; records that cannot be encoded are logged and dropped."""
+        lines = []
+        for record in records:
+            try:
+                lines.append(json.dumps(record, separators=(",", ":")).encode("utf-8"))
+            except (TypeError, ValueError) as exc:
+                log.error("webhook %s dropped an action from %s for %s: %s", self.name, record.get("agent"), url, exc)
+                WEBHOOK_DROPPED.labels(self.name, "encode").inc()
+        return lines
+
+    def _join(self, lines: List[bytes]) -> bytes:
+        if self.format == "array":
+            return b"[" + b",".join(lines) + b"]"
+        return b"".join(line + b"\n" for line in lines)
+
+    async def _post(self, url: str, body: bytes, count: int) -> bool:
+        """Deliver one batch, retrying transient failures; False once it has been dropped."""
+        session = await self._ensure()
+        method = self.options.get("method", "POST").upper()
+        headers = self._headers(**{"Content-Type": BATCH_FORMATS[self.format]})
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.request(method, url, data=body, headers=headers) as resp:
+                    if resp.status < 400:
+                        return True
+                    text = await resp.text()
+                    if resp.status != 429 and resp.status < 500:
+                        log.error(
+                            "webhook %s rejected a batch of %d: status=%s body=%s",
+                            self.name,
+                            count,
+                            resp.status,
+                            text[:200],
+                        )
+                        WEBHOOK_DROPPED.labels(self.name, "rejected").inc(count)
+                        return False
+                    error = f"status={resp.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = repr(exc)
+            if attempt < self.retries:
+                delay = min(MAX_RETRY_DELAY_S, self.retry_backoff * 2**attempt)
+                log.warning(
+                    "webhook %s batch to %s failed (%s); retry %d in %.2fs", self.name, url, error, attempt + 1, delay
+                )
+                await asyncio.sleep(delay)
+        log.error("webhook %s dropped a batch of %d after %d attempts (%s)", self.name, count, self.retries + 1, error)
+        WEBHOOK_DROPPED.labels(self.name, "failed").inc(count)
+        return False
+
     async def close(self) -> None:
+        # Deliver what is still buffered, ignoring the in-flight limit. Batches finishing
+        # meanwhile may schedule more, so repeat until nothing is buffered or in flight.
+        while True:
+            for url, target in self._targets.items():
+                while target.entries:
+                    self._start(url, target)
+            if not self._tasks:
+                break
+            await asyncio.gather(*self._tasks, return_exceptions=True)
         if self._session:
             await self._session.close()
             self._session = None
@@ -3,15 +3,35 @@
 from __future__ import annotations
 
 import abc
-from typing import Iterable, List
+import asyncio
+from typing import Iterable, List, Optional
 
 from orchestrator.actions.base import Action
 
+from .suppression import build_suppressor
+
+
+class AgentTimeout(Exception):
+    """Raised by `Agent.run` when the agent did not finish within its `timeout_ms`."""
+
 
 class Agent(abc.ABC):
+    """Decision logic run on every result of the pipelines that list the agent.
+
+    The common options `timeout_ms` and `max_concurrency` bound how long a pipeline waits
+    for the agent and how many messages it handles at once across all of its pipelines.
+    `suppress` configures an `ActionSuppressor` that filters the agent's actions before
+    they are dispatched.
+    """
+
     def __init__(self, name: str, **kwargs):
         self.name = name
         self.options = kwargs
+        timeout_ms = kwargs.get("timeout_ms")
+        self.timeout_s: Optional[float] = float(timeout_ms) / 1000.0 if timeout_ms else None
+        max_concurrency = kwargs.get("max_concurrency")
+        self._semaphore = asyncio.Semaphore(int(max_concurrency)) if max_concurrency else None
+        self.suppressor = build_suppressor(name, kwargs)
 
     async def start(self) -> None:
         """Optional async initialisation."""
@@ -23,6 +43,30 @@ class Agent(abc.ABC):
     async def handle(self, *, message, payload, latency_ms: float) -> Iterable[Action]:
         raise NotImplementedError
 
+    async def run(self, *, message, payload, latency_ms: float) -> Iterable[Action]:
+        """`handle`, limited by `max_concurrency`; raises AgentTimeout after `timeout_ms`.
+
+        The timeout includes waiting for a free slot, so a backed-up agent cannot stall
+        the pipeline for longer than its budget. A TimeoutError raised by the agent's own
+        code (an HTTP client, say) before that propagates unchanged.
+        """
+        if self.timeout_s is None:
+            return await self._handle(message, payload, latency_ms)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_s
+        try:
+            return await asyncio.wait_for(self._handle(message, payload, latency_ms), self.timeout_s)
+        except asyncio.TimeoutError:
+            if loop.time() < deadline:
+                raise
+            raise AgentTimeout(f"agent {self.name} exceeded {self.timeout_s * 1000:.0f} ms") from None
+
+    async def _handle(self, message, payload, latency_ms: float) -> Iterable[Action]:
+        if self._semaphore is None:
+            return await self.handle(message=message, payload=payload, latency_ms=latency_ms)
+        async with self._semaphore:
+            return await self.handle(message=message, payload=payload, latency_ms=latency_ms)
+
 
 class AgentRegistry:
     def __init__(self):
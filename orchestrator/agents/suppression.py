@@ -0,0 +1,174 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Debouncing, emit-on-change and coalescing of the actions an agent emits."""
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from orchestrator.actions import dispatcher
+from orchestrator.actions.base import Action
+from orchestrator.metrics import ACTIONS_SUPPRESSED
+
+log = logging.getLogger(__name__)
+
+MAX_KEYS = 10_000
+
+_Key = Tuple[Any, ...]
+
+
+class _State:
+    __slots__ = ("last_emit", "last_values", "pending", "pending_count", "pipeline", "timer")
+
+    def __init__(self):
+        self.last_emit = float("-inf")
+        self.last_values: Optional[Tuple[Any, ...]] = None
+        self.pending: Optional[Action] = None
+        self.pending_count = 0
+        self.pipeline = ""
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class ActionSuppressor:
+    """Filters one agent's actions before they are dispatched.
+
+    Actions are grouped by (dispatcher, target) plus the payload fields listed in `key`.
+    With `on_change`, an action whose `on_change` payload fields equal those of the last
+    emitted action of its group is dropped. With `min_interval_ms`, a group emits at most
+    one action per interval. Actions held back by the interval are dropped, or, with
+    `coalesce`, folded into one summary sent when the interval ends. The summary carries
+    the latest payload plus `coalesced`, the number of actions it stands for. Groups beyond
+    `max_keys` evict the least recently used one; a summary the evicted group still
+    held is sent at once.
+    """
+
+    def __init__(self, agent: str, options: Dict[str, Any]):
+        self.agent = agent
+        self.min_interval = float(options.get("min_interval_ms", 0)) / 1000.0
+        self.key_fields: Tuple[str, ...] = tuple(_as_list(options.get("key")))
+        self.change_fields: Tuple[str, ...] = tuple(_as_list(options.get("on_change")))
+        self.coalesce = bool(options.get("coalesce", False))
+        if self.coalesce and not self.min_interval:
+            raise ValueError(f"agent {agent}: suppress.coalesce needs min_interval_ms")
+        self.max_keys = int(options.get("max_keys", MAX_KEYS))
+        self._states: collections.OrderedDict[_Key, _State] = collections.OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self._unchanged = ACTIONS_SUPPRESSED.labels(agent, "unchanged")
+        self._interval = ACTIONS_SUPPRESSED.labels(agent, "interval")
+
+    def filter(self, actions: Iterable[Action], *, pipeline: str) -> List[Action]:
+        """The actions to dispatch now; the rest are dropped or held for a summary."""
+        now = time.monotonic()
+        passed = []
+        for action in actions:
+            state = self._state(action)
+            if self.change_fields:
+                values = tuple(action.payload.get(f) for f in self.change_fields)
+                if values == state.last_values:
+                    self._unchanged.inc()
+                    continue
+            if now - state.last_emit < self.min_interval:
+                self._interval.inc()
+                if self.coalesce:
+                    self._hold(state, action, pipeline, now)
+                continue
+            if self.change_fields:
+                state.last_values = values
+            state.last_emit = now
+            passed.append(action)
+        return passed
+
+    async def flush(self) -> None:
+        """Dispatch every held summary now, e.g. before shutdown."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        for state in self._states.values():
+            if state.timer is not None:
+                state.timer.cancel()
+                state.timer = None
+            summary = self._take_summary(state)
+            if summary is not None:
+                await dispatcher.dispatch(summary, agent=self.agent, pipeline=state.pipeline)
+
+    def _state(self, action: Action) -> _State:
+        key = (action.dispatcher, action.target) + tuple(_hashable(action.payload.get(f)) for f in self.key_fields)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _State()
+            if len(self._states) > self.max_keys:
+                _, evicted = self._states.popitem(last=False)
+                if evicted.timer is not None:
+                    evicted.timer.cancel()
+                    evicted.timer = None
+                summary = self._take_summary(evicted)
+                if summary is not None:
+                    log.debug("agent %s: key evicted, sending its coalesced summary early", self.agent)
+                    self._dispatch(summary, evicted.pipeline)
+        else:
+            self._states.move_to_end(key)
+        return state
+
+    def _hold(self, state: _State, action: Action, pipeline: str, now: float) -> None:
+        state.pending = action
+        state.pending_count += 1
+        state.pipeline = pipeline
+        if state.timer is None:
+            delay = state.last_emit + self.min_interval - now
+            state.timer = asyncio.get_running_loop().call_later(delay, self._emit_summary, state)
+
+    def _emit_summary(self, state: _State) -> None:
+        state.timer = None
+        summary = self._take_summary(state)
+        if summary is None:
+            return
+        state.last_emit = time.monotonic()
+        if self.change_fields:
+            state.last_values = tuple(summary.payload.get(f) for f in self.change_fields)
+        self._dispatch(summary, state.pipeline)
+
+    def _dispatch(self, summary: Action, pipeline: str) -> None:
+        task = asyncio.create_task(dispatcher.dispatch(summary, agent=self.agent, pipeline=pipeline))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(_log_failure)
+
+    @staticmethod
+    def _take_summary(state: _State) -> Optional[Action]:
+        action = state.pending
+        if action is None:
+            return None
+        summary = Action(
+            dispatcher=action.dispatcher,
+            target=action.target,
+            payload={**action.payload, "coalesced": state.pending_count},
+            metadata=action.metadata,
+        )
+        state.pending = None
+        state.pending_count = 0
+        return summary
+
+
+def build_suppressor(agent: str, options: Dict[str, Any]) -> Optional[ActionSuppressor]:
+    config = options.get("suppress")
+    return ActionSuppressor(agent, config) if config else None
+
+
+def _as_list(value: Any) -> Sequence[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        log.error("coalesced action failed to dispatch", exc_info=task.exception())
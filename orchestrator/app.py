@@ -6,34 +6,46 @@ import argparse
 import asyncio
 import logging
 import signal
-from datetime import datetime, timezone
-from typing import Dict, Tuple
+import time
+from typing import Dict, Optional, Tuple
 
 from prometheus_client import start_http_server
 
-from orchestrator import agents
+from orchestrator import agents, executors
 from orchestrator.actions import dispatcher as action_dispatcher
 from orchestrator.config import OrchestratorConfig, load_config
 from orchestrator.connectors import create_connector
 from orchestrator.gateway_pool import GatewayPool
-from orchestrator.metrics import PIPELINE_DROPPED, PIPELINE_INGRESS, PIPELINE_LATENCY, QUEUE_DEPTH
+from orchestrator.metrics import PIPELINE_DROPPED, PIPELINE_INGRESS, PIPELINE_LATENCY
 from orchestrator.pipeline import PipelineFactory
-from orchestrator.messages import EdgeMessage
+from orchestrator.preprocessing import load_model_specs
+from orchestrator.scheduler import PipelineScheduler
+from orchestrator.utils import shard_of
 from orchestrator.agents.base import Agent
 
 log = logging.getLogger("orchestrator")
 
 
 class EdgeOrchestrator:
-    def __init__(self, config: OrchestratorConfig):
+    """Runs every pipeline, or with `shard=(index, count)` one worker's share of the sensors.
+
+    A sharded orchestrator only starts connectors it owns and, for connectors sharded by
+    sensor, only accepts messages whose `sensor_id` hashes to its index. Metrics are then
+    served by the supervisor instead of this process.
+    """
+
+    def __init__(self, config: OrchestratorConfig, shard: Optional[Tuple[int, int]] = None):
         self.config = config
+        self.shard = shard
         self.gateway = GatewayPool(
             host=config.gateway.host,
             port=config.gateway.port,
             pool_size=config.gateway.pool_size,
             timeout=config.gateway.timeout_s,
+            transport=config.gateway.transport,
+            pipeline_depth=config.gateway.pipeline_depth,
         )
-        self.queue: asyncio.Queue[Tuple[str | None, EdgeMessage | None]] = asyncio.Queue(maxsize=1024)
+        self.scheduler = PipelineScheduler(config.pipelines.values())
         self.pipelines = {}
         self.connectors = []
         self.agent_registry: Dict[str, Agent] = {}
@@ -42,35 +54,52 @@ class EdgeOrchestrator:
 
     async def start(self) -> None:
         action_dispatcher.initialise(self.config.actions)
+        executors.initialise(self.config.executors)
         self.agent_registry = agents.build_agents(self.config.agents)
         for agent in self.agent_registry.values():
             await agent.start()
+        model_specs = load_model_specs(self.config.models_config) if self.config.models_config else {}
         for p_cfg in self.config.pipelines.values():
-            factory = PipelineFactory(p_cfg)
+            factory = PipelineFactory(p_cfg, model_specs)
             self.pipelines[p_cfg.id] = factory.build(self.agent_registry)
         for conn_cfg in self.config.connectors:
-            connector = create_connector(conn_cfg, on_message=self._handle_message)
+            on_message = self._handle_message
+            if self.shard is not None:
+                index, count = self.shard
+                if conn_cfg.shard == "connector" and shard_of(conn_cfg.id, count) != index:
+                    continue
+                if conn_cfg.shard == "sensor":
+                    on_message = self._handle_owned_message
+            connector = create_connector(conn_cfg, on_message=on_message)
             self.connectors.append(connector)
             await connector.start()
-        worker_count = max(2, len(self.pipelines))
+        worker_count = self.config.concurrency or max(2, len(self.pipelines))
         for idx in range(worker_count):
             self._workers.append(asyncio.create_task(self._worker_loop(idx), name=f"worker-{idx}"))
-        start_http_server(self.config.metrics_port)
+        if self.shard is None:
+            start_http_server(self.config.metrics_port)
         log.info("orchestrator started with %d pipelines, %d connectors", len(self.pipelines), len(self.connectors))
 
     async def stop(self) -> None:
         self._stop_event.set()
-        for _ in self._workers:
-            await self.queue.put((None, None))
+        self.scheduler.close()
         for connector in self.connectors:
             await connector.stop()
         await asyncio.gather(*self._workers, return_exceptions=True)
         self._workers.clear()
         for agent in self.agent_registry.values():
+            if agent.suppressor is not None:
+                await agent.suppressor.flush()  # held summaries still reach the outboxes
             await agent.stop()
         await self.gateway.close()
+        await asyncio.to_thread(executors.shutdown)
         await action_dispatcher.close()
 
+    async def _handle_owned_message(self, message) -> None:
+        index, count = self.shard
+        if shard_of(message.sensor_id, count) == index:
+            await self._handle_message(message)
+
     async def _handle_message(self, message) -> None:
         pipeline_id = message.pipeline_override
         if not pipeline_id:
@@ -81,59 +110,43 @@ class EdgeOrchestrator:
             log.warning("pipeline %s not registered", pipeline_id)
             PIPELINE_DROPPED.labels(pipeline_id, "unregistered").inc()
             return
-        try:
-            self.queue.put_nowait((pipeline_id, message))
-            QUEUE_DEPTH.set(self.queue.qsize())
+        reason = self.scheduler.offer(pipeline_id, message)
+        if reason is None:
             PIPELINE_INGRESS.labels(pipeline_id).inc()
-        except asyncio.QueueFull:
-            PIPELINE_DROPPED.labels(pipeline_id, "queue_full").inc()
+            return
+        PIPELINE_DROPPED.labels(pipeline_id, reason).inc()
+        if reason == "queue_full":
             log.error("pipeline %s queue full; dropping message", pipeline_id)
+        else:
+            log.warning("pipeline %s cannot meet deadline for message from %s; dropping", pipeline_id, message.sensor_id)
 
     async def _worker_loop(self, idx: int) -> None:
         while not self._stop_event.is_set():
-            pipeline_id, message = await self.queue.get()
-            if pipeline_id is None or message is None:
-                self.queue.task_done()
+            item = await self.scheduler.next()
+            if item is None:
                 break
-            QUEUE_DEPTH.set(self.queue.qsize())
+            pipeline_id, message = item
             pipeline = self.pipelines[pipeline_id]
-            if pipeline.cfg.deadline_ms:
-                age = _latency_ms(message.timestamp)
-                if age > pipeline.cfg.deadline_ms:
-                    PIPELINE_DROPPED.labels(pipeline_id, "deadline").inc()
-                    log.warning(
-                        "pipeline %s dropping message (age %.2fms > deadline %sms)",
-                        pipeline_id,
-                        age,
-                        pipeline.cfg.deadline_ms,
-                    )
-                    self.queue.task_done()
-                    continue
+            started = time.perf_counter()
             try:
                 await pipeline.run(message, self.gateway)
-                latency = _latency_ms(message.timestamp)
-                PIPELINE_LATENCY.labels(pipeline_id).observe(latency)
+                PIPELINE_LATENCY.labels(pipeline_id).observe(message.age_ms())
             except Exception:
                 PIPELINE_DROPPED.labels(pipeline_id, "exception").inc()
                 log.exception("pipeline %s processing failed", pipeline_id)
             finally:
-                self.queue.task_done()
-
+                self.scheduler.record_service(pipeline_id, (time.perf_counter() - started) * 1000)
 
-def _latency_ms(timestamp: datetime) -> float:
-    now = datetime.now(timezone.utc)
-    delta = now - timestamp
-    return delta.total_seconds() * 1000
 
-
-async def main_async(args) -> None:
+async def main_async(args, shard: Optional[Tuple[int, int]] = None) -> None:
     config = load_config(args.config)
-    orchestrator = EdgeOrchestrator(config)
+    orchestrator = EdgeOrchestrator(config, shard)
     await orchestrator.start()
     loop = asyncio.get_running_loop()
     stop_event = asyncio.Event()
 
-    for sig in (signal.SIGINT, signal.SIGTERM):
+    # Supervised workers leave Ctrl-C to the supervisor, which stops them with SIGTERM.
+    for sig in (signal.SIGINT, signal.SIGTERM) if shard is None else (signal.SIGTERM,):
         try:
             loop.add_signal_handler(sig, stop_event.set)
         except NotImplementedError:
@@ -149,7 +162,13 @@ def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
     parser = argparse.ArgumentParser(description="Edge orchestrator for TensorRT gateway")
     parser.add_argument("--config", default="config/pipelines.yaml")
+    parser.add_argument("--workers", type=int, default=1, help="orchestrator processes; sensors are sharded across them")
     args = parser.parse_args()
+    if args.workers > 1:
+        from orchestrator.supervisor import supervise
+
+        supervise(args.config, args.workers)
+        return
     try:
         asyncio.run(main_async(args))
     except KeyboardInterrupt:
@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Dynamic micro-batching of concurrent inference requests for one model."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from .config import BatchConfig
+from .gateway_pool import GatewayPool, InferenceResult
+from .metrics import BATCH_QUEUE_DELAY, BATCH_SIZE
+
+log = logging.getLogger(__name__)
+
+BatchKey = Tuple[Tuple[Tuple[int, ...], str], ...]
+
+
+@dataclass(slots=True)
+class _Pending:
+    arrays: List[np.ndarray]
+    rows: int
+    future: asyncio.Future
+    enqueued: float
+
+
+class _SharedLease:
+    """Releases a batch reply once every request carved out of it has released its share."""
+
+    __slots__ = ("_result", "_refs")
+
+    def __init__(self, result: InferenceResult, refs: int):
+        self._result = result
+        self._refs = refs
+
+    def release(self) -> None:
+        self._refs -= 1
+        if self._refs == 0:
+            self._result.release()
+
+
+class MicroBatcher:
+    """Stacks concurrent requests with matching input shapes into one N-batch inference.
+
+    Requests are grouped by per-input trailing shape and dtype. A group is flushed when it
+    holds `max_batch` rows or `max_delay_ms` after its first request, whichever comes
+    first. Each output is split back along the leading dimension, so the model must
+    accept a dynamic batch and emit batch-major outputs. A batch cancelled in flight
+    cancels the requests waiting on it.
+    """
+
+    def __init__(self, gateway: GatewayPool, model: str, cfg: BatchConfig, *, pipeline: str):
+        self.gateway = gateway
+        self.model = model
+        self.max_batch = cfg.max_batch
+        self.max_delay = cfg.max_delay_ms / 1000.0
+        self.pipeline = pipeline
+        self._groups: Dict[BatchKey, List[_Pending]] = {}
+        self._rows: Dict[BatchKey, int] = {}
+        self._timers: Dict[BatchKey, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def infer(self, arrays: Sequence[np.ndarray]) -> InferenceResult:
+        arrays = [np.asarray(a) for a in arrays]
+        rows = arrays[0].shape[0] if arrays and arrays[0].ndim else 0
+        if not rows or any(a.ndim == 0 or a.shape[0] != rows for a in arrays) or rows >= self.max_batch:
+            return await self.gateway.infer(self.model, arrays)
+        key: BatchKey = tuple((a.shape[1:], a.dtype.str) for a in arrays)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = self._groups.setdefault(key, [])
+        group.append(_Pending(arrays, rows, future, time.perf_counter()))
+        self._rows[key] = self._rows.get(key, 0) + rows
+        if self._rows[key] >= self.max_batch:
+            self._flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.max_delay, self._flush, key)
+        return await future
+
+    def _flush(self, key: BatchKey) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._groups.pop(key, [])
+        self._rows.pop(key, None)
+        if batch:
+            task = asyncio.create_task(self._run(batch), name=f"batch-{self.pipeline}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        now = time.perf_counter()
+        total = sum(p.rows for p in batch)
+        for p in batch:
+            BATCH_QUEUE_DELAY.labels(self.pipeline).observe((now - p.enqueued) * 1000)
+        BATCH_SIZE.labels(self.pipeline).observe(total)
+        try:
+            if len(batch) == 1:
+                inputs = batch[0].arrays
+            else:
+                inputs = [np.concatenate([p.arrays[i] for p in batch], axis=0) for i in range(len(batch[0].arrays))]
+            result = await self.gateway.infer(self.model, inputs)
+            parts = self._split(result, batch, total)
+        except Exception as exc:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(exc)
+            return
+        except BaseException:
+            # cancelled (e.g. at shutdown): no waiter may be left hanging on its future
+            for p in batch:
+                p.future.cancel()
+            raise
+        for p, part in zip(batch, parts):
+            if p.future.done():
+                part.release()
+            else:
+                p.future.set_result(part)
+
+    def _split(self, result: InferenceResult, batch: List[_Pending], total: int) -> List[InferenceResult]:
+        if len(batch) == 1:
+            return [result]
+        if result.status != 0:
+            result.release()
+            return [InferenceResult(status=result.status, outputs=[]) for _ in batch]
+        strides = []
+        for out in result.outputs:
+            if len(out) % total:
+                result.release()
+                raise ValueError(
+                    f"model {self.model} output of {len(out)} bytes does not split into {total} batch rows"
+                )
+            strides.append(len(out) // total)
+        lease = _SharedLease(result, len(batch))
+        parts = []
+        row = 0
+        for p in batch:
+            outputs = [out[row * s : (row + p.rows) * s] for out, s in zip(result.outputs, strides)]
+            parts.append(InferenceResult(status=0, outputs=outputs, lease=lease))
+            row += p.rows
+        return parts
@@ -0,0 +1,45 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Preallocated, recycled buffers for hot ingest paths."""
+from __future__ import annotations
+
+import collections
+import weakref
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class FramePool:
+    """Fixed ring of preallocated frame buffers.
+
+    `acquire()` hands out an array backed by a free slot. The slot goes back to
+    the pool once the array and every view derived from it (slices, memoryviews,
+    `np.frombuffer` wrappers) have been garbage-collected, so consumers never
+    need to release frames explicitly. Safe to acquire from one thread while
+    views are dropped on another.
+    """
+
+    def __init__(self, shape: Sequence[int], dtype=np.uint8, size: int = 4):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.size = size
+        nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._slots = [bytearray(nbytes) for _ in range(size)]
+        self._free = collections.deque(range(size))
+
+    @property
+    def available(self) -> int:
+        return len(self._free)
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """Return a writable frame array, or None while every slot is still referenced."""
+        try:
+            idx = self._free.popleft()
+        except IndexError:
+            return None
+        # numpy collapses a view's base only down to the first array whose own base is not
+        # an ndarray, so every array derived from the frame keeps `flat` alive and the slot
+        # is recycled only once nothing can observe it any more.
+        flat = np.frombuffer(self._slots[idx], dtype=self.dtype)
+        weakref.finalize(flat, self._free.append, idx)
+        return flat.reshape(self.shape)
@@ -8,6 +8,14 @@ from typing import Any, Dict, List, Optional
 
 import yaml
 
+CONFLATE_MODES = ("latest",)
+EXECUTOR_MODES = ("loop", "thread", "process")
+EXECUTOR_STAGES = ("preprocess", "postprocess")
+SHARD_MODES = ("connector", "sensor")
+FEATURE_DTYPES = ("fp32", "fp16")
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new", "block")
+AGENT_MODES = ("concurrent", "sequential")
+
 
 @dataclass(slots=True)
 class GatewayConfig:
@@ -15,6 +23,8 @@ class GatewayConfig:
     port: int
     pool_size: int = 4
     timeout_s: float = 2.0
+    transport: str = "asyncio"
+    pipeline_depth: int = 1
 
 
 @dataclass(slots=True)
@@ -23,6 +33,7 @@ class TopicRoute:
     pipeline: str
     serializer: str = "json"
     sensor_id: Optional[str] = None
+    conflate: Optional[str] = None
 
 
 @dataclass(slots=True)
@@ -31,6 +42,47 @@ class ConnectorConfig:
     type: str
     options: Dict[str, Any] = field(default_factory=dict)
     topics: List[TopicRoute] = field(default_factory=list)
+    shard: str = "connector"
+
+
+@dataclass(slots=True)
+class ExecutorConfig:
+    thread_workers: Optional[int] = None
+    process_workers: Optional[int] = None
+
+
+@dataclass(slots=True)
+class BatchConfig:
+    max_batch: int = 8
+    max_delay_ms: float = 5.0
+
+
+@dataclass(slots=True)
+class CacheConfig:
+    max_entries: int = 1024
+    max_bytes: int = 64 * 1024 * 1024
+    ttl_s: Optional[float] = None
+
+
+@dataclass(slots=True)
+class GateConfig:
+    threshold: float = 0.02
+    size: int = 64
+    max_stale_ms: float = 5000.0
+
+
+@dataclass(slots=True)
+class FeatureField:
+    name: str
+    default: Optional[float] = None
+    scale: float = 1.0
+    offset: float = 0.0
+
+
+@dataclass(slots=True)
+class FeatureConfig:
+    fields: List[FeatureField]
+    dtype: str = "fp32"
 
 
 @dataclass(slots=True)
@@ -42,6 +94,22 @@ class PipelineConfig:
     agents: List[str] = field(default_factory=list)
     deadline_ms: Optional[int] = None
     max_parallel: Optional[int] = None
+    batch: Optional[BatchConfig] = None
+    priority: int = 0
+    max_queue_depth: Optional[int] = None
+    conflate: Optional[str] = None
+    executor: Dict[str, str] = field(default_factory=dict)
+    cache: Optional[CacheConfig] = None
+    gate: Optional[GateConfig] = None
+    features: Optional[FeatureConfig] = None
+    agent_mode: str = "concurrent"
+
+
+@dataclass(slots=True)
+class OutboxConfig:
+    max_queue: int = 1024
+    concurrency: int = 1
+    overflow: str = "drop_oldest"
 
 
 @dataclass(slots=True)
@@ -49,6 +117,7 @@ class ActionConfig:
     name: str
     type: str
     options: Dict[str, Any]
+    outbox: Optional[OutboxConfig] = field(default_factory=OutboxConfig)
 
 
 @dataclass(slots=True)
@@ -60,6 +129,9 @@ class OrchestratorConfig:
     actions: List[ActionConfig]
     agents: Dict[str, Dict[str, Any]]
     metrics_port: int = 9108
+    concurrency: Optional[int] = None
+    executors: ExecutorConfig = field(default_factory=ExecutorConfig)
+    models_config: Optional[str] = None
 
 
 def _parse_gateway(data: Dict[str, Any]) -> GatewayConfig:
@@ -68,6 +140,8 @@ def _parse_gateway(data: Dict[str, Any]) -> GatewayConfig:
         port=int(data.get("port", 8008)),
         pool_size=int(data.get("pool_size", 4)),
         timeout_s=float(data.get("timeout_s", 2.0)),
+        transport=data.get("transport", "asyncio"),
+        pipeline_depth=int(data.get("pipeline_depth", 1)),
     )
 
 
@@ -80,20 +154,116 @@ def _parse_connectors(items: List[Dict[str, Any]]) -> List[ConnectorConfig]:
                 pipeline=topic.get("pipeline"),
                 serializer=topic.get("serializer", "json"),
                 sensor_id=topic.get("sensor_id"),
+                conflate=_parse_conflate(topic.get("conflate")),
             )
             for topic in item.get("topics", [])
         ]
+        # Broker connectors can be opened by every worker, each keeping its share of sensors;
+        # device connectors (cameras, BLE adapters) can only be owned by one.
+        shard = item.get("shard", "sensor" if item["type"] == "mqtt" else "connector")
+        if shard not in SHARD_MODES:
+            raise ValueError(f"connector {item['id']}: unknown shard mode '{shard}'; expected one of {SHARD_MODES}")
         connectors.append(
             ConnectorConfig(
                 id=item["id"],
                 type=item["type"],
-                options={k: v for k, v in item.items() if k not in {"id", "type", "topics"}},
+                options={k: v for k, v in item.items() if k not in {"id", "type", "topics", "shard"}},
                 topics=topics,
+                shard=shard,
             )
         )
     return connectors
 
 
+def _parse_conflate(value: Optional[str]) -> Optional[str]:
+    if value in (None, "none"):
+        return None
+    if value not in CONFLATE_MODES:
+        raise ValueError(f"unknown conflate mode '{value}'; expected one of {CONFLATE_MODES}")
+    return value
+
+
+def _parse_executor(value: Any) -> Dict[str, str]:
+    if not value:
+        return {}
+    stages = {stage: value for stage in EXECUTOR_STAGES} if isinstance(value, str) else dict(value)
+    for stage, mode in stages.items():
+        if stage not in EXECUTOR_STAGES:
+            raise ValueError(f"unknown executor stage '{stage}'; expected one of {EXECUTOR_STAGES}")
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"unknown executor '{mode}' for {stage}; expected one of {EXECUTOR_MODES}")
+    return stages
+
+
+def _parse_executors(data: Optional[Dict[str, Any]]) -> ExecutorConfig:
+    data = data or {}
+    thread_workers = data.get("thread_workers")
+    process_workers = data.get("process_workers")
+    return ExecutorConfig(
+        thread_workers=int(thread_workers) if thread_workers else None,
+        process_workers=int(process_workers) if process_workers else None,
+    )
+
+
+def _parse_batch(data: Optional[Dict[str, Any]]) -> Optional[BatchConfig]:
+    if not data:
+        return None
+    return BatchConfig(
+        max_batch=int(data.get("max_batch", 8)),
+        max_delay_ms=float(data.get("max_delay_ms", 5.0)),
+    )
+
+
+def _parse_cache(data: Optional[Dict[str, Any]]) -> Optional[CacheConfig]:
+    if not data:
+        return None
+    ttl_s = data.get("ttl_s")
+    return CacheConfig(
+        max_entries=int(data.get("max_entries", 1024)),
+        max_bytes=int(data.get("max_mb", 64) * 1024 * 1024),
+        ttl_s=float(ttl_s) if ttl_s is not None else None,
+    )
+
+
+def _parse_gate(data: Optional[Dict[str, Any]]) -> Optional[GateConfig]:
+    if not data:
+        return None
+    return GateConfig(
+        threshold=float(data.get("threshold", 0.02)),
+        size=int(data.get("size", 64)),
+        max_stale_ms=float(data.get("max_stale_ms", 5000.0)),
+    )
+
+
+def _parse_features(data: Any) -> Optional[FeatureConfig]:
+    if not data:
+        return None
+    if isinstance(data, list):  # shorthand: just the fields
+        data = {"fields": data}
+    fields = []
+    for item in data.get("fields") or []:
+        if isinstance(item, str):
+            item = {"name": item}
+        default = item.get("default")
+        fields.append(
+            FeatureField(
+                name=str(item["name"]),
+                default=float(default) if default is not None else None,
+                scale=float(item.get("scale", 1.0)),
+                offset=float(item.get("offset", 0.0)),
+            )
+        )
+    if not fields:
+        raise ValueError("features must list at least one field")
+    names = [f.name for f in fields]
+    if len(set(names)) != len(names):
+        raise ValueError(f"features lists a field more than once: {names}")
+    dtype = data.get("dtype", "fp32")
+    if dtype not in FEATURE_DTYPES:
+        raise ValueError(f"unknown features dtype '{dtype}'; expected one of {FEATURE_DTYPES}")
+    return FeatureConfig(fields=fields, dtype=dtype)
+
+
 def _parse_pipelines(items: List[Dict[str, Any]]) -> Dict[str, PipelineConfig]:
     pipelines: Dict[str, PipelineConfig] = {}
     for item in items:
@@ -105,7 +275,18 @@ def _parse_pipelines(items: List[Dict[str, Any]]) -> Dict[str, PipelineConfig]:
             agents=item.get("agents", []) or [],
             deadline_ms=item.get("deadline_ms"),
             max_parallel=item.get("max_parallel"),
+            batch=_parse_batch(item.get("batch")),
+            priority=int(item.get("priority", 0)),
+            max_queue_depth=item.get("max_queue_depth"),
+            conflate=_parse_conflate(item.get("conflate")),
+            executor=_parse_executor(item.get("executor")),
+            cache=_parse_cache(item.get("cache")),
+            gate=_parse_gate(item.get("gate")),
+            features=_parse_features(item.get("features")),
+            agent_mode=item.get("agent_mode", "concurrent"),
         )
+        if cfg.agent_mode not in AGENT_MODES:
+            raise ValueError(f"pipeline {cfg.id}: unknown agent_mode '{cfg.agent_mode}'; expected one of {AGENT_MODES}")
         pipelines[cfg.id] = cfg
     return pipelines
 
@@ -116,11 +297,26 @@ def _parse_actions(items: List[Dict[str, Any]]) -> List[ActionConfig]:
         if not isinstance(payload, dict):
             raise ValueError(f"action '{name}' must be a mapping")
         action_type = payload.get("type", name)
-        options = {k: v for k, v in payload.items() if k != "type"}
-        actions.append(ActionConfig(name=name, type=action_type, options=options))
+        options = {k: v for k, v in payload.items() if k not in ("type", "outbox")}
+        outbox = _parse_outbox(name, payload.get("outbox", {}))
+        actions.append(ActionConfig(name=name, type=action_type, options=options, outbox=outbox))
     return actions
 
 
+def _parse_outbox(name: str, data: Any) -> Optional[OutboxConfig]:
+    if data is False:  # dispatch inline on the pipeline worker
+        return None
+    data = data or {}
+    overflow = data.get("overflow", "drop_oldest")
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError(f"action '{name}': unknown overflow policy '{overflow}'; expected one of {OVERFLOW_POLICIES}")
+    return OutboxConfig(
+        max_queue=int(data.get("max_queue", 1024)),
+        concurrency=max(1, int(data.get("concurrency", 1))),
+        overflow=overflow,
+    )
+
+
 def load_config(path: str | Path) -> OrchestratorConfig:
     raw = yaml.safe_load(Path(path).read_text())
     version = int(raw.get("version", 1))
@@ -130,6 +326,10 @@ def load_config(path: str | Path) -> OrchestratorConfig:
     actions = _parse_actions(raw.get("actions", {}))
     agents = raw.get("agents", {})
     metrics_port = int(raw.get("metrics_port", 9108))
+    concurrency = raw.get("concurrency")
+    models_config = raw.get("models_config")
+    if models_config and not Path(models_config).is_absolute():
+        models_config = str(Path(path).parent / models_config)
     return OrchestratorConfig(
         version=version,
         gateway=gateway,
@@ -138,4 +338,7 @@ def load_config(path: str | Path) -> OrchestratorConfig:
         actions=actions,
         agents=agents,
         metrics_port=metrics_port,
+        concurrency=int(concurrency) if concurrency else None,
+        executors=_parse_executors(raw.get("executors")),
+        models_config=models_config,
     )
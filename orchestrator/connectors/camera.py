@@ -3,19 +3,36 @@
 from __future__ import annotations
 
 import asyncio
+import collections
 import logging
-from typing import AsyncIterator
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Deque, Optional, Tuple
 
 import cv2
+import numpy as np
 
+from orchestrator.buffers import FramePool
 from orchestrator.messages import EdgeMessage
+from orchestrator.metrics import CAPTURE_DROPPED, CAPTURE_FPS, CAPTURE_LATENCY
 
 from .base import BaseConnector
 
 log = logging.getLogger(__name__)
 
+_Frame = Tuple[np.ndarray, int]  # frame, time.monotonic_ns() at retrieval
+
 
 class CameraConnector(BaseConnector):
+    """Captures frames on a dedicated thread and hands the newest ones to the event loop.
+
+    The thread keeps grabbing so a live device never serves stale buffered frames, and
+    only decodes (`retrieve`) into a preallocated `FramePool` slot once per `interval`.
+    When the loop falls behind, the oldest undelivered frame is dropped. A video file
+    `source` is paced at `interval` and the connector stops at end of file.
+    """
+
     def __init__(self, connector_id: str, options, *, on_message):
         super().__init__(connector_id, on_message=on_message)
         self.options = options
@@ -25,25 +42,104 @@ class CameraConnector(BaseConnector):
         interval = float(self.options.get("interval", 0.1))
         encoding = self.options.get("encoding", "bgr")
         sensor_id = self.options.get("sensor_id", f"camera:{source}")
-        cap = cv2.VideoCapture(source)
+        conflate = self.options.get("conflate")
+        pending: Deque[Optional[_Frame]] = collections.deque(maxlen=int(self.options.get("max_pending", 2)))
+        cap = await asyncio.to_thread(cv2.VideoCapture, source)
         if not cap.isOpened():
             raise RuntimeError(f"camera source {source} could not be opened")
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        stop = threading.Event()
+
+        def deliver(frame: Optional[_Frame]) -> None:
+            if len(pending) == pending.maxlen:
+                CAPTURE_DROPPED.labels(self.connector_id, "behind").inc()
+            pending.append(frame)  # maxlen evicts the oldest frame, recycling its slot
+            ready.set()
+
+        def emit(frame: Optional[_Frame]) -> None:
+            try:
+                loop.call_soon_threadsafe(deliver, frame)
+            except RuntimeError:
+                pass  # loop already closed during shutdown
+
+        thread = threading.Thread(
+            target=self._capture,
+            args=(cap, source, interval, stop, emit),
+            name=f"capture-{self.connector_id}",
+            daemon=True,
+        )
+        thread.start()
         try:
             while True:
-                ok, frame = cap.read()
-                if not ok:
+                await ready.wait()
+                ready.clear()
+                while pending:
+                    item = pending.popleft()
+                    if item is None:
+                        return
+                    frame, captured_ns = item
+                    metadata = {"shape": frame.shape}
+                    if conflate:
+                        metadata["conflate"] = conflate
+                    msg = EdgeMessage(
+                        sensor_id=sensor_id,
+                        payload=frame.data,
+                        encoding=encoding,
+                        ingest_ns=captured_ns,
+                        metadata=metadata,
+                        pipeline_override=self.options.get("pipeline"),
+                    )
+                    del frame, item
+                    CAPTURE_LATENCY.labels(self.connector_id).observe((time.monotonic_ns() - captured_ns) / 1e6)
+                    yield msg
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join, 5.0)
+
+    def _capture(self, cap, source, interval: float, stop: threading.Event, emit) -> None:
+        is_file = isinstance(source, str) and Path(source).is_file()
+        pool: Optional[FramePool] = None
+        buffers = int(self.options.get("buffers", 4))
+        fps = CAPTURE_FPS.labels(self.connector_id)
+        window_start, window_frames = time.perf_counter(), 0
+        next_due = 0.0
+        try:
+            while not stop.is_set():
+                if not cap.grab():
+                    if is_file:
+                        log.info("connector %s reached end of %s", self.connector_id, source)
+                        break
                     log.warning("connector %s failed to read frame", self.connector_id)
-                    await asyncio.sleep(interval)
+                    stop.wait(interval)
+                    continue
+                now = time.perf_counter()
+                if now < next_due:
+                    if is_file:
+                        stop.wait(next_due - now)
+                    else:
+                        continue  # discard so the device buffer never goes stale
+                next_due = max(next_due + interval, time.perf_counter())
+                slot = pool.acquire() if pool is not None else None
+                if slot is None and pool is not None:
+                    CAPTURE_DROPPED.labels(self.connector_id, "no_buffer").inc()
+                    continue
+                ok, frame = cap.retrieve(slot)
+                if not ok:
+                    log.warning("connector %s failed to decode frame", self.connector_id)
                     continue
-                payload = frame.tobytes()
-                msg = EdgeMessage(
-                    sensor_id=sensor_id,
-                    payload=payload,
-                    encoding=encoding,
-                    metadata={"shape": frame.shape},
-                    pipeline_override=self.options.get("pipeline"),
-                )
-                yield msg
-                await asyncio.sleep(interval)
+                if frame is not slot:
+                    # First frame or a resolution change: size the ring from what the source produces.
+                    pool = FramePool(frame.shape, frame.dtype, buffers)
+                    slot = pool.acquire()
+                    np.copyto(slot, frame)
+                emit((slot, time.monotonic_ns()))
+                del slot, frame
+                window_frames += 1
+                elapsed = time.perf_counter() - window_start
+                if elapsed >= 1.0:
+                    fps.set(window_frames / elapsed)
+                    window_start, window_frames = time.perf_counter(), 0
         finally:
             cap.release()
+            emit(None)
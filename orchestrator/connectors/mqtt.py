@@ -11,6 +11,7 @@ from asyncio_mqtt import Client, MqttError
 from orchestrator.messages import EdgeMessage
 
 from .base import BaseConnector
+from .routing import TopicRouter
 
 log = logging.getLogger(__name__)
 
@@ -20,6 +21,7 @@ class MQTTConnector(BaseConnector):
         super().__init__(connector_id, on_message=on_message)
         self.options = options
         self.routes = routes
+        self.router = TopicRouter([route.filter for route in routes], routes)
 
     async def iter_messages(self) -> AsyncIterator[EdgeMessage]:
         host = self.options.get("host", "127.0.0.1")
@@ -35,44 +37,20 @@ class MQTTConnector(BaseConnector):
                     async with client.unfiltered_messages() as messages:
                         await client.subscribe([(topic, 0) for topic in topics])
                         async for message in messages:
-                            route = self._match_route(message.topic)
+                            route = self.router.match(message.topic)
                             if route is None:
                                 continue
+                            metadata = {"topic": message.topic}
+                            if route.conflate:
+                                metadata["conflate"] = route.conflate
                             msg = EdgeMessage(
                                 sensor_id=route.sensor_id or message.topic,
                                 payload=message.payload,
                                 encoding=route.serializer,
-                                metadata={"topic": message.topic},
+                                metadata=metadata,
                                 pipeline_override=route.pipeline,
                             )
                             yield msg
             except MqttError:
                 log.exception("connector %s lost connection; retrying", self.connector_id)
                 await asyncio.sleep(reconnect_interval)
-
-    def _match_route(self, topic: str):
-        for route in self.routes:
-            if self._topic_matches(route.filter, topic):
-                return route
-        return None
-
-    @staticmethod
-    def _topic_matches(pattern: str, topic: str) -> bool:
-        if pattern == topic:
-            return True
-        pattern_parts = pattern.split("/")
-        topic_parts = topic.split("/")
-        if "#" in pattern_parts:
-            idx = pattern_parts.index("#")
-            if idx != len(pattern_parts) - 1:
-                return False
-            pattern_parts = pattern_parts[:idx]
-            topic_parts = topic_parts[: len(pattern_parts)]
-        if len(pattern_parts) != len(topic_parts):
-            return False
-        for pp, tp in zip(pattern_parts, topic_parts):
-            if pp in {"+", "#"}:
-                continue
-            if pp != tp:
-                return False
-        return True
@@ -0,0 +1,78 @@
+# SPDX-License-Identifier: Apache-2.0
+"""MQTT topic filter matching compiled into a trie."""
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Dict, Generic, Optional, Sequence, TypeVar
+
+log = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+_NONE = 1 << 62  # larger than any route index
+
+
+class _Node:
+    __slots__ = ("children", "plus", "hash", "end")
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        self.plus: Optional[_Node] = None
+        self.hash = _NONE  # first route ending in `#` at this level
+        self.end = _NONE  # first route ending exactly at this level
+
+
+class TopicRouter(Generic[R]):
+    """Maps a concrete topic to the first matching filter in `filters` order.
+
+    Filters are split into levels once and merged into a trie whose `+` and `#` branches
+    sit next to the literal children, so a lookup walks the topic's levels instead of
+    testing every filter. Every node remembers the lowest route index ending there, so
+    the earliest configured route wins exactly as with a linear scan. Results, including
+    misses, are cached per topic in an LRU of `cache_size` entries.
+    """
+
+    def __init__(self, filters: Sequence[str], routes: Sequence[R], cache_size: int = 4096):
+        self.routes = list(routes)
+        self._root = _Node()
+        self._exact: Dict[str, int] = {}
+        for idx, pattern in enumerate(filters):
+            self._add(pattern, idx)
+        self.match = functools.lru_cache(maxsize=cache_size)(self._match)
+
+    def _add(self, pattern: str, idx: int) -> None:
+        levels = pattern.split("/")
+        if "#" in levels[:-1]:
+            # Not a valid filter; like the old matcher, it only matches the identical topic.
+            log.warning("topic filter '%s' has '#' before the last level; matching it literally", pattern)
+            self._exact.setdefault(pattern, idx)
+            return
+        node = self._root
+        for level in levels:
+            if level == "#":
+                node.hash = min(node.hash, idx)
+                return
+            if level == "+":
+                if node.plus is None:
+                    node.plus = _Node()
+                node = node.plus
+            else:
+                node = node.children.setdefault(level, _Node())
+        node.end = min(node.end, idx)
+
+    def _match(self, topic: str) -> Optional[R]:
+        best = min(self._exact.get(topic, _NONE), _walk(self._root, topic.split("/"), 0))
+        return self.routes[best] if best != _NONE else None
+
+
+def _walk(node: _Node, levels: Sequence[str], i: int) -> int:
+    best = node.hash  # `a/#` also matches `a` itself
+    if i == len(levels):
+        return min(best, node.end)
+    child = node.children.get(levels[i])
+    if child is not None:
+        best = min(best, _walk(child, levels, i + 1))
+    if node.plus is not None:
+        best = min(best, _walk(node.plus, levels, i + 1))
+    return best
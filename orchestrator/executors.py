@@ -0,0 +1,243 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Thread and process pools for CPU-heavy pipeline stages."""
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import multiprocessing as mp
+import os
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import ExecutorConfig
+from .gateway_pool import InferenceResult
+from .messages import EdgeMessage
+from .metrics import EXECUTOR_WORKERS, STAGE_DURATION
+from .serialization import decode_payload
+
+log = logging.getLogger(__name__)
+
+_ALIGN = 64
+# (dtype.str, shape, offset) of each array packed into a shared-memory block
+Layout = List[Tuple[str, Tuple[int, ...], int]]
+
+_config = ExecutorConfig()
+_pools: Dict[str, Executor] = {}
+# Attached blocks whose arrays have been collected; closed on the next import because the
+# mapping is still exported while the finalizer runs.
+_retired: collections.deque = collections.deque()
+
+
+def initialise(cfg: ExecutorConfig) -> None:
+    global _config
+    _config = cfg
+
+
+def _pool(mode: str) -> Executor:
+    pool = _pools.get(mode)
+    if pool is None:
+        if mode == "thread":
+            workers = _config.thread_workers or min(4, os.cpu_count() or 1)
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage")
+        else:
+            workers = _config.process_workers or max(1, (os.cpu_count() or 2) - 1)
+            # Workers must share our tracker so blocks created on either side are cleaned
+            # up exactly once, even if a process dies before unlinking.
+            resource_tracker.ensure_running()
+            if "forkserver" in mp.get_all_start_methods():
+                ctx = mp.get_context("forkserver")
+                ctx.set_forkserver_preload(["orchestrator.executors"])
+            else:
+                ctx = mp.get_context("spawn")
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+        _pools[mode] = pool
+        EXECUTOR_WORKERS.labels(mode).set(workers)
+        log.info("started %s stage pool with %d workers", mode, workers)
+    return pool
+
+
+async def preprocess(
+    mode: str, fn: Callable[[EdgeMessage, object], Sequence[np.ndarray]], message: EdgeMessage, *, pipeline: str
+) -> List[np.ndarray]:
+    """Decode the payload and run `fn`, returning its tensors."""
+    start = time.perf_counter()
+    try:
+        if mode == "loop":
+            return list(fn(message, decode_payload(message)))
+        if mode == "thread":
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_pool(mode), _preprocess_local, fn, message)
+        return await _preprocess_remote(fn, message)
+    finally:
+        STAGE_DURATION.labels(pipeline, "preprocess", mode).observe((time.perf_counter() - start) * 1000)
+
+
+async def postprocess(
+    mode: str, fn: Callable[[InferenceResult, EdgeMessage], object], result: InferenceResult, message: EdgeMessage, *, pipeline: str
+) -> object:
+    """Run `fn` over the inference outputs; the caller still owns and releases `result`."""
+    start = time.perf_counter()
+    try:
+        if mode == "loop":
+            return fn(result, message)
+        loop = asyncio.get_running_loop()
+        if mode == "thread":
+            return await loop.run_in_executor(_pool(mode), fn, result, message)
+        shm, layout = _export([np.frombuffer(out, dtype=np.uint8) for out in result.outputs])
+        try:
+            obj, metadata = await loop.run_in_executor(
+                _pool(mode), _postprocess_child, fn, result.status, _name(shm), layout, _portable(message)
+            )
+        finally:
+            _discard(shm)
+        message.metadata.update(metadata)
+        return obj
+    finally:
+        STAGE_DURATION.labels(pipeline, "postprocess", mode).observe((time.perf_counter() - start) * 1000)
+
+
+async def _preprocess_remote(fn, message: EdgeMessage) -> List[np.ndarray]:
+    loop = asyncio.get_running_loop()
+    shm, payload_block = None, None
+    if not isinstance(message.payload, bytes):
+        # Frames backed by capture buffers can't be pickled; ship them like any other tensor.
+        shm, layout = _export([np.frombuffer(message.payload, dtype=np.uint8)])
+        payload_block = (_name(shm), layout)
+    try:
+        name, layout, metadata = await loop.run_in_executor(
+            _pool("process"), _preprocess_child, fn, _portable(message), payload_block
+        )
+    finally:
+        _discard(shm)
+    message.metadata.update(metadata)
+    return _import(name, layout)
+
+
+def _preprocess_local(fn, message: EdgeMessage) -> List[np.ndarray]:
+    return list(fn(message, decode_payload(message)))
+
+
+def _portable(message: EdgeMessage) -> EdgeMessage:
+    """Picklable copy of the message; buffer-backed payloads are shipped separately or dropped."""
+    return EdgeMessage(
+        sensor_id=message.sensor_id,
+        payload=message.payload if isinstance(message.payload, bytes) else b"",
+        encoding=message.encoding,
+        metadata=dict(message.metadata),
+        pipeline_override=message.pipeline_override,
+        ingest_ns=message.ingest_ns,  # CLOCK_MONOTONIC is shared by every process on the host
+    )
+
+
+def _preprocess_child(fn, message: EdgeMessage, payload_block) -> Tuple[Optional[str], Layout, Dict[str, Any]]:
+    shm = None
+    if payload_block is not None:
+        shm, (payload,) = _attach(*payload_block)
+        message.payload = payload.data
+        del payload
+    try:
+        arrays = list(fn(message, decode_payload(message)))
+        out, layout = _export(arrays)
+        del arrays
+        name = _name(out)
+        if out is not None:
+            out.close()
+    finally:
+        message.payload = b""
+        if shm is not None:
+            _close(shm)
+    return name, layout, message.metadata
+
+
+def _postprocess_child(fn, status: int, name: Optional[str], layout: Layout, message: EdgeMessage):
+    shm, arrays = _attach(name, layout)
+    try:
+        result = InferenceResult(status=status, outputs=[memoryview(a) for a in arrays])
+        obj = fn(result, message)
+        del result, arrays
+    finally:
+        if shm is not None:
+            _close(shm)
+    return obj, message.metadata
+
+
+def _export(arrays: Sequence[np.ndarray]) -> Tuple[Optional[SharedMemory], Layout]:
+    """Copy arrays into one new shared-memory block (None if they are all empty)."""
+    arrays = [np.ascontiguousarray(a) for a in arrays]
+    layout: Layout = []
+    size = 0
+    for a in arrays:
+        size = -(-size // _ALIGN) * _ALIGN
+        layout.append((a.dtype.str, a.shape, size))
+        size += a.nbytes
+    if size == 0:
+        return None, layout
+    shm = SharedMemory(create=True, size=size)
+    for a, (_, _, offset) in zip(arrays, layout):
+        shm.buf[offset : offset + a.nbytes] = a.reshape(-1).view(np.uint8)
+    return shm, layout
+
+
+def _name(shm: Optional[SharedMemory]) -> Optional[str]:
+    return shm.name if shm is not None else None
+
+
+def _attach(name: Optional[str], layout: Layout) -> Tuple[Optional[SharedMemory], List[np.ndarray]]:
+    if name is None:
+        return None, [np.empty(shape, dtype=dt) for dt, shape, _ in layout]
+    shm = SharedMemory(name=name)
+    base = np.frombuffer(shm.buf, dtype=np.uint8)
+    arrays = []
+    for dt, shape, offset in layout:
+        dtype = np.dtype(dt)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        arrays.append(base[offset : offset + nbytes].view(dtype).reshape(shape))
+    return shm, arrays
+
+
+def _import(name: Optional[str], layout: Layout) -> List[np.ndarray]:
+    """Map a block exported by a worker; it stays mapped until its arrays are collected."""
+    _reap()
+    shm, arrays = _attach(name, layout)
+    if shm is not None:
+        shm.unlink()
+        # Every array is a view of this base, so it outlives all of them.
+        weakref.finalize(arrays[0].base, _retired.append, shm)
+    return arrays
+
+
+def _reap() -> None:
+    for _ in range(len(_retired)):
+        shm = _retired.popleft()
+        try:
+            shm.close()
+        except BufferError:
+            _retired.append(shm)
+
+
+def _close(shm: SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        log.debug("shared block %s still referenced by stage output; left to the GC", shm.name)
+
+
+def _discard(shm: Optional[SharedMemory]) -> None:
+    if shm is not None:
+        shm.close()
+        shm.unlink()
+
+
+def shutdown() -> None:
+    for pool in _pools.values():
+        pool.shutdown(wait=True, cancel_futures=True)
+    _pools.clear()
+    _reap()
+
@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Sensor feature vectors compiled from a pipeline's `features` schema."""
+from __future__ import annotations
+
+import itertools
+import operator
+from typing import Any, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .config import FeatureConfig
+
+DTYPES = {"fp32": np.float32, "fp16": np.float16}
+
+
+class FeatureSchema:
+    """Reads declared fields out of decoded payloads into rows of a fixed order.
+
+    The field lookups are compiled once into a single `operator.itemgetter`, so a
+    payload that carries every field is read with one C call and written straight into
+    a new row of `dtype`; extra keys are ignored. Payloads missing a field fall back to
+    its `default`, or raise ValueError naming the field when it has none. Values become
+    `value * scale + offset`, computed in double precision and rounded once to `dtype`,
+    so `row` and `matrix` produce identical values.
+    """
+
+    def __init__(self, cfg: FeatureConfig):
+        self.names: Tuple[str, ...] = tuple(f.name for f in cfg.fields)
+        self.dtype = np.dtype(DTYPES[cfg.dtype])
+        self._get = operator.itemgetter(*self.names)
+        self._single = len(self.names) == 1  # itemgetter then returns the value, not a tuple
+        self._defaults = {f.name: f.default for f in cfg.fields if f.default is not None}
+        self._scaled = any(f.scale != 1.0 or f.offset != 0.0 for f in cfg.fields)
+        self._scale = np.array([f.scale for f in cfg.fields])
+        self._offset = np.array([f.offset for f in cfg.fields])
+        # plain floats: a Python loop beats two ufunc calls on a single short row
+        self._affine = tuple(zip(self._scale.tolist(), self._offset.tolist()))
+
+    @property
+    def width(self) -> int:
+        return len(self.names)
+
+    def row(self, payload: Mapping[str, Any]) -> np.ndarray:
+        """One payload as a `[1, F]` array."""
+        try:
+            values = self._get(payload)
+        except KeyError:
+            values = self._values(payload)
+        else:
+            if self._single:
+                values = (values,)
+        if self._scaled:
+            values = [v * s + o for v, (s, o) in zip(values, self._affine)]
+        # A fresh row per message, not a reused per-schema buffer: rows outlive this call
+        # (queued in the MicroBatcher, in flight on other workers, shipped to executors),
+        # so a shared buffer would be overwritten under them. One np.array call allocates
+        # and fills it at once.
+        return np.array((values,), dtype=self.dtype)
+
+    def matrix(self, payloads: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Many payloads as one `[N, F]` array, filled in a single pass."""
+        count = len(payloads) * len(self.names)
+        dtype = np.float64 if self._scaled else self.dtype
+        try:
+            flat = np.fromiter(self._flatten(map(self._get, payloads)), dtype=dtype, count=count)
+        except KeyError:  # some payload lacks a field: redo the batch with defaults filled in
+            flat = np.fromiter(itertools.chain.from_iterable(map(self._values, payloads)), dtype=dtype, count=count)
+        out = flat.reshape(len(payloads), len(self.names))
+        if self._scaled:
+            out *= self._scale
+            out += self._offset
+            out = out.astype(self.dtype)
+        return out
+
+    def _flatten(self, rows):
+        return rows if self._single else itertools.chain.from_iterable(rows)
+
+    def _values(self, payload: Mapping[str, Any]) -> Tuple[Any, ...]:
+        defaults = self._defaults
+        values = []
+        for name in self.names:
+            if name in payload:
+                values.append(payload[name])
+            elif name in defaults:
+                values.append(defaults[name])
+            else:
+                raise ValueError(f"payload has no '{name}' feature and the schema gives it no default")
+        return tuple(values)
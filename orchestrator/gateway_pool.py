@@ -6,67 +6,174 @@ import asyncio
 import contextlib
 import logging
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence
+from typing import Iterable, List, Optional, Protocol, Sequence
 
 import numpy as np
 
-from clients.python.gateway_stream import GatewayStream
+from clients.python.gateway_async import AsyncGatewayStream
+from clients.python.gateway_stream import GatewayStream, Response
 
 log = logging.getLogger(__name__)
 
+# delay before retrying a connection that failed to reconnect, doubling per failure
+RECONNECT_BACKOFF_S = 0.5
+MAX_RECONNECT_BACKOFF_S = 30.0
+
+
+class Lease(Protocol):
+    def release(self) -> None: ...
+
 
 @dataclass(slots=True)
 class InferenceResult:
+    """Gateway reply; `outputs` are memoryviews into a receive buffer leased from the connection.
+
+    Call `release()` once the outputs and any views of them are no longer needed so the
+    buffer can be reused; results that are never released are garbage collected instead.
+    """
+
     status: int
-    outputs: Sequence[bytes]
+    outputs: Sequence[memoryview]
+    lease: Optional[Lease] = None
+
+    def release(self) -> None:
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
+
+
+class _ThreadedStream:
+    """Adapts a blocking GatewayStream to the pool by running it in the default executor."""
+
+    def __init__(self, stream: GatewayStream):
+        self._stream = stream
+        self._lock = asyncio.Lock()
+        self.inflight = 0
+
+    async def request(self, model_id: str, arrays: List[np.ndarray]) -> Response:
+        self.inflight += 1
+        try:
+            async with self._lock:
+                return await asyncio.to_thread(self._stream.request, model_id, arrays)
+        finally:
+            self.inflight -= 1
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._stream.close)
 
 
 class GatewayPool:
-    def __init__(self, host: str, port: int, pool_size: int = 4, timeout: float = 2.0):
+    """Connections to the TensorRT gateway shared by all pipelines.
+
+    Each connection carries up to `pipeline_depth` outstanding requests (asyncio
+    transport only) and requests go to the least loaded connection, so a few
+    sockets can keep every TensorRT context of a model busy. A connection that fails is
+    replaced; if the gateway is unreachable, its slot is reconnected on a later request,
+    with backoff, so gateway restarts never shrink the pool for good.
+    """
+
+    TRANSPORTS = ("asyncio", "thread")
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        pool_size: int = 4,
+        timeout: float = 2.0,
+        transport: str = "asyncio",
+        pipeline_depth: int = 1,
+    ):
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"unsupported gateway transport '{transport}'")
+        if pipeline_depth > 1 and transport != "asyncio":
+            log.warning("gateway pipeline_depth=%d requires the asyncio transport; using 1", pipeline_depth)
+            pipeline_depth = 1
         self.host = host
         self.port = port
         self.pool_size = pool_size
         self.timeout = timeout
-        self._pool: asyncio.Queue[GatewayStream] = asyncio.Queue()
+        self.transport = transport
+        self.pipeline_depth = max(1, pipeline_depth)
+        self._streams: List[AsyncGatewayStream | _ThreadedStream] = []
+        self._slots = asyncio.Semaphore(self.pool_size * self.pipeline_depth)
         self._lock = asyncio.Lock()
         self._started = False
+        self._refilling = False
+        self._retry_at = 0.0
+        self._backoff = RECONNECT_BACKOFF_S
+
+    async def _connect(self) -> AsyncGatewayStream | _ThreadedStream:
+        if self.transport == "asyncio":
+            return await AsyncGatewayStream.connect(self.host, self.port, self.timeout, self.pipeline_depth)
+        return _ThreadedStream(await asyncio.to_thread(GatewayStream, self.host, self.port, self.timeout))
 
     async def start(self) -> None:
         async with self._lock:
             if self._started:
                 return
             for _ in range(self.pool_size):
-                stream = await asyncio.to_thread(GatewayStream, self.host, self.port, self.timeout)
-                self._pool.put_nowait(stream)
+                self._streams.append(await self._connect())
             self._started = True
-            log.info("gateway pool primed with %d connections", self.pool_size)
+            log.info(
+                "gateway pool primed with %d %s connections (pipeline depth %d)",
+                self.pool_size,
+                self.transport,
+                self.pipeline_depth,
+            )
 
     async def close(self) -> None:
-        while not self._pool.empty():
-            stream = self._pool.get_nowait()
-            try:
-                await asyncio.to_thread(stream.close)
-            finally:
-                self._pool.task_done()
+        streams, self._streams = self._streams, []
+        for stream in streams:
+            with contextlib.suppress(Exception):
+                await stream.close()
         self._started = False
 
     async def infer(self, model_id: str, arrays: Iterable[np.ndarray]) -> InferenceResult:
         if not self._started:
             await self.start()
-        stream = await self._pool.get()
-        requeue = True
+        async with self._slots:
+            if not self._streams:
+                self._streams.append(await self._connect())
+            elif len(self._streams) < self.pool_size:
+                await self._refill()
+            stream = min(self._streams, key=lambda s: s.inflight)
+            try:
+                resp = await stream.request(model_id, list(arrays))
+            except Exception:
+                log.exception("inference failed; dropping socket and recreating")
+                await self._replace(stream)
+                raise
+        return InferenceResult(status=resp.status, outputs=resp.outputs, lease=resp)
+
+    async def _replace(self, stream: AsyncGatewayStream | _ThreadedStream) -> None:
+        if stream not in self._streams:
+            return  # another request on the same socket already replaced it
+        self._streams.remove(stream)
+        with contextlib.suppress(Exception):
+            await stream.close()
+        self._retry_at = 0.0
+        await self._refill()
+
+    async def _refill(self) -> None:
+        """Reconnect one missing connection unless a recent attempt failed; never raises."""
+        loop = asyncio.get_running_loop()
+        if self._refilling or loop.time() < self._retry_at:
+            return
+        self._refilling = True
         try:
-            status, outputs = await asyncio.to_thread(stream.infer, model_id, list(arrays))
-            return InferenceResult(status=status, outputs=outputs)
-        except Exception:
-            log.exception("inference failed; dropping socket and recreating")
-            with contextlib.suppress(Exception):
-                await asyncio.to_thread(stream.close)
-            replacement = await asyncio.to_thread(GatewayStream, self.host, self.port, self.timeout)
-            await self._pool.put(replacement)
-            requeue = False
-            raise
+            stream = await self._connect()
+        except Exception as exc:
+            self._retry_at = loop.time() + self._backoff
+            log.warning(
+                "gateway reconnect failed (%s); %d of %d connections up, retrying in %.1fs",
+                exc,
+                len(self._streams),
+                self.pool_size,
+                self._backoff,
+            )
+            self._backoff = min(self._backoff * 2, MAX_RECONNECT_BACKOFF_S)
+        else:
+            self._streams.append(stream)
+            self._backoff = RECONNECT_BACKOFF_S
         finally:
-            if requeue:
-                with contextlib.suppress(asyncio.QueueFull):
-                    self._pool.put_nowait(stream)
+            self._refilling = False
@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Change gating: reuse the previous result while a sensor's input stays static."""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .config import GateConfig
+from .metrics import GATE_DECISIONS, GATE_SAVED
+
+
+@dataclass(slots=True)
+class _SensorState:
+    signature: np.ndarray
+    result: object
+    inferred_at: float
+    cost_ms: float
+
+
+class ChangeGate:
+    """Decides per sensor whether a preprocessed input differs enough to run inference.
+
+    The first input tensor is reduced to a coarse grid of at most `size` samples along
+    its two largest axes (the image plane for NCHW and NHWC tensors; the whole tensor
+    for vectors). An input is treated as unchanged when the mean absolute difference
+    between its grid and the grid of the sensor's last inferred input is below
+    `threshold`, in the tensor's own units. Comparing against the last *inferred*
+    input, not the previous one, means slow drift still triggers inference eventually;
+    `max_stale_ms` forces a refresh regardless.
+    """
+
+    def __init__(self, cfg: GateConfig, *, pipeline: str):
+        self.threshold = cfg.threshold
+        self.size = cfg.size
+        self.max_stale = cfg.max_stale_ms / 1000.0
+        self.pipeline = pipeline
+        self._sensors: Dict[str, _SensorState] = {}
+
+    def signature(self, arrays: Sequence[np.ndarray]) -> np.ndarray:
+        a = np.asarray(arrays[0])
+        if a.ndim >= 3:
+            spatial = sorted(np.argsort(a.shape)[-2:])
+            index = [slice(None)] * a.ndim
+            for axis in spatial:
+                index[axis] = slice(None, None, -(-a.shape[axis] // self.size))
+            a = a[tuple(index)]
+        else:
+            a = a.reshape(-1)[:: max(1, -(-a.size // (self.size * self.size)))]
+        return a.astype(np.float32)
+
+    def check(self, sensor_id: str, signature: np.ndarray) -> Optional[object]:
+        """The sensor's previous result if `signature` shows no meaningful change, else None."""
+        state = self._sensors.get(sensor_id)
+        if state is None or state.signature.shape != signature.shape:
+            GATE_DECISIONS.labels(self.pipeline, "infer").inc()
+            return None
+        if time.monotonic() - state.inferred_at >= self.max_stale:
+            GATE_DECISIONS.labels(self.pipeline, "stale").inc()
+            return None
+        if float(np.abs(signature - state.signature).mean()) >= self.threshold:
+            GATE_DECISIONS.labels(self.pipeline, "infer").inc()
+            return None
+        GATE_DECISIONS.labels(self.pipeline, "skip").inc()
+        GATE_SAVED.labels(self.pipeline).inc(state.cost_ms)
+        return state.result
+
+    def update(self, sensor_id: str, signature: np.ndarray, result: object, cost_ms: float) -> None:
+        """Remember the result of an inferred input; `cost_ms` is what a later skip saves."""
+        self._sensors[sensor_id] = _SensorState(signature, result, time.monotonic(), cost_ms)
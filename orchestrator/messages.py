@@ -2,32 +2,151 @@
 """Message envelope shared across connectors, pipelines, and agents."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List, MutableMapping, Optional
 
 
-@dataclass(slots=True)
 class EdgeMessage:
-    """Canonical wrapper around upstream sensor payloads."""
+    """Canonical wrapper around upstream sensor payloads.
 
-    sensor_id: str
-    payload: bytes
-    encoding: str
-    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    pipeline_override: Optional[str] = None
+    Messages are stamped with `ingest_ns`, a `time.monotonic_ns()` reading that every
+    process on the host shares; ages and deadlines are computed from it. The wall-clock
+    `timestamp` is only derived (and then kept) when something reads it, and `metadata`
+    is only allocated on first access. Passing an explicit `timestamp` back-dates
+    `ingest_ns` by the timestamp's age, so replayed or pre-stamped messages age correctly.
+
+    Messages compare by value like the dataclass they replace, but are no longer
+    dataclasses: build changed copies with the constructor (or `with_pipeline`), not
+    `dataclasses.replace`/`asdict`. `with_pipeline` does not copy metadata up front: the
+    original and the copy share one dict until either reads `metadata`, which gives it a
+    private copy (so pure routing never copies).
+    """
+
+    __slots__ = (
+        "sensor_id",
+        "payload",
+        "encoding",
+        "pipeline_override",
+        "ingest_ns",
+        "_timestamp",
+        "_metadata",
+        "_metadata_shared",
+        "_decoded",
+    )
+
+    def __init__(
+        self,
+        sensor_id: str,
+        payload: bytes,
+        encoding: str,
+        timestamp: Optional[datetime] = None,
+        metadata: Optional[MutableMapping[str, Any]] = None,
+        pipeline_override: Optional[str] = None,
+        *,
+        ingest_ns: Optional[int] = None,
+    ):
+        self.sensor_id = sensor_id
+        self.payload = payload
+        self.encoding = encoding
+        self.pipeline_override = pipeline_override
+        if ingest_ns is None:
+            ingest_ns = time.monotonic_ns()
+            if timestamp is not None:
+                ingest_ns -= int((datetime.now(timezone.utc) - timestamp).total_seconds() * 1e9)
+        self.ingest_ns = ingest_ns
+        self._timestamp = timestamp
+        self._metadata = metadata
+        self._metadata_shared = False  # set while the dict is shared with a re-routed copy
+        self._decoded: Optional[List[Any]] = None  # one-slot cell, shared with re-routed copies
+
+    @property
+    def timestamp(self) -> datetime:
+        if self._timestamp is None:
+            age_us = (time.monotonic_ns() - self.ingest_ns) // 1000
+            self._timestamp = datetime.now(timezone.utc) - timedelta(microseconds=age_us)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        self._timestamp = value
+        self.ingest_ns = time.monotonic_ns() - int((datetime.now(timezone.utc) - value).total_seconds() * 1e9)
+
+    @property
+    def metadata(self) -> MutableMapping[str, Any]:
+        if self._metadata_shared:
+            # copy-on-write: the first access after re-routing takes a private copy
+            self._metadata = dict(self._metadata)
+            self._metadata_shared = False
+        elif self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: MutableMapping[str, Any]) -> None:
+        self._metadata = value
+        self._metadata_shared = False
+
+    def cached_decode(self, decode: Callable[["EdgeMessage"], Any]) -> Any:
+        """`decode(self)`, computed on the first call and returned from the cache afterwards.
+
+        The result is shared with every copy made by `with_pipeline`, so it is read-only:
+        a plugin that mutates it changes the payload every fanned-out pipeline sees.
+        """
+        cell = self._decoded
+        if cell is None:
+            cell = self._decoded = []
+        if not cell:
+            cell.append(decode(self))
+        return cell[0]
+
+    def age_ms(self) -> float:
+        return (time.monotonic_ns() - self.ingest_ns) / 1e6
 
     def with_pipeline(self, pipeline_id: str) -> "EdgeMessage":
-        msg = EdgeMessage(
-            sensor_id=self.sensor_id,
-            payload=self.payload,
-            encoding=self.encoding,
-            timestamp=self.timestamp,
-            metadata=dict(self.metadata),
-            pipeline_override=pipeline_id,
+        # Both messages share the metadata dict until one of them reads `metadata`, which
+        # copies it first, so writes on either never reach the other.
+        metadata = self._metadata or None
+        routed = EdgeMessage(
+            self.sensor_id,
+            self.payload,
+            self.encoding,
+            self._timestamp,
+            metadata,
+            pipeline_id,
+            ingest_ns=self.ingest_ns,
+        )
+        if metadata is not None:
+            self._metadata_shared = routed._metadata_shared = True
+        if self._decoded is None:
+            self._decoded = []
+        routed._decoded = self._decoded  # fanned-out copies decode the payload once between them
+        return routed
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        if self._timestamp is not None and other._timestamp is not None:
+            same_time = self._timestamp == other._timestamp
+        else:
+            same_time = self.ingest_ns == other.ingest_ns
+        return (
+            same_time
+            and self.sensor_id == other.sensor_id
+            and self.payload == other.payload
+            and self.encoding == other.encoding
+            and self.pipeline_override == other.pipeline_override
+            and (self._metadata or {}) == (other._metadata or {})
+        )
+
+    __hash__ = None  # mutable, as the dataclass was
+
+    def __repr__(self) -> str:
+        return (
+            f"EdgeMessage(sensor_id={self.sensor_id!r}, encoding={self.encoding!r}, "
+            f"pipeline_override={self.pipeline_override!r}, payload=<{len(self.payload)} bytes>, "
+            f"metadata={dict(self._metadata or {})!r})"
         )
-        return msg
 
 
 def ensure_bytes(data: Any) -> bytes:
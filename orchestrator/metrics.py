@@ -26,4 +26,163 @@ PIPELINE_LATENCY = Histogram(
 QUEUE_DEPTH = Gauge(
     "eig_pipeline_queue_depth",
     "Messages waiting for pipeline processing",
+    labelnames=("pipeline",),
+    multiprocess_mode="livesum",
+)
+
+PIPELINE_CONFLATED = Counter(
+    "eig_pipeline_conflated_total",
+    "Queued messages replaced by a newer message from the same sensor",
+    labelnames=("pipeline",),
+)
+
+QUEUE_WAIT = Histogram(
+    "eig_pipeline_queue_wait_ms",
+    "Time a message spent queued before a worker picked it up (milliseconds)",
+    labelnames=("pipeline",),
+    buckets=(0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+BATCH_SIZE = Histogram(
+    "eig_batch_size",
+    "Rows per micro-batched inference request",
+    labelnames=("pipeline",),
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+BATCH_QUEUE_DELAY = Histogram(
+    "eig_batch_queue_delay_ms",
+    "Time a request waited in the micro-batcher before its batch was sent (milliseconds)",
+    labelnames=("pipeline",),
+    buckets=(0.5, 1, 2, 5, 10, 20, 50, 100),
+)
+
+RESULT_CACHE_LOOKUPS = Counter(
+    "eig_result_cache_lookups_total",
+    "Inference result cache lookups by outcome",
+    labelnames=("pipeline", "result"),
+)
+
+RESULT_CACHE_EVICTIONS = Counter(
+    "eig_result_cache_evictions_total",
+    "Inference results evicted from the cache",
+    labelnames=("pipeline", "reason"),
+)
+
+RESULT_CACHE_BYTES = Gauge(
+    "eig_result_cache_bytes",
+    "Output bytes held by each pipeline's inference result cache",
+    labelnames=("pipeline",),
+    multiprocess_mode="livesum",
+)
+
+GATE_DECISIONS = Counter(
+    "eig_gate_decisions_total",
+    "Change-gate outcomes: skip reuses the previous result, infer and stale run the model",
+    labelnames=("pipeline", "decision"),
+)
+
+GATE_SAVED = Counter(
+    "eig_gate_saved_ms_total",
+    "Inference and postprocessing time avoided by change-gate skips (milliseconds)",
+    labelnames=("pipeline",),
+)
+
+STAGE_DURATION = Histogram(
+    "eig_stage_duration_ms",
+    "Wall time of each pipeline stage, including executor hand-off (milliseconds)",
+    labelnames=("pipeline", "stage", "executor"),
+    buckets=(0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+EXECUTOR_WORKERS = Gauge(
+    "eig_executor_workers",
+    "Workers in each stage executor pool",
+    labelnames=("executor",),
+    multiprocess_mode="livesum",
+)
+
+CAPTURE_FPS = Gauge(
+    "eig_capture_fps",
+    "Frames per second retrieved by each camera connector",
+    labelnames=("connector",),
+    multiprocess_mode="livesum",
+)
+
+CAPTURE_DROPPED = Counter(
+    "eig_capture_dropped_frames_total",
+    "Captured frames discarded before reaching a pipeline",
+    labelnames=("connector", "reason"),
+)
+
+CAPTURE_LATENCY = Histogram(
+    "eig_capture_enqueue_latency_ms",
+    "Time from frame retrieval on the capture thread to hand-off on the event loop (milliseconds)",
+    labelnames=("connector",),
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50),
+)
+
+WEBHOOK_BATCH_SIZE = Histogram(
+    "eig_webhook_batch_size",
+    "Actions per batched webhook request",
+    labelnames=("dispatcher",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+WEBHOOK_FLUSH_LATENCY = Histogram(
+    "eig_webhook_flush_latency_ms",
+    "Time from a batch's oldest action being queued to its delivery, retries included (milliseconds)",
+    labelnames=("dispatcher",),
+    buckets=(5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000),
+)
+
+WEBHOOK_DROPPED = Counter(
+    "eig_webhook_dropped_total",
+    "Webhook actions discarded: buffer overflow, unencodable payload, rejected by the endpoint, or retries exhausted",
+    labelnames=("dispatcher", "reason"),
+)
+
+ACTION_QUEUE_DEPTH = Gauge(
+    "eig_action_queue_depth",
+    "Actions waiting in each dispatcher's outbox",
+    labelnames=("dispatcher",),
+    multiprocess_mode="livesum",
+)
+
+ACTION_DISPATCH_LATENCY = Histogram(
+    "eig_action_dispatch_latency_ms",
+    "Time from an action entering the outbox to its dispatcher returning (milliseconds)",
+    labelnames=("dispatcher",),
+    buckets=(0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000),
+)
+
+ACTION_OVERFLOW = Counter(
+    "eig_action_overflow_total",
+    "Actions discarded, or producers blocked, because a dispatcher's outbox was full",
+    labelnames=("dispatcher", "policy"),
+)
+
+ACTION_FAILED = Counter(
+    "eig_action_failed_total",
+    "Actions whose dispatcher raised an error",
+    labelnames=("dispatcher",),
+)
+
+AGENT_LATENCY = Histogram(
+    "eig_agent_latency_ms",
+    "Time each agent took to handle a pipeline result, including waiting for a free slot (milliseconds)",
+    labelnames=("pipeline", "agent"),
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+AGENT_TIMEOUTS = Counter(
+    "eig_agent_timeouts_total",
+    "Agent invocations abandoned after the agent's timeout_ms",
+    labelnames=("pipeline", "agent"),
+)
+
+ACTIONS_SUPPRESSED = Counter(
+    "eig_actions_suppressed_total",
+    "Agent actions held back by the agent's suppress settings (unchanged payload or minimum interval)",
+    labelnames=("agent", "reason"),
 )
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Greedy non-maximum suppression over xyxy boxes."""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+BLOCK = 256
+
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_th: float,
+    *,
+    classes: Optional[np.ndarray] = None,
+    max_candidates: Optional[int] = 30000,
+    max_det: Optional[int] = 300,
+    block: int = BLOCK,
+) -> np.ndarray:
+    """Indices of the boxes kept by greedy NMS, highest score first.
+
+    With `classes`, boxes only suppress boxes of the same class: each class is shifted
+    into its own coordinate range so one pass handles every class. At most
+    `max_candidates` top-scoring boxes are considered and at most `max_det` kept (None
+    lifts either cap, a cap of 0 or less keeps nothing). Candidates are processed in
+    blocks of `block`: IoU is computed as a matrix against the boxes kept so far and
+    within the block, so dense frames cost a few large array operations instead of one
+    Python iteration per kept box over a shrinking index list. Results match the classic
+    loop, which suppresses a box once IoU with a kept box is not below `iou_th`.
+    """
+    order = scores.argsort()[::-1]
+    if max_candidates is not None:
+        order = order[: max(max_candidates, 0)]
+    if max_det is not None and max_det <= 0:
+        order = order[:0]
+    if order.size == 0:
+        return order.astype(np.intp)
+    cand = boxes[order]
+    if classes is not None:
+        span = cand.max() - cand.min() + 1
+        cand = cand + (classes[order].astype(cand.dtype) * span)[:, None]
+    limit = order.size if max_det is None else max_det
+    kept: list[int] = []
+    for start in range(0, order.size, block):
+        rows = np.arange(start, min(start + block, order.size))
+        if kept:
+            prior = cand[kept]
+            alive = (iou_matrix(prior, cand[rows]) < iou_th).all(axis=0)
+            rows = rows[alive]
+        if rows.size == 0:
+            continue
+        suppress = ~(iou_matrix(cand[rows], cand[rows]) < iou_th)  # NaN suppresses, as before
+        removed = np.zeros(rows.size, dtype=bool)
+        for i in range(rows.size):
+            if removed[i]:
+                continue
+            kept.append(int(rows[i]))
+            if len(kept) == limit:
+                return order[kept]
+            removed |= suppress[i]
+    return order[kept]
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of xyxy boxes, `a` rows against `b` columns."""
+    ax1, ay1, ax2, ay2 = (np.ascontiguousarray(a[:, k])[:, None] for k in range(4))
+    bx1, by1, bx2, by2 = (np.ascontiguousarray(b[:, k]) for k in range(4))
+    # in place where possible: each temporary is a full len(a) x len(b) matrix
+    w = np.minimum(ax2, bx2)
+    w -= np.maximum(ax1, bx1)
+    np.maximum(w, 0, out=w)
+    h = np.minimum(ay2, by2)
+    h -= np.maximum(ay1, by1)
+    np.maximum(h, 0, out=h)
+    inter = np.multiply(w, h, out=w)
+    # same operation order as the per-box loop so both agree to the last bit
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1)
+    union -= inter
+    union += 1e-6
+    return np.divide(inter, union, out=inter)
@@ -3,18 +3,27 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import inspect
 import logging
 import time
 from dataclasses import dataclass
-from typing import Awaitable, Callable, Iterable, List, Sequence
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
 
 import numpy as np
 
+from . import executors
 from .actions import dispatcher
-from .agents.base import Agent
+from .agents.base import Agent, AgentTimeout
+from .batching import MicroBatcher
 from .config import PipelineConfig
+from .features import FeatureSchema
 from .gateway_pool import GatewayPool, InferenceResult
+from .gating import ChangeGate
 from .messages import EdgeMessage
+from .metrics import AGENT_LATENCY, AGENT_TIMEOUTS
+from .preprocessing import InputSpec
+from .result_cache import ResultCache
 from .serialization import decode_payload
 from .utils import resolve_callable
 
@@ -31,52 +40,138 @@ class Pipeline:
     postprocess_fn: PostprocessFn | None
     agents: List[Agent]
     _semaphore: asyncio.Semaphore | None = None
+    _batcher: MicroBatcher | None = None
+    _cache: ResultCache | None = None
+    _gate: ChangeGate | None = None
 
     def __post_init__(self) -> None:
         if self.cfg.max_parallel:
             self._semaphore = asyncio.Semaphore(self.cfg.max_parallel)
+        if self.cfg.cache:
+            self._cache = ResultCache(self.cfg.cache, pipeline=self.cfg.id)
+        if self.cfg.gate:
+            if self.postprocess_fn is None:
+                # Raw results borrow the gateway's receive buffer and cannot be replayed.
+                log.warning("pipeline %s: gate needs a postprocess step; gating disabled", self.cfg.id)
+            else:
+                self._gate = ChangeGate(self.cfg.gate, pipeline=self.cfg.id)
 
     async def run(self, message: EdgeMessage, gateway: GatewayPool) -> None:
         start = time.perf_counter()
-        payload_obj = decode_payload(message)
-        arrays = list(self.preprocess_fn(message, payload_obj))
-        inference_latency = 0.0
-        if self.cfg.model and arrays:
+        if not self.cfg.model:
+            # Nothing to infer: agents get the decoded payload; cheap enough to stay on the loop.
+            payload_obj = decode_payload(message)
+            list(self.preprocess_fn(message, payload_obj))
+            await self._run_agents(message, payload_obj, 0.0)
+            return
+        arrays = await executors.preprocess(
+            self.cfg.executor.get("preprocess", "loop"), self.preprocess_fn, message, pipeline=self.cfg.id
+        )
+        if not arrays:
+            log.warning("pipeline %s received empty tensors from %s", self.cfg.id, message.sensor_id)
+            return
+        signature = None
+        if self._gate is not None:
+            signature = self._gate.signature(arrays)
+            previous = self._gate.check(message.sensor_id, signature)
+            if previous is not None:
+                await self._run_agents(message, previous, (time.perf_counter() - start) * 1000)
+                return
+        infer_start = time.perf_counter()
+        cache_key = None
+        result = None
+        if self._cache is not None:
+            cache_key = ResultCache.key(self.cfg.model, arrays)
+            result = self._cache.get(cache_key)
+        if result is None:
             guard = self._semaphore
             if guard:
                 async with guard:
-                    result = await gateway.infer(self.cfg.model, arrays)
+                    result = await self._infer(gateway, arrays)
             else:
-                result = await gateway.infer(self.cfg.model, arrays)
-            inference_latency = (time.perf_counter() - start) * 1000
-            if result.status != 0:
-                log.error("pipeline %s inference failed status=%s", self.cfg.id, result.status)
-                return
-            post_obj = self.postprocess_fn(result, message) if self.postprocess_fn else result
-        elif self.cfg.model and not arrays:
-            log.warning("pipeline %s received empty tensors from %s", self.cfg.id, message.sensor_id)
+                result = await self._infer(gateway, arrays)
+            if cache_key is not None:
+                self._cache.put(cache_key, result)
+        inference_latency = (time.perf_counter() - start) * 1000
+        if result.status != 0:
+            result.release()
+            log.error("pipeline %s inference failed status=%s", self.cfg.id, result.status)
             return
+        if self.postprocess_fn:
+            # Postprocessors read the outputs in place and must copy anything they keep.
+            try:
+                post_obj = await executors.postprocess(
+                    self.cfg.executor.get("postprocess", "loop"),
+                    self.postprocess_fn,
+                    result,
+                    message,
+                    pipeline=self.cfg.id,
+                )
+            finally:
+                result.release()
         else:
-            post_obj = payload_obj
+            post_obj = result
+        if signature is not None:
+            self._gate.update(message.sensor_id, signature, post_obj, (time.perf_counter() - infer_start) * 1000)
         await self._run_agents(message, post_obj, inference_latency)
 
+    async def _infer(self, gateway: GatewayPool, arrays: List[np.ndarray]) -> InferenceResult:
+        if self.cfg.batch is None:
+            return await gateway.infer(self.cfg.model, arrays)
+        if self._batcher is None:
+            self._batcher = MicroBatcher(gateway, self.cfg.model, self.cfg.batch, pipeline=self.cfg.id)
+        return await self._batcher.infer(arrays)
+
     async def _run_agents(self, message: EdgeMessage, data: object, latency_ms: float) -> None:
-        for agent in self.agents:
+        if len(self.agents) < 2 or self.cfg.agent_mode == "sequential":
+            for agent in self.agents:
+                await self._run_agent(agent, message, data, latency_ms)
+        else:
+            await asyncio.gather(*(self._run_agent(agent, message, data, latency_ms) for agent in self.agents))
+
+    async def _run_agent(self, agent: Agent, message: EdgeMessage, data: object, latency_ms: float) -> None:
+        start = time.perf_counter()
+        try:
+            actions = await agent.run(message=message, payload=data, latency_ms=latency_ms)
+        except AgentTimeout:
+            AGENT_TIMEOUTS.labels(self.cfg.id, agent.name).inc()
+            log.warning("agent %s timed out after %.0f ms on %s", agent.name, agent.timeout_s * 1000, message.sensor_id)
+            return
+        except Exception:
+            log.exception("agent %s failed", agent.name)
+            return
+        finally:
+            AGENT_LATENCY.labels(self.cfg.id, agent.name).observe((time.perf_counter() - start) * 1000)
+        if actions and agent.suppressor is not None:
+            actions = agent.suppressor.filter(actions, pipeline=self.cfg.id)
+        for action in actions or []:
             try:
-                actions = await agent.handle(message=message, payload=data, latency_ms=latency_ms)
-            except Exception:
-                log.exception("agent %s failed", agent.name)
-                continue
-            for action in actions or []:
                 await dispatcher.dispatch(action, agent=agent.name, pipeline=self.cfg.id)
+            except Exception:
+                # inline dispatchers (`outbox: false`) raise here; sibling agents and actions carry on
+                log.exception("agent %s: dispatching an action to %s failed", agent.name, action.dispatcher)
 
 
 class PipelineFactory:
-    def __init__(self, pipeline_cfg: PipelineConfig):
+    def __init__(self, pipeline_cfg: PipelineConfig, model_specs: Optional[Dict[str, InputSpec]] = None):
         self.cfg = pipeline_cfg
+        self.model_specs = model_specs or {}
 
     def build(self, agent_registry: dict[str, Agent]) -> Pipeline:
         preprocess = resolve_callable(self.cfg.preprocess)
+        if "spec" in inspect.signature(preprocess).parameters:
+            # Spec-driven preprocessors get the model's input block from models.yaml.
+            spec = self.model_specs.get(self.cfg.model)
+            if spec is None:
+                raise ValueError(
+                    f"pipeline {self.cfg.id}: {self.cfg.preprocess} needs the input spec of model "
+                    f"'{self.cfg.model}'; point models_config at the gateway's models.yaml"
+                )
+            preprocess = functools.partial(preprocess, spec=spec)
+        if self.cfg.features is not None:
+            if "schema" not in inspect.signature(preprocess).parameters:
+                raise ValueError(f"pipeline {self.cfg.id}: {self.cfg.preprocess} does not take a features schema")
+            preprocess = functools.partial(preprocess, schema=FeatureSchema(self.cfg.features))
         postprocess = resolve_callable(self.cfg.postprocess) if self.cfg.postprocess else None
         agents = [agent_registry[name] for name in self.cfg.agents]
         return Pipeline(cfg=self.cfg, preprocess_fn=preprocess, postprocess_fn=postprocess, agents=agents)
@@ -2,26 +2,58 @@
 """Pre/post processing helpers for environmental sensors."""
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 import numpy as np
 
+from orchestrator.features import FeatureSchema
 from orchestrator.gateway_pool import InferenceResult
 from orchestrator.messages import EdgeMessage
 
 
-def vector_to_tensor(message: EdgeMessage, payload) -> Iterable[np.ndarray]:
+def vector_to_tensor(message: EdgeMessage, payload, schema: Optional[FeatureSchema] = None) -> Iterable[np.ndarray]:
+    """Feature vector of a sensor reading as a `[1, F]` float32 tensor, or a batch of them.
+
+    With the pipeline's `features` schema, fields are read in the declared order with
+    defaults and scaling, and a list of readings becomes one `[N, F]` tensor. Without
+    one, every numeric field is used in sorted key order. Tensor payloads keep their
+    shape, with a leading axis added to 1-D vectors only; a multi-tensor payload yields
+    one input per tensor.
+    """
+    if isinstance(payload, np.ndarray):
+        yield _as_input(payload)
+        return
+    if isinstance(payload, (list, tuple)) and payload and isinstance(payload[0], np.ndarray):
+        if not all(isinstance(a, np.ndarray) for a in payload):
+            raise TypeError("environment payload mixes tensors with other values")
+        for array in payload:
+            yield _as_input(array)
+        return
+    if schema is not None:
+        if isinstance(payload, dict):
+            yield schema.row(payload)
+        elif isinstance(payload, (list, tuple)) and payload and isinstance(payload[0], dict):
+            yield schema.matrix(payload)
+        else:
+            raise TypeError("environment payload must be a dict or a list of dicts when the pipeline has features")
+        return
     if isinstance(payload, dict):
         values = [float(payload[k]) for k in sorted(payload.keys()) if isinstance(payload[k], (int, float))]
     elif isinstance(payload, (list, tuple)):
         values = [float(v) for v in payload]
     else:
-        raise TypeError("environment payload must be dict or list of numbers")
+        raise TypeError("environment payload must be a dict, a list of numbers or a tensor")
     arr = np.asarray(values, dtype=np.float32)
     arr = np.expand_dims(arr, axis=0)
     yield arr
 
 
+def _as_input(array: np.ndarray) -> np.ndarray:
+    # Raw tensor payloads: used as they are, with no copy when already float32.
+    array = np.asarray(array, dtype=np.float32)
+    return array if array.ndim >= 2 else array.reshape(1, -1)
+
+
 def softmax_topk(result: InferenceResult, message: EdgeMessage, k: int = 3) -> List[dict]:
     import numpy as np
 
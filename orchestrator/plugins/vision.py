@@ -3,47 +3,117 @@
 from __future__ import annotations
 
 import io
-from typing import Iterable, List
+from typing import Iterable, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
 from orchestrator.gateway_pool import InferenceResult
 from orchestrator.messages import EdgeMessage
+from orchestrator.nms import nms
+from orchestrator.preprocessing import InputSpec, engine_for
 
+YOLOV5_INPUT = InputSpec(model="yolov5", dtype="fp16", layout="NCHW", shape=(1, 3, 640, 640))
 
-def jpeg_to_yolov5(message: EdgeMessage, payload) -> Iterable[np.ndarray]:
-    if isinstance(payload, (bytes, bytearray)):
-        data = np.frombuffer(payload, dtype=np.uint8)
-        img = cv2.imdecode(data, cv2.IMREAD_COLOR)
-    else:
-        raise TypeError("JPEG payload expected")
-    message.metadata["image_hw"] = img.shape[:2]
-    img, params = _letterbox(img, 640)
-    message.metadata["letterbox"] = params
-    arr = img[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
-    arr = np.ascontiguousarray(arr)[None, ...]
-    yield arr.astype(np.float16)
+_REDUCED_DECODE = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+# start-of-frame markers carrying the image size; C4, C8 and CC share the range but are not frames
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
 
 
-def bgr_frame_to_yolov5(message: EdgeMessage, payload) -> Iterable[np.ndarray]:
+def jpeg_to_tensor(message: EdgeMessage, payload, spec: InputSpec) -> Iterable[np.ndarray]:
+    """Decode a JPEG and build the input tensor described by the pipeline model's spec.
+
+    libjpeg can decode at 1/2, 1/4 or 1/8 scale for a fraction of the cost of a full
+    decode. The largest reduction that still leaves at least as many pixels as the
+    resized image inside the model input is used. Letterbox geometry stays that of
+    the full-size source, so boxes map back to original coordinates.
+    """
+    if not isinstance(payload, (bytes, bytearray)):
+        raise TypeError("JPEG payload expected")
+    data = np.frombuffer(payload, dtype=np.uint8)
+    source_hw = jpeg_size(payload)
+    flag = cv2.IMREAD_COLOR
+    if source_hw is not None:
+        geo = engine_for(spec).geometry(*source_hw)
+        h, w = source_hw
+        for factor, reduced in _REDUCED_DECODE:
+            if -(-w // factor) >= geo.new_w and -(-h // factor) >= geo.new_h:
+                flag = reduced
+                break
+    img = cv2.imdecode(data, flag)
+    yield _to_tensor(message, img, spec, source_hw)
+
+
+def bgr_frame_to_tensor(message: EdgeMessage, payload, spec: InputSpec) -> Iterable[np.ndarray]:
+    """Build the model input tensor from a raw BGR camera frame."""
     shape = message.metadata.get("shape")
     if shape is None:
         raise ValueError("camera frame shape missing")
     bgr = np.frombuffer(payload, dtype=np.uint8).reshape(shape)
-    message.metadata["image_hw"] = bgr.shape[:2]
-    img, params = _letterbox(bgr, 640)
-    message.metadata["letterbox"] = params
-    arr = img[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
-    yield arr.astype(np.float16)[None, ...]
+    yield _to_tensor(message, bgr, spec)
+
+
+def jpeg_to_yolov5(message: EdgeMessage, payload) -> Iterable[np.ndarray]:
+    return jpeg_to_tensor(message, payload, YOLOV5_INPUT)
 
 
-def yolo_nms(result: InferenceResult, message: EdgeMessage, conf_th: float = 0.25, iou_th: float = 0.45) -> dict:
-    preds = np.frombuffer(result.outputs[0], dtype=np.float16).astype(np.float32).reshape(1, -1, 85)[0]
+def bgr_frame_to_yolov5(message: EdgeMessage, payload) -> Iterable[np.ndarray]:
+    return bgr_frame_to_tensor(message, payload, YOLOV5_INPUT)
+
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """(height, width) from a JPEG's start-of-frame header, or None if it has none."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos, end = 2, len(data)
+    while pos + 4 <= end:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # standalone markers
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):  # end of image / start of scan before any frame header
+            return None
+        if marker in _SOF_MARKERS:
+            if pos + 9 > end:
+                return None
+            h = (data[pos + 5] << 8) | data[pos + 6]
+            w = (data[pos + 7] << 8) | data[pos + 8]
+            return (h, w) if h and w else None
+        pos += 2 + ((data[pos + 2] << 8) | data[pos + 3])
+    return None
+
+
+def _to_tensor(
+    message: EdgeMessage, img: np.ndarray, spec: InputSpec, source_hw: Optional[Tuple[int, int]] = None
+) -> np.ndarray:
+    message.metadata["image_hw"] = source_hw or img.shape[:2]
+    tensor, params = engine_for(spec)(img, source_hw)
+    message.metadata["letterbox"] = params
+    return tensor
+
+
+def yolo_nms(
+    result: InferenceResult,
+    message: EdgeMessage,
+    conf_th: float = 0.25,
+    iou_th: float = 0.45,
+    agnostic: bool = False,
+    max_det: Optional[int] = 300,
+    max_candidates: Optional[int] = 30000,
+) -> dict:
+    raw = np.frombuffer(result.outputs[0], dtype=np.float16).reshape(-1, 85)
+    # Class confidences are <= 1, so objectness alone bounds the final score: rows failing
+    # the threshold on column 4 can never pass and skip conversion and class scoring.
+    rows = np.flatnonzero(_sigmoid(raw[:, 4].astype(np.float32)) >= conf_th)
+    preds = raw[rows].astype(np.float32)
     boxes = preds[:, :4]
     scores_obj = _sigmoid(preds[:, 4])
-    cls_logits = preds[:, 5:]
-    cls_scores = _sigmoid(cls_logits)
+    cls_scores = _sigmoid(preds[:, 5:])
     cls_ids = cls_scores.argmax(axis=1)
     cls_conf = cls_scores.max(axis=1)
     conf = scores_obj * cls_conf
@@ -54,25 +124,26 @@ def yolo_nms(result: InferenceResult, message: EdgeMessage, conf_th: float = 0.2
     if boxes.size == 0:
         return []
     xyxy = _xywh_to_xyxy(boxes)
-    keep = _nms(xyxy, conf, iou_th)
+    keep = nms(
+        xyxy,
+        conf,
+        iou_th,
+        classes=None if agnostic else cls_ids,
+        max_candidates=max_candidates,
+        max_det=max_det,
+    )
     ih, iw = message.metadata.get("image_hw", (640, 640))
     gain, pad_w, pad_h, _ = message.metadata.get("letterbox", (1.0, 0.0, 0.0, (ih, iw)))
-    detections = []
-    for i in keep:
-        x1, y1, x2, y2 = xyxy[i]
-        x1 = (x1 - pad_w) / gain
-        x2 = (x2 - pad_w) / gain
-        y1 = (y1 - pad_h) / gain
-        y2 = (y2 - pad_h) / gain
-        x1 = max(0.0, min(x1, iw))
-        x2 = max(0.0, min(x2, iw))
-        y1 = max(0.0, min(y1, ih))
-        y2 = max(0.0, min(y2, ih))
-        detections.append({
-            "label": int(cls_ids[i]),
-            "confidence": float(conf[i]),
-            "bbox": [float(x1), float(y1), float(x2), float(y2)],
-        })
+    kept = xyxy[keep]
+    kept[:, 0::2] = (kept[:, 0::2] - pad_w) / gain
+    kept[:, 1::2] = (kept[:, 1::2] - pad_h) / gain
+    # fmax(0, ...) keeps the old max(0.0, min(v, limit)) semantics, NaN included
+    kept[:, 0::2] = np.fmax(0.0, np.minimum(kept[:, 0::2], iw))
+    kept[:, 1::2] = np.fmax(0.0, np.minimum(kept[:, 1::2], ih))
+    detections = [
+        {"label": label, "confidence": score, "bbox": bbox}
+        for label, score, bbox in zip(cls_ids[keep].tolist(), conf[keep].tolist(), kept.tolist())
+    ]
     image_blob = message.payload if message.encoding.lower() in {"jpeg", "jpg", "image/jpeg"} else None
     return {
         "detections": detections,
@@ -82,20 +153,6 @@ def yolo_nms(result: InferenceResult, message: EdgeMessage, conf_th: float = 0.2
     }
 
 
-def _letterbox(img, new_shape=640, color=(114, 114, 114)):
-    if isinstance(new_shape, int):
-        new_shape = (new_shape, new_shape)
-    shape = img.shape[:2]
-    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
-    new_unpad = (int(round(shape[1] * r)), int(round(shape[0] * r)))
-    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]
-    dw //= 2
-    dh //= 2
-    img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
-    img = cv2.copyMakeBorder(img, dh, dh, dw, dw, cv2.BORDER_CONSTANT, value=color)
-    return img, (r, dw, dh, shape)
-
-
 def _xywh_to_xyxy(boxes):
     xyxy = np.zeros_like(boxes)
     xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2
@@ -105,32 +162,5 @@ def _xywh_to_xyxy(boxes):
     return xyxy
 
 
-def _nms(boxes, scores, iou_th):
-    idxs = scores.argsort()[::-1]
-    keep = []
-    while idxs.size > 0:
-        i = idxs[0]
-        keep.append(i)
-        if idxs.size == 1:
-            break
-        idxs = idxs[1:][
-            _iou_xyxy(boxes[i], boxes[idxs[1:]]) < iou_th
-        ]
-    return keep
-
-
-def _iou_xyxy(b0, B):
-    inter_x1 = np.maximum(b0[0], B[:, 0])
-    inter_y1 = np.maximum(b0[1], B[:, 1])
-    inter_x2 = np.minimum(b0[2], B[:, 2])
-    inter_y2 = np.minimum(b0[3], B[:, 3])
-    inter_w = np.maximum(0, inter_x2 - inter_x1)
-    inter_h = np.maximum(0, inter_y2 - inter_y1)
-    inter = inter_w * inter_h
-    area0 = (b0[2] - b0[0]) * (b0[3] - b0[1])
-    areaB = (B[:, 2] - B[:, 0]) * (B[:, 3] - B[:, 1])
-    return inter / (area0 + areaB - inter + 1e-6)
-
-
 def _sigmoid(x):
     return 1 / (1 + np.exp(-x))
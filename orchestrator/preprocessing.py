@@ -0,0 +1,185 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Fused image preprocessing compiled from model input specs in models.yaml."""
+from __future__ import annotations
+
+import functools
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+from .buffers import FramePool
+
+DTYPES = {"fp32": np.float32, "fp16": np.float16}
+LAYOUTS = ("NCHW", "NHWC")
+RESIZE_MODES = ("letterbox", "stretch")
+_GATHER_ROWS = 32
+
+# (gain, pad_w, pad_h, source_hw) as consumed by the YOLO postprocessors
+LetterboxParams = Tuple[float, int, int, Tuple[int, int]]
+
+
+@dataclass(frozen=True, slots=True)
+class InputSpec:
+    """Image input of one model.
+
+    `dtype`, `layout` and `shape` come from the model's `input` block; the optional
+    `color`, `resize`, `pad_value`, `scale`, `mean` and `std` keys tune preprocessing
+    and are ignored by the gateway. Pixels become `(pixel * scale - mean) / std`.
+    """
+
+    model: str
+    dtype: str = "fp32"
+    layout: str = "NCHW"
+    shape: Tuple[int, ...] = (1, 3, 640, 640)
+    color: str = "rgb"
+    resize: str = "letterbox"
+    pad_value: int = 114
+    scale: float = 1 / 255.0
+    mean: Optional[Tuple[float, float, float]] = None
+    std: Optional[Tuple[float, float, float]] = None
+
+    @property
+    def hw(self) -> Tuple[int, int]:
+        return (self.shape[2], self.shape[3]) if self.layout == "NCHW" else (self.shape[1], self.shape[2])
+
+
+def parse_input_spec(model: str, data: Dict) -> InputSpec:
+    spec = InputSpec(
+        model=model,
+        dtype=data.get("dtype", "fp32"),
+        layout=data.get("layout", "NCHW"),
+        shape=tuple(int(d) for d in data.get("shape", (1, 3, 640, 640))),
+        color=data.get("color", "rgb"),
+        resize=data.get("resize", "letterbox"),
+        pad_value=int(data.get("pad_value", 114)),
+        scale=float(data.get("scale", 1 / 255.0)),
+        mean=tuple(float(v) for v in data["mean"]) if data.get("mean") else None,
+        std=tuple(float(v) for v in data["std"]) if data.get("std") else None,
+    )
+    if spec.dtype not in DTYPES:
+        raise ValueError(f"model {model}: unsupported input dtype '{spec.dtype}'")
+    if spec.layout not in LAYOUTS or len(spec.shape) != 4:
+        raise ValueError(f"model {model}: expected a 4-d NCHW or NHWC input, got {spec.layout} {list(spec.shape)}")
+    if spec.resize not in RESIZE_MODES:
+        raise ValueError(f"model {model}: unknown resize mode '{spec.resize}'")
+    if spec.color not in ("rgb", "bgr"):
+        raise ValueError(f"model {model}: unknown color order '{spec.color}'")
+    return spec
+
+
+def load_model_specs(path: str | Path) -> Dict[str, InputSpec]:
+    """Read every model's input spec from the gateway's models.yaml."""
+    raw = yaml.safe_load(Path(path).read_text()) or {}
+    specs: Dict[str, InputSpec] = {}
+    for item in raw.get("models", []) or []:
+        if item.get("input"):
+            specs[item["id"]] = parse_input_spec(item["id"], item["input"])
+    return specs
+
+
+@dataclass(frozen=True, slots=True)
+class _Geometry:
+    new_w: int
+    new_h: int
+    top: int
+    left: int
+    params: LetterboxParams
+
+
+class FusedPreprocessor:
+    """Turns a BGR uint8 image into the model's input tensor with two full-size passes.
+
+    The image is resized straight into a padded canvas, then colour order, scaling,
+    normalisation and the dtype cast happen in one lookup-table gather per channel
+    writing into a recycled output tensor. Letterbox geometry is computed once per
+    source resolution. Results match the classic resize/copyMakeBorder/transpose/astype
+    chain exactly.
+    """
+
+    def __init__(self, spec: InputSpec, pool_size: int = 4):
+        self.spec = spec
+        self.dtype = np.dtype(DTYPES[spec.dtype])
+        self._out_shape = spec.shape
+        self._pool = FramePool(spec.shape, self.dtype, pool_size)
+        self._geometry: Dict[Tuple[int, int], _Geometry] = {}
+        self._local = threading.local()  # per-thread canvas so thread executors never share one
+        self._lut = _channel_luts(spec, self.dtype)
+
+    def geometry(self, h: int, w: int) -> _Geometry:
+        geo = self._geometry.get((h, w))
+        if geo is None:
+            th, tw = self.spec.hw
+            if self.spec.resize == "stretch":
+                geo = _Geometry(tw, th, 0, 0, (min(th / h, tw / w), 0, 0, (h, w)))
+            else:
+                r = min(th / h, tw / w)
+                new_w, new_h = int(round(w * r)), int(round(h * r))
+                left, top = (tw - new_w) // 2, (th - new_h) // 2
+                geo = _Geometry(new_w, new_h, top, left, (r, left, top, (h, w)))
+            self._geometry[(h, w)] = geo
+        return geo
+
+    def __call__(
+        self, bgr: np.ndarray, source_hw: Optional[Tuple[int, int]] = None
+    ) -> Tuple[np.ndarray, LetterboxParams]:
+        """Tensor and letterbox params for `bgr`.
+
+        `source_hw` is the original resolution when `bgr` was decoded at a reduced scale;
+        geometry and params then follow the original so boxes map back to it unchanged.
+        """
+        geo = self.geometry(*(source_hw or bgr.shape[:2]))
+        canvas = self._canvas(geo)
+        roi = canvas[geo.top : geo.top + geo.new_h, geo.left : geo.left + geo.new_w]
+        if (geo.new_h, geo.new_w) == bgr.shape[:2]:
+            np.copyto(roi, bgr)
+        else:
+            cv2.resize(bgr, (geo.new_w, geo.new_h), dst=roi, interpolation=cv2.INTER_LINEAR)
+        out = self._pool.acquire()
+        if out is None:  # every pooled tensor is still in flight downstream
+            out = np.empty(self._out_shape, dtype=self.dtype)
+        order = (2, 1, 0) if self.spec.color == "rgb" else (0, 1, 2)
+        rows = canvas.shape[0]
+        for dst_c, src_c in enumerate(order):
+            dst = out[0, dst_c] if self.spec.layout == "NCHW" else out[0, :, :, dst_c]
+            lut = self._lut[dst_c]
+            # A uint8 pixel has 256 possible values, so scale/normalise/cast is one table gather.
+            # mode="clip" lets take() write straight into `out`; row blocks keep its intp index
+            # copy small instead of 8 bytes per pixel of the whole plane.
+            for r in range(0, rows, _GATHER_ROWS):
+                np.take(lut, canvas[r : r + _GATHER_ROWS, :, src_c], out=dst[r : r + _GATHER_ROWS], mode="clip")
+        return out, geo.params
+
+    def _canvas(self, geo: _Geometry) -> np.ndarray:
+        local = self._local
+        canvas = getattr(local, "canvas", None)
+        if canvas is None:
+            th, tw = self.spec.hw
+            canvas = local.canvas = np.empty((th, tw, 3), dtype=np.uint8)
+            local.geometry = None
+        if local.geometry is not geo:
+            canvas.fill(self.spec.pad_value)  # border pixels only change with the geometry
+            local.geometry = geo
+        return canvas
+
+
+def _channel_luts(spec: InputSpec, dtype: np.dtype) -> np.ndarray:
+    """Per output channel, the model value of every uint8 pixel, rounded like the float32 chain."""
+    pixels = np.arange(256, dtype=np.uint8).astype(np.float32)
+    base = pixels / np.float32(255.0) if spec.scale == 1 / 255.0 else pixels * np.float32(spec.scale)
+    mean = spec.mean or (0.0, 0.0, 0.0)
+    std = spec.std or (1.0, 1.0, 1.0)
+    luts = []
+    for m, sd in zip(mean, std):
+        values = base if (m, sd) == (0.0, 1.0) else (base - np.float32(m)) / np.float32(sd)
+        luts.append(values.astype(dtype))
+    return np.stack(luts)
+
+
+@functools.lru_cache(maxsize=None)
+def engine_for(spec: InputSpec) -> FusedPreprocessor:
+    return FusedPreprocessor(spec)
@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Content-addressed cache of inference results."""
+from __future__ import annotations
+
+import collections
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import CacheConfig
+from .gateway_pool import InferenceResult
+from .metrics import RESULT_CACHE_BYTES, RESULT_CACHE_EVICTIONS, RESULT_CACHE_LOOKUPS
+
+
+@dataclass(slots=True)
+class _Cached:
+    outputs: Tuple[bytes, ...]
+    nbytes: int
+    expires: float
+
+
+class ResultCache:
+    """LRU cache of successful replies keyed by model id and the exact input tensors.
+
+    Keys are a 128-bit BLAKE2b digest of the model id and every input's dtype, shape
+    and bytes, so a hit means the gateway would have been sent a byte-identical
+    request. Outputs are copied out of the gateway's receive buffer when stored; hits
+    hand out read-only views of that copy without a lease. Entries older than
+    `ttl_s` are treated as misses, and the least recently used entries are evicted
+    once `max_entries` or `max_bytes` would be exceeded.
+    """
+
+    def __init__(self, cfg: CacheConfig, *, pipeline: str):
+        self.max_entries = cfg.max_entries
+        self.max_bytes = cfg.max_bytes
+        self.ttl = cfg.ttl_s
+        self.pipeline = pipeline
+        self.nbytes = 0
+        self._entries: collections.OrderedDict[bytes, _Cached] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(model: str, arrays: Sequence[np.ndarray]) -> bytes:
+        h = hashlib.blake2b(model.encode(), digest_size=16)
+        for a in arrays:
+            a = np.ascontiguousarray(a)
+            h.update(f"|{a.dtype.str}{a.shape}|".encode())
+            h.update(a.reshape(-1).view(np.uint8))
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[InferenceResult]:
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl is not None and entry.expires <= time.monotonic():
+            self._evict(key, "ttl")
+            entry = None
+        if entry is None:
+            RESULT_CACHE_LOOKUPS.labels(self.pipeline, "miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        RESULT_CACHE_LOOKUPS.labels(self.pipeline, "hit").inc()
+        return InferenceResult(status=0, outputs=[memoryview(b) for b in entry.outputs])
+
+    def put(self, key: bytes, result: InferenceResult) -> None:
+        """Store a copy of a successful result; the caller keeps ownership of `result`."""
+        if result.status != 0:
+            return
+        outputs: List[bytes] = [bytes(out) for out in result.outputs]
+        nbytes = sum(len(b) for b in outputs)
+        if nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self._evict(key, None)
+        while self._entries and (len(self._entries) >= self.max_entries or self.nbytes + nbytes > self.max_bytes):
+            self._evict(next(iter(self._entries)), "capacity")
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self._entries[key] = _Cached(tuple(outputs), nbytes, expires)
+        self.nbytes += nbytes
+        RESULT_CACHE_BYTES.labels(self.pipeline).set(self.nbytes)
+
+    def _evict(self, key: bytes, reason: Optional[str]) -> None:
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.nbytes
+        RESULT_CACHE_BYTES.labels(self.pipeline).set(self.nbytes)
+        if reason is not None:
+            RESULT_CACHE_EVICTIONS.labels(self.pipeline, reason).inc()
@@ -0,0 +1,138 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Deadline-aware scheduling of messages across per-pipeline queues."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from .config import PipelineConfig
+from .messages import EdgeMessage
+from .metrics import PIPELINE_CONFLATED, PIPELINE_DROPPED, QUEUE_DEPTH, QUEUE_WAIT
+
+log = logging.getLogger(__name__)
+
+# Pipelines without deadline_ms are ordered as if they had this budget so that
+# deadline-bound pipelines cannot starve them indefinitely.
+NO_DEADLINE_MS = 1000
+_EWMA_ALPHA = 0.2
+
+
+@dataclass(slots=True)
+class _Entry:
+    message: EdgeMessage
+    deadline_ns: int
+    enqueued_ns: int
+
+
+@dataclass(slots=True)
+class _PipelineQueue:
+    cfg: PipelineConfig
+    capacity: int
+    entries: Deque[_Entry] = field(default_factory=deque)
+    service_ms: float = 0.0
+    latest: Dict[str, _Entry] = field(default_factory=dict)
+
+
+class PipelineScheduler:
+    """Per-pipeline FIFO queues served by priority, then earliest deadline first.
+
+    Messages that cannot finish before their deadline, given their age and the
+    pipeline's recent service time, are rejected at enqueue time; queued messages
+    that run out of time while waiting are discarded when they reach the front.
+
+    With `conflate: latest` (set on the pipeline, or per route via the message's
+    `conflate` metadata) a message replaces the sensor's queued, not-yet-started
+    message in place instead of queueing behind it.
+    """
+
+    def __init__(self, pipelines: Iterable[PipelineConfig]):
+        self._queues: Dict[str, _PipelineQueue] = {
+            cfg.id: _PipelineQueue(cfg=cfg, capacity=cfg.max_queue_depth or 1024) for cfg in pipelines
+        }
+        self._ready = asyncio.Semaphore(0)
+        self._closed = False
+
+    def qsize(self, pipeline_id: str) -> int:
+        return len(self._queues[pipeline_id].entries)
+
+    def offer(self, pipeline_id: str, message: EdgeMessage) -> Optional[str]:
+        """Queue a message; returns the drop reason if it was rejected."""
+        queue = self._queues[pipeline_id]
+        now = time.monotonic_ns()
+        budget_ms = queue.cfg.deadline_ms or NO_DEADLINE_MS
+        remaining_ms = budget_ms - message.age_ms()
+        if queue.cfg.deadline_ms and remaining_ms < queue.service_ms:
+            return "deadline"
+        deadline_ns = now + int(remaining_ms * 1e6)
+        conflate = message.metadata.get("conflate") or queue.cfg.conflate
+        if conflate == "latest":
+            entry = queue.latest.get(message.sensor_id)
+            if entry is not None:
+                entry.message = message
+                entry.deadline_ns = deadline_ns
+                PIPELINE_CONFLATED.labels(pipeline_id).inc()
+                return None
+        if len(queue.entries) >= queue.capacity:
+            return "queue_full"
+        entry = _Entry(message, deadline_ns, now)
+        queue.entries.append(entry)
+        if conflate == "latest":
+            queue.latest[message.sensor_id] = entry
+        QUEUE_DEPTH.labels(pipeline_id).set(len(queue.entries))
+        self._ready.release()
+        return None
+
+    async def next(self) -> Optional[Tuple[str, EdgeMessage]]:
+        """Wait for the most urgent message, or None once the scheduler is closed."""
+        while True:
+            await self._ready.acquire()
+            if self._closed:
+                self._ready.release()  # wake the next waiting worker too
+                return None
+            queue = self._pick()
+            if queue is None:
+                continue
+            entry = queue.entries.popleft()
+            if queue.latest.get(entry.message.sensor_id) is entry:
+                del queue.latest[entry.message.sensor_id]
+            pipeline_id = queue.cfg.id
+            now = time.monotonic_ns()
+            QUEUE_DEPTH.labels(pipeline_id).set(len(queue.entries))
+            QUEUE_WAIT.labels(pipeline_id).observe((now - entry.enqueued_ns) / 1e6)
+            if queue.cfg.deadline_ms and now + queue.service_ms * 1e6 > entry.deadline_ns:
+                PIPELINE_DROPPED.labels(pipeline_id, "deadline").inc()
+                log.warning(
+                    "pipeline %s dropping message from %s that expired while queued (deadline %sms)",
+                    pipeline_id,
+                    entry.message.sensor_id,
+                    queue.cfg.deadline_ms,
+                )
+                continue
+            return pipeline_id, entry.message
+
+    def _pick(self) -> Optional[_PipelineQueue]:
+        best: Optional[_PipelineQueue] = None
+        for queue in self._queues.values():
+            if not queue.entries:
+                continue
+            if best is None or (-queue.cfg.priority, queue.entries[0].deadline_ns) < (
+                -best.cfg.priority,
+                best.entries[0].deadline_ns,
+            ):
+                best = queue
+        return best
+
+    def record_service(self, pipeline_id: str, elapsed_ms: float) -> None:
+        queue = self._queues[pipeline_id]
+        if queue.service_ms == 0.0:
+            queue.service_ms = elapsed_ms
+        else:
+            queue.service_ms += _EWMA_ALPHA * (elapsed_ms - queue.service_ms)
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.release()
@@ -3,24 +3,181 @@
 from __future__ import annotations
 
 import base64
+import functools
 import io
 import json
-from typing import Any
+import math
+import struct
+from typing import Any, Callable, List, Sequence
 
 import numpy as np
 
 from .messages import EdgeMessage
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; `_fast_json` keeps the stdlib's results
+    orjson = None
+
+Decoder = Callable[[Any], Any]
+
+# Raw tensor payloads ("EIGT"). Little-endian:
+#   header  "EIGT" | u8 version=1 | u8 tensor count | u16 reserved=0
+#   tensor  u8 dtype | u8 ndim | i32 dims[ndim] | u32 byte_len   (the gateway's tensor descriptor)
+#           zero padding up to the next multiple of 8 from the payload start, then byte_len data bytes
+# dtype codes 0-3 match the gateway protocol; 4-6 cover common raw sensor formats.
+TENSOR_MAGIC = b"EIGT"
+TENSOR_VERSION = 1
+TENSOR_DTYPES = {
+    0: np.dtype("<f4"),
+    1: np.dtype("<f2"),
+    2: np.dtype("i1"),
+    3: np.dtype("<i4"),
+    4: np.dtype("u1"),
+    5: np.dtype("<i2"),
+    6: np.dtype("<u2"),
+}
+_TENSOR_CODES = {dt: code for code, dt in TENSOR_DTYPES.items()}
+_TENSOR_HDR = struct.Struct("<4sBBH")
+_TENSOR_ALIGN = 8
+
+_INT64_LIMIT = float(2**63)
+
+CODECS: dict[str, Decoder] = {}
+
+
+def register(names: str | tuple[str, ...], decoder: Decoder) -> None:
+    """Register `decoder` for one or more `serializer`/encoding names (case-insensitive)."""
+    for name in (names,) if isinstance(names, str) else names:
+        CODECS[name.lower()] = decoder
+
 
 def decode_payload(message: EdgeMessage) -> Any:
-    fmt = message.encoding.lower()
-    if fmt == "json":
-        return json.loads(message.payload.decode("utf-8"))
-    if fmt in {"jpg", "jpeg", "image/jpeg"}:
-        return message.payload
-    if fmt == "base64":
-        return base64.b64decode(message.payload)
-    if fmt == "npz":
-        with np.load(io.BytesIO(message.payload), allow_pickle=False) as data:
-            return {k: data[k] for k in data.files}
-    return message.payload
+    """Decode the payload with the codec named by its encoding, at most once per message.
+
+    The decoded object is cached on the message (and shared with copies made by
+    `with_pipeline`), so plugins must treat it as read-only. Unknown encodings such as
+    raw camera frames pass the payload through unchanged.
+    """
+    return message.cached_decode(_decode)
+
+
+def _decode(message: EdgeMessage) -> Any:
+    decoder = CODECS.get(message.encoding.lower())
+    return decoder(message.payload) if decoder is not None else message.payload
+
+
+def _json(payload) -> Any:
+    return json.loads(bytes(payload) if isinstance(payload, memoryview) else payload)
+
+
+def _fast_json(payload) -> Any:
+    """orjson, with the stdlib deciding the documents where the two disagree.
+
+    orjson rejects NaN/Infinity, which the stdlib accepts, and turns integers beyond 64
+    bits into floats, which the stdlib keeps exact. Both cases are re-parsed with the
+    stdlib, so installing orjson never changes what sensors may send.
+    """
+    try:
+        obj = orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        return _json(payload)  # raises again if the document really is malformed
+    return _json(payload) if _has_huge_float(obj) else obj
+
+
+def _has_huge_float(obj) -> bool:
+    # Every float at or beyond 2**63 may be an integer orjson could not keep exact.
+    kind = type(obj)
+    if kind is float:
+        return not -_INT64_LIMIT < obj < _INT64_LIMIT
+    if kind is dict:
+        return any(map(_has_huge_float, obj.values()))
+    if kind is list:
+        return any(map(_has_huge_float, obj))
+    return False
+
+
+def _npz(payload) -> dict:
+    with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+        return {k: data[k] for k in data.files}
+
+
+def encode_tensors(arrays: Sequence[np.ndarray]) -> bytes:
+    """Pack arrays into a raw tensor payload (serializer `tensor`)."""
+    parts = [_TENSOR_HDR.pack(TENSOR_MAGIC, TENSOR_VERSION, len(arrays), 0)]
+    size = _TENSOR_HDR.size
+    for a in arrays:
+        a = np.asarray(a)
+        a = np.ascontiguousarray(a, dtype=a.dtype.newbyteorder("<"))
+        code = _TENSOR_CODES.get(a.dtype)
+        if code is None:
+            raise ValueError(f"unsupported tensor dtype {a.dtype}")
+        desc = struct.pack(f"<BB{a.ndim}iI", code, a.ndim, *a.shape, a.nbytes)
+        pad = -(size + len(desc)) % _TENSOR_ALIGN
+        parts += [desc, bytes(pad), a.tobytes()]
+        size += len(desc) + pad + a.nbytes
+    return b"".join(parts)
+
+
+def decode_tensors(payload) -> List[np.ndarray]:
+    """Arrays of a raw tensor payload as read-only views of `payload` (no copy)."""
+    view = memoryview(payload).cast("B")
+    if len(view) < _TENSOR_HDR.size:
+        raise ValueError("tensor payload truncated")
+    magic, version, count, _ = _TENSOR_HDR.unpack_from(view, 0)
+    if magic != TENSOR_MAGIC or version != TENSOR_VERSION:
+        raise ValueError(f"not a version {TENSOR_VERSION} tensor payload")
+    offset = _TENSOR_HDR.size
+    arrays = []
+    for _ in range(count):
+        code, ndim = struct.unpack_from("<BB", view, offset)
+        dims = struct.unpack_from(f"<{ndim}i", view, offset + 2)
+        (nbytes,) = struct.unpack_from("<I", view, offset + 2 + 4 * ndim)
+        offset += 6 + 4 * ndim
+        offset += -offset % _TENSOR_ALIGN
+        dtype = TENSOR_DTYPES.get(code)
+        if dtype is None:
+            raise ValueError(f"unknown tensor dtype code {code}")
+        count_items = math.prod(dims)
+        if count_items * dtype.itemsize != nbytes or offset + nbytes > len(view):
+            raise ValueError("tensor payload truncated or inconsistent with its shape")
+        arrays.append(np.frombuffer(view, dtype=dtype, count=count_items, offset=offset).reshape(dims))
+        offset += nbytes
+    return arrays
+
+
+def _tensor(payload) -> np.ndarray | List[np.ndarray]:
+    arrays = decode_tensors(payload)
+    return arrays[0] if len(arrays) == 1 else arrays
+
+
+def _unavailable(codec: str, package: str) -> Decoder:
+    def decode(payload):
+        raise RuntimeError(f"{codec} payloads need the optional '{package}' package (pip install {package})")
+
+    return decode
+
+
+def _msgpack() -> Decoder:
+    try:
+        import msgpack
+    except ImportError:
+        return _unavailable("msgpack", "msgpack")
+    return functools.partial(msgpack.unpackb, raw=False)
+
+
+def _cbor() -> Decoder:
+    try:
+        import cbor2
+    except ImportError:
+        return _unavailable("cbor", "cbor2")
+    return lambda payload: cbor2.loads(bytes(payload) if isinstance(payload, memoryview) else payload)
+
+
+register("json", _fast_json if orjson is not None else _json)
+register(("jpg", "jpeg", "image/jpeg"), lambda payload: payload)
+register("base64", base64.b64decode)
+register("npz", _npz)
+register(("tensor", "eigt"), _tensor)
+register(("msgpack", "application/msgpack"), _msgpack())
+register(("cbor", "application/cbor"), _cbor())
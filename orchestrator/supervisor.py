@@ -0,0 +1,168 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Supervisor running the orchestrator as several sharded worker processes."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import signal
+import tempfile
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Optional
+
+from prometheus_client import CollectorRegistry, start_http_server
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+
+from orchestrator.config import load_config
+
+log = logging.getLogger("orchestrator.supervisor")
+
+STOP_TIMEOUT_S = 10.0
+MAX_RESTART_DELAY_S = 30.0
+# a worker that lived at least this long is considered healthy and restarts immediately
+HEALTHY_UPTIME_S = 10.0
+
+
+class _Worker:
+    __slots__ = ("index", "process", "started", "restart_delay", "restart_at")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[mp.process.BaseProcess] = None
+        self.started = 0.0
+        self.restart_delay = 0.0
+        self.restart_at = 0.0
+
+
+class Supervisor:
+    """Starts `workers` orchestrator processes and keeps them running until signalled.
+
+    Worker `i` owns the connectors sharded by connector id that hash to `i` and, for
+    broker connectors sharded by sensor, the sensors whose id hashes to `i`. Workers
+    write Prometheus metrics to a shared multiprocess directory that the supervisor
+    serves, merged, on the configured `metrics_port`. A worker that exits unexpectedly
+    is restarted, with exponential backoff when it keeps crashing on start-up.
+    SIGINT/SIGTERM stop every worker with SIGTERM and wait for them to drain.
+    """
+
+    def __init__(self, config_path: str, workers: int):
+        self.config_path = config_path
+        self.config = load_config(config_path)
+        self.workers = [_Worker(i) for i in range(workers)]
+        # spawn, not fork: workers must import prometheus_client after the multiprocess
+        # directory is set, and must not inherit this process's threads.
+        self._ctx = mp.get_context("spawn")
+        self._stopping = False
+        self._own_metrics_dir = False
+
+    def run(self) -> None:
+        metrics_dir = self._prepare_metrics_dir()
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry, path=metrics_dir)
+        start_http_server(self.config.metrics_port, registry=registry)
+        previous = {sig: signal.signal(sig, self._request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            for worker in self.workers:
+                self._start(worker)
+            log.info("supervising %d orchestrator workers", len(self.workers))
+            while not self._stopping:
+                self._watch(metrics_dir)
+        finally:
+            self._stop_all(metrics_dir)
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            if self._own_metrics_dir:
+                shutil.rmtree(metrics_dir, ignore_errors=True)
+
+    def _request_stop(self, signum, _frame) -> None:
+        log.info("supervisor received %s; stopping workers", signal.Signals(signum).name)
+        self._stopping = True
+
+    def _prepare_metrics_dir(self) -> str:
+        path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if path:
+            Path(path).mkdir(parents=True, exist_ok=True)
+            for stale in Path(path).glob("*.db"):  # left behind by a previous run
+                stale.unlink()
+        else:
+            path = tempfile.mkdtemp(prefix="eig-metrics-")
+            self._own_metrics_dir = True
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+        return path
+
+    def _start(self, worker: _Worker) -> None:
+        process = self._ctx.Process(
+            target=run_worker,
+            args=(self.config_path, worker.index, len(self.workers)),
+            name=f"orchestrator-{worker.index}",
+        )
+        process.start()
+        worker.process = process
+        worker.started = time.monotonic()
+        log.info("worker %d started (pid %d)", worker.index, process.pid)
+
+    def _watch(self, metrics_dir: str) -> None:
+        running = {w.process.sentinel: w for w in self.workers if w.process is not None}
+        pending = [w.restart_at for w in self.workers if w.process is None]
+        timeout = min([1.0] + [max(0.0, at - time.monotonic()) for at in pending])
+        for sentinel in wait(list(running), timeout=timeout):
+            worker = running[sentinel]
+            process = worker.process
+            process.join()
+            mark_process_dead(process.pid, metrics_dir)
+            worker.process = None
+            if self._stopping:
+                continue
+            uptime = time.monotonic() - worker.started
+            healthy = uptime >= HEALTHY_UPTIME_S
+            worker.restart_delay = 0.0 if healthy else min(MAX_RESTART_DELAY_S, max(1.0, worker.restart_delay * 2))
+            worker.restart_at = time.monotonic() + worker.restart_delay
+            log.error(
+                "worker %d (pid %d) exited with %s after %.1fs; restarting in %.1fs",
+                worker.index,
+                process.pid,
+                process.exitcode,
+                uptime,
+                worker.restart_delay,
+            )
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.process is None and not self._stopping and worker.restart_at <= now:
+                self._start(worker)
+
+    def _stop_all(self, metrics_dir: str) -> None:
+        alive = [w.process for w in self.workers if w.process is not None and w.process.is_alive()]
+        for process in alive:
+            process.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT_S
+        for process in alive:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                log.warning("worker %s did not stop within %.0fs; killing it", process.name, STOP_TIMEOUT_S)
+                process.kill()
+                process.join()
+        for worker in self.workers:
+            if worker.process is not None:
+                mark_process_dead(worker.process.pid, metrics_dir)
+                worker.process = None
+        log.info("all workers stopped")
+
+
+def run_worker(config_path: str, index: int, count: int) -> None:
+    """Entry point of one worker process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO, format=f"%(asctime)s [%(levelname)s] %(name)s[w{index}]: %(message)s"
+    )
+    from orchestrator.app import main_async
+
+    asyncio.run(main_async(argparse.Namespace(config=config_path), shard=(index, count)))
+
+
+def supervise(config_path: str, workers: int) -> None:
+    Supervisor(config_path, workers).run()
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import importlib
+import zlib
 from typing import Any
 
 
@@ -26,3 +27,8 @@ def resolve_callable(qualname: str) -> Any:
         return getattr(module, func_name)
     except AttributeError as exc:
         raise AttributeError(f"callable '{qualname}' not found in module '{module_name}'") from exc
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Stable shard index for `key`; unlike hash(), identical in every process and run."""
+    return zlib.crc32(key.encode()) % shards
@@ -0,0 +1,225 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Action outboxes, suppression, and batched webhook dispatch against a local HTTP stand-in."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from prometheus_client import REGISTRY
+
+from orchestrator.actions.base import Action, BaseDispatcher
+from orchestrator.actions.dispatcher import Outbox
+from orchestrator.actions.webhook import WebhookDispatcher
+from orchestrator.agents.suppression import ActionSuppressor
+from orchestrator.config import OutboxConfig
+
+
+class _Endpoint:
+    def __init__(self, failures: int = 0, status: int = 503):
+        self.failures = failures
+        self.status = status
+        self.batches = []
+        self.attempts = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.attempts += 1
+        body = await request.read()
+        if self.failures:
+            self.failures -= 1
+            return web.Response(status=self.status)
+        if request.content_type == "application/x-ndjson":
+            self.batches.append([json.loads(line) for line in body.splitlines()])
+        else:
+            self.batches.append(json.loads(body))
+        return web.Response(status=204)
+
+
+async def _serve(endpoint: _Endpoint) -> TestServer:
+    app = web.Application()
+    app.router.add_post("/hook", endpoint.handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def _dropped(dispatcher: str, reason: str) -> float:
+    return REGISTRY.get_sample_value("eig_webhook_dropped_total", {"dispatcher": dispatcher, "reason": reason}) or 0.0
+
+
+def _overflowed(dispatcher: str, policy: str) -> float:
+    return REGISTRY.get_sample_value("eig_action_overflow_total", {"dispatcher": dispatcher, "policy": policy}) or 0.0
+
+
+def _action(i: int) -> Action:
+    return Action(dispatcher="scada", payload={"seq": i})
+
+
+@pytest.mark.asyncio
+async def test_batched_webhook_flushes_on_size_and_delay_and_retries_in_background():
+    endpoint = _Endpoint(failures=1)
+    server = await _serve(endpoint)
+    options = {
+        "url": str(server.make_url("/hook")),
+        "batch": {"max_batch": 3, "max_delay_ms": 50},
+        "retry_backoff_ms": 10,
+    }
+    dispatcher = WebhookDispatcher("scada", options)
+    try:
+        for i in range(7):
+            await dispatcher.dispatch(_action(i), agent="guard", pipeline="door")
+        assert endpoint.attempts == 0  # dispatch only buffers
+        await asyncio.sleep(0.3)
+        received = sorted((r["seq"] for batch in endpoint.batches for r in batch))
+        assert received == list(range(7))
+        assert sorted(len(b) for b in endpoint.batches) == [1, 3, 3]
+        assert endpoint.attempts == 4  # the first post got a 503 and was retried
+        assert endpoint.batches[0][0] == {"agent": "guard", "pipeline": "door", "seq": endpoint.batches[0][0]["seq"]}
+    finally:
+        await dispatcher.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_batched_webhook_array_format_drops_on_overflow_and_rejection():
+    endpoint = _Endpoint(failures=1, status=400)
+    server = await _serve(endpoint)
+    options = {
+        "url": str(server.make_url("/hook")),
+        "batch": {"max_batch": 10, "max_delay_ms": 1000, "format": "array"},
+        "max_pending": 4,
+    }
+    dispatcher = WebhookDispatcher("plc", options)
+    overflow, rejected = _dropped("plc", "overflow"), _dropped("plc", "rejected")
+    try:
+        for i in range(6):
+            await dispatcher.dispatch(_action(i), agent="guard", pipeline="door")
+        assert _dropped("plc", "overflow") - overflow == 2
+        await dispatcher.close()  # delivers the buffer without waiting for max_delay_ms
+        assert endpoint.attempts == 1 and _dropped("plc", "rejected") - rejected == 4  # 4xx is not retried
+        await dispatcher.dispatch(_action(6), agent="guard", pipeline="door")
+        await dispatcher.close()
+        assert endpoint.batches == [[{"agent": "guard", "pipeline": "door", "seq": 6}]]
+    finally:
+        await dispatcher.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["ndjson", "array"])
+async def test_batched_webhook_drops_only_unencodable_actions(fmt):
+    endpoint = _Endpoint()
+    server = await _serve(endpoint)
+    options = {"url": str(server.make_url("/hook")), "batch": {"max_batch": 10, "max_delay_ms": 1000, "format": fmt}}
+    name = f"mes-{fmt}"
+    dispatcher = WebhookDispatcher(name, options)
+    encode = _dropped(name, "encode")
+    try:
+        for i in range(3):
+            await dispatcher.dispatch(_action(i), agent="guard", pipeline="door")
+        unencodable = Action(dispatcher=name, payload={"seq": 3, "raw": b"\x00"})
+        await dispatcher.dispatch(unencodable, agent="guard", pipeline="door")
+        await dispatcher.close()
+        assert [r["seq"] for batch in endpoint.batches for r in batch] == [0, 1, 2]
+        assert _dropped(name, "encode") - encode == 1
+    finally:
+        await dispatcher.close()
+        await server.close()
+
+
+class _SlowDispatcher(BaseDispatcher):
+    def __init__(self, name: str, delay: float = 0.05):
+        super().__init__(name, {})
+        self.delay = delay
+        self.delivered = []
+
+    async def dispatch(self, action, *, agent, pipeline):
+        await asyncio.sleep(self.delay)
+        if action.payload.get("boom"):
+            raise RuntimeError("transport down")
+        self.delivered.append(action.payload["seq"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, expected",
+    [("drop_oldest", [3, 4]), ("drop_new", [0, 1]), ("block", [0, 1, 2, 3, 4])],
+)
+async def test_outbox_returns_before_delivery_and_applies_overflow_policy(policy, expected):
+    dispatcher = _SlowDispatcher(f"slow-{policy}")
+    outbox = Outbox(dispatcher, OutboxConfig(max_queue=2, overflow=policy))
+    overflowed = _overflowed(dispatcher.name, policy)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await outbox.put(Action(dispatcher="slow", payload={"boom": True}), agent="a", pipeline="p")
+    await asyncio.sleep(0)  # the consumer takes the failing action and starts delivering it
+    for i in range(5):
+        await outbox.put(_action(i), agent="a", pipeline="p")
+    elapsed = loop.time() - start
+    if policy == "block":
+        assert elapsed >= 0.05  # waited for room instead of dropping
+    else:
+        assert elapsed < 0.04 and dispatcher.delivered == []
+    await outbox.close()
+    assert dispatcher.delivered == expected
+    assert _overflowed(dispatcher.name, policy) - overflowed == 3
+    assert REGISTRY.get_sample_value("eig_action_failed_total", {"dispatcher": dispatcher.name}) == 1
+    assert REGISTRY.get_sample_value("eig_action_queue_depth", {"dispatcher": dispatcher.name}) == 0
+
+
+@pytest.mark.asyncio
+async def test_suppressor_debounces_per_key_and_coalesces_bursts(monkeypatch):
+    sent = []
+
+    async def _dispatch(action, *, agent, pipeline):
+        sent.append((agent, pipeline, action.payload))
+
+    monkeypatch.setattr("orchestrator.agents.suppression.dispatcher.dispatch", _dispatch)
+    suppressor = ActionSuppressor("guard", {"min_interval_ms": 200, "key": "zone", "coalesce": True})
+    burst = [Action(dispatcher="mqtt", target="door", payload={"zone": "a", "frame": i}) for i in range(5)]
+    burst.append(Action(dispatcher="mqtt", target="door", payload={"zone": "b", "frame": 9}))
+    passed = suppressor.filter(burst, pipeline="door")
+    assert [a.payload["frame"] for a in passed] == [0, 9]
+    assert REGISTRY.get_sample_value("eig_actions_suppressed_total", {"agent": "guard", "reason": "interval"}) == 4
+    await asyncio.sleep(0.25)
+    assert sent == [("guard", "door", {"zone": "a", "frame": 4, "coalesced": 4})]
+    # the summary opened a new interval for zone a
+    assert suppressor.filter([burst[0]], pipeline="door") == []
+    await suppressor.flush()
+    assert sent[-1][2] == {"zone": "a", "frame": 0, "coalesced": 1}
+
+
+@pytest.mark.asyncio
+async def test_suppressor_sends_held_summary_when_its_key_is_evicted(monkeypatch):
+    sent = []
+
+    async def _dispatch(action, *, agent, pipeline):
+        sent.append((pipeline, action.payload))
+
+    monkeypatch.setattr("orchestrator.agents.suppression.dispatcher.dispatch", _dispatch)
+    suppressor = ActionSuppressor("lru", {"min_interval_ms": 10_000, "key": "zone", "coalesce": True, "max_keys": 2})
+
+    def zone(z, i):
+        return Action(dispatcher="mqtt", target="door", payload={"zone": z, "frame": i})
+
+    assert len(suppressor.filter([zone("a", 0), zone("a", 1), zone("a", 2)], pipeline="door")) == 1
+    suppressor.filter([zone("b", 3)], pipeline="door")
+    assert sent == []
+    suppressor.filter([zone("c", 4)], pipeline="door")  # over capacity: zone a is evicted
+    await asyncio.sleep(0)
+    assert sent == [("door", {"zone": "a", "frame": 2, "coalesced": 2})]
+    await suppressor.flush()
+    assert len(sent) == 1 and len(suppressor._states) == 2
+
+
+def test_suppressor_emits_on_change_only():
+    suppressor = ActionSuppressor("relay", {"on_change": ["state"]})
+    states = ["on", "on", "off", "off", "on"]
+    actions = [Action(dispatcher="mqtt", target="relay", payload={"state": s, "seq": i}) for i, s in enumerate(states)]
+    passed = [a for action in actions for a in suppressor.filter([action], pipeline="p")]
+    assert [a.payload["seq"] for a in passed] == [0, 2, 4]
+    assert REGISTRY.get_sample_value("eig_actions_suppressed_total", {"agent": "relay", "reason": "unchanged"}) == 2
+    with pytest.raises(ValueError):
+        ActionSuppressor("bad", {"coalesce": True})
@@ -0,0 +1,95 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Connector tests that run against local sources."""
+from __future__ import annotations
+
+import gc
+
+import cv2
+import numpy as np
+import pytest
+
+from orchestrator.buffers import FramePool
+from orchestrator.connectors.camera import CameraConnector
+from orchestrator.connectors.routing import TopicRouter
+
+
+def _reference_match(filters, topic):
+    """The original linear scan over filters, re-splitting pattern and topic each time."""
+    for idx, pattern in enumerate(filters):
+        if pattern == topic:
+            return idx
+        pattern_parts = pattern.split("/")
+        topic_parts = topic.split("/")
+        if "#" in pattern_parts:
+            pos = pattern_parts.index("#")
+            if pos != len(pattern_parts) - 1:
+                continue
+            pattern_parts = pattern_parts[:pos]
+            topic_parts = topic_parts[: len(pattern_parts)]
+        if len(pattern_parts) != len(topic_parts):
+            continue
+        if all(pp in {"+", "#"} or pp == tp for pp, tp in zip(pattern_parts, topic_parts)):
+            return idx
+    return None
+
+
+def test_frame_pool_recycles_slots_after_views_are_dropped():
+    pool = FramePool((4, 4, 3), size=2)
+    a, b = pool.acquire(), pool.acquire()
+    assert pool.acquire() is None
+    view = memoryview(a[1:].reshape(-1))
+    del a
+    gc.collect()
+    assert pool.available == 0  # the derived view still pins the slot
+    del view
+    assert pool.available == 1
+    c = pool.acquire()
+    c[...] = 7
+    assert not b.any()
+
+
+@pytest.mark.asyncio
+async def test_camera_connector_reads_video_file_until_eof(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    levels = [20, 60, 100, 140, 180]
+    for level in levels:
+        writer.write(np.full((48, 64, 3), level, dtype=np.uint8))
+    writer.release()
+
+    connector = CameraConnector(
+        "cam",
+        {"source": path, "interval": 0.0, "buffers": 8, "max_pending": 8, "pipeline": "vision", "conflate": "latest"},
+        on_message=None,
+    )
+    messages = [msg async for msg in connector.iter_messages()]
+    assert len(messages) == len(levels)
+    for msg, level in zip(messages, levels):
+        frame = np.frombuffer(msg.payload, dtype=np.uint8).reshape(msg.metadata["shape"])
+        assert frame.shape == (48, 64, 3)
+        assert abs(float(frame.mean()) - level) < 3
+        assert msg.pipeline_override == "vision"
+        assert msg.metadata["conflate"] == "latest"
+
+
+def test_topic_router_matches_first_route_like_linear_scan():
+    rng = np.random.default_rng(3)
+    words = ["sensors", "floor1", "floor2", "cam", "env", "+", "#"]
+    filters = ["/".join(rng.choice(words, rng.integers(1, 5))) for _ in range(300)]
+    filters += ["sensors/a/#/b", "#"]
+    router = TopicRouter(filters, list(range(len(filters))))
+    levels = ["sensors", "floor1", "floor2", "cam", "env", "x", ""]
+    topics = ["/".join(rng.choice(levels, rng.integers(1, 6))) for _ in range(2000)]
+    topics += ["sensors/a/#/b", "sensors"]
+    for topic in topics:
+        assert router.match(topic) == _reference_match(filters, topic), topic
+
+
+def test_topic_router_caches_hot_topics_and_misses():
+    router = TopicRouter(["sensors/+/env", "sensors/floor1/#"], ["env", "floor1"], cache_size=2)
+    assert router.match("sensors/floor1/env") == "env"
+    assert router.match("sensors/floor1/cam") == "floor1"
+    assert router.match("other/topic") is None
+    assert router.match("other/topic") is None
+    info = router.match.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 3, 2)
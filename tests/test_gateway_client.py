@@ -0,0 +1,205 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Wire-level tests for the Python gateway clients against the stub gateway."""
+from __future__ import annotations
+
+import asyncio
+import struct
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from clients.python.gateway_async import AsyncGatewayStream
+from clients.python.gateway_stream import GatewayStream, _encode_frame, _pack_frame
+from orchestrator.gateway_pool import GatewayPool
+from tools.stub_gateway import StubGateway
+
+
+def test_encode_frame_references_contiguous_tensors():
+    x = np.arange(2 * 3 * 4, dtype=np.float16).reshape(2, 3, 4)
+    bufs = _encode_frame("m", [x])
+    assert isinstance(bufs[1], memoryview)
+    assert np.shares_memory(np.frombuffer(bufs[1], dtype=np.float16), x)
+    (flen,) = struct.unpack_from("<I", bufs[0])
+    assert flen == sum(len(memoryview(b).cast("B")) for b in bufs) - 4
+
+
+def test_encode_frame_non_contiguous_matches_contiguous():
+    x = np.random.rand(1, 8, 8, 3).astype(np.float32)
+    strided = x.transpose(0, 3, 1, 2)
+    assert not strided.flags.c_contiguous
+    assert _pack_frame("m", [strided]) == _pack_frame("m", [np.ascontiguousarray(strided)])
+
+
+@pytest.mark.asyncio
+async def test_gateway_stream_roundtrip_large_tensor():
+    gateway = StubGateway({"m": np.asarray([1.0, 2.0], dtype=np.float32)})
+    await gateway.start()
+    stream = await asyncio.to_thread(GatewayStream, "127.0.0.1", gateway.port, 2.0)
+    try:
+        x = np.random.rand(1, 3, 640, 640).astype(np.float16)
+        for _ in range(2):
+            status, outs = await asyncio.to_thread(stream.infer, "m", [x, x[:, :1]])
+            assert status == 0
+            assert np.frombuffer(outs[0], dtype=np.float32).tolist() == [1.0, 2.0]
+    finally:
+        stream.close()
+        await gateway.stop()
+
+
+@pytest.mark.asyncio
+async def test_request_leases_and_recycles_receive_buffers():
+    gateway = StubGateway({"m": np.arange(1024, dtype=np.float32)})
+    await gateway.start()
+    stream = await asyncio.to_thread(GatewayStream, "127.0.0.1", gateway.port, 2.0)
+    x = np.zeros((1, 4), dtype=np.float32)
+    try:
+        first = await asyncio.to_thread(stream.request, "m", [x])
+        held = await asyncio.to_thread(stream.request, "m", [x])
+        assert held.outputs[0].obj is not first.outputs[0].obj
+        buf = first.outputs[0].obj
+        first.release()
+        assert first.outputs == ()
+        reused = await asyncio.to_thread(stream.request, "m", [x])
+        assert reused.outputs[0].obj is buf
+        assert np.array_equal(np.frombuffer(held.outputs[0], dtype=np.float32), np.arange(1024))
+    finally:
+        stream.close()
+        await gateway.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transport", GatewayPool.TRANSPORTS)
+async def test_gateway_pool_transports(transport):
+    gateway = StubGateway({"m": np.asarray([0.5, 0.25], dtype=np.float32)})
+    await gateway.start()
+    pool = GatewayPool("127.0.0.1", gateway.port, pool_size=2, timeout=2.0, transport=transport)
+    try:
+        x = np.ones((1, 3, 32, 32), dtype=np.float16)
+        results = await asyncio.gather(*(pool.infer("m", [x]) for _ in range(8)))
+        for result in results:
+            assert result.status == 0
+            assert np.frombuffer(result.outputs[0], dtype=np.float32).tolist() == [0.5, 0.25]
+            result.release()
+    finally:
+        await pool.close()
+        await gateway.stop()
+
+
+class _ScriptedStream:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.inflight = 0
+
+    async def request(self, model_id, arrays):
+        if self.fail:
+            raise ConnectionError("gateway restarted")
+        return SimpleNamespace(status=0, outputs=[])
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_gateway_pool_reconnects_lost_slots_with_backoff():
+    outcomes = [_ScriptedStream(fail=True), _ScriptedStream(), OSError("connection refused"), _ScriptedStream()]
+
+    async def connect():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    pool = GatewayPool("127.0.0.1", 1, pool_size=2)
+    pool._connect = connect
+    x = np.zeros((1, 4), dtype=np.float32)
+    with pytest.raises(ConnectionError):
+        await pool.infer("m", [x])  # the broken socket is dropped and its reconnect is refused
+    assert len(pool._streams) == 1
+    assert (await pool.infer("m", [x])).status == 0
+    assert len(pool._streams) == 1 and len(outcomes) == 1  # backing off: no reconnect attempt yet
+    pool._retry_at = 0.0
+    await pool.infer("m", [x])
+    assert len(pool._streams) == 2 and not outcomes  # the slot came back on a later request
+
+
+@pytest.mark.asyncio
+async def test_async_stream_fails_pending_request_when_gateway_dies():
+    async def handle(reader, writer):
+        await reader.readexactly(4)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    stream = await AsyncGatewayStream.connect("127.0.0.1", port, timeout=2.0)
+    try:
+        with pytest.raises(ConnectionError):
+            await stream.request("m", [np.zeros((1, 4), dtype=np.float32)])
+        assert stream.closed
+    finally:
+        await stream.close()
+        server.close()
+        await server.wait_closed()
+
+
+async def _batching_server(expect: int, reply: bool = True):
+    """Gateway stand-in that reads `expect` frames before answering them in order."""
+
+    async def handle(reader, writer):
+        for _ in range(expect):
+            (flen,) = struct.unpack("<I", await reader.readexactly(4))
+            await reader.readexactly(flen)
+        if reply:
+            for idx in range(expect):
+                blob = np.asarray([idx], dtype=np.float32).tobytes()
+                body = struct.pack("<IIII", 0, 0, 1, len(blob)) + blob
+                writer.write(struct.pack("<I", len(body)) + body)
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_async_stream_pipelines_requests_in_order():
+    server, port = await _batching_server(expect=3)
+    stream = await AsyncGatewayStream.connect("127.0.0.1", port, timeout=2.0, max_inflight=3)
+    try:
+        x = np.zeros((1, 4), dtype=np.float32)
+        responses = await asyncio.gather(*(stream.request("m", [x]) for _ in range(3)))
+        assert [np.frombuffer(r.outputs[0], dtype=np.float32)[0] for r in responses] == [0, 1, 2]
+    finally:
+        await stream.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_async_stream_fails_every_pending_request():
+    server, port = await _batching_server(expect=2, reply=False)
+    stream = await AsyncGatewayStream.connect("127.0.0.1", port, timeout=2.0, max_inflight=4)
+    try:
+        x = np.zeros((1, 4), dtype=np.float32)
+        results = await asyncio.gather(*(stream.request("m", [x]) for _ in range(2)), return_exceptions=True)
+        assert all(isinstance(r, ConnectionError) for r in results)
+        with pytest.raises(ConnectionError):
+            await stream.request("m", [x])
+    finally:
+        await stream.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_gateway_pool_pipelines_over_one_connection():
+    server, port = await _batching_server(expect=4)
+    pool = GatewayPool("127.0.0.1", port, pool_size=1, timeout=2.0, pipeline_depth=4)
+    try:
+        x = np.zeros((1, 4), dtype=np.float32)
+        results = await asyncio.gather(*(pool.infer("m", [x]) for _ in range(4)))
+        assert sorted(np.frombuffer(r.outputs[0], dtype=np.float32)[0] for r in results) == [0, 1, 2, 3]
+    finally:
+        await pool.close()
+        server.close()
+        await server.wait_closed()
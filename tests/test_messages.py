@@ -0,0 +1,62 @@
+# SPDX-License-Identifier: Apache-2.0
+"""EdgeMessage envelope behaviour relied on by connectors, executors and agents."""
+from __future__ import annotations
+
+import pickle
+from datetime import datetime, timedelta, timezone
+
+from orchestrator.messages import EdgeMessage
+
+
+def test_metadata_and_timestamp_are_created_on_demand():
+    message = EdgeMessage("s", b"x", "raw")
+    assert message._metadata is None and message._timestamp is None
+    message.metadata["k"] = 1
+    assert message.metadata == {"k": 1}
+    assert abs((datetime.now(timezone.utc) - message.timestamp).total_seconds()) < 1
+    assert message.timestamp is message.timestamp  # derived once, then kept
+
+
+def test_explicit_timestamp_backdates_ingest_time():
+    message = EdgeMessage("s", b"", "raw", timestamp=datetime.now(timezone.utc) - timedelta(seconds=2))
+    assert 1990 < message.age_ms() < 2500
+    message.timestamp = datetime.now(timezone.utc)
+    assert message.age_ms() < 100
+
+
+def test_with_pipeline_copies_metadata_on_write_into_a_plain_dict():
+    original = EdgeMessage("s", b"x", "json", metadata={"topic": "a/b"})
+    routed = original.with_pipeline("p2")
+    assert routed._metadata is original._metadata  # shared until first access
+    assert routed.pipeline_override == "p2" and routed.ingest_ns == original.ingest_ns
+    assert routed.metadata["topic"] == "a/b"
+    routed.metadata["letterbox"] = (1.0, 0, 0)
+    routed.metadata["topic"] = "rewritten"
+    assert original.metadata == {"topic": "a/b"}
+    untouched = original.with_pipeline("p3")
+    original.metadata["seen"] = True  # writes on the original never reach a copy either
+    assert untouched.metadata == {"topic": "a/b"}
+    assert type(routed.metadata) is dict
+    assert routed.metadata == {"topic": "rewritten", "letterbox": (1.0, 0, 0)}
+    assert EdgeMessage("s", b"", "raw").with_pipeline("p")._metadata is None
+
+
+def test_messages_compare_by_value():
+    stamp = datetime.now(timezone.utc)
+    message = EdgeMessage("s", b"x", "raw", timestamp=stamp, metadata={"k": 1})
+    assert message == EdgeMessage("s", b"x", "raw", timestamp=stamp, metadata={"k": 1})
+    assert message != EdgeMessage("s", b"x", "raw", timestamp=stamp, metadata={"k": 2})
+    assert message != EdgeMessage("s", b"y", "raw", timestamp=stamp, metadata={"k": 1})
+    assert message.with_pipeline("p") != message
+    assert message.with_pipeline("p") == message.with_pipeline("p")
+    lazy = EdgeMessage("s", b"", "raw")
+    assert lazy == EdgeMessage("s", b"", "raw", ingest_ns=lazy.ingest_ns)
+    assert lazy == EdgeMessage("s", b"", "raw", metadata={}, ingest_ns=lazy.ingest_ns)  # unset metadata is empty
+    assert message.__hash__ is None
+
+
+def test_messages_pickle_for_process_executors():
+    message = EdgeMessage("s", b"x", "raw", metadata={"shape": (2, 2)}, pipeline_override="p")
+    clone = pickle.loads(pickle.dumps(message))
+    assert (clone.sensor_id, clone.payload, clone.pipeline_override) == ("s", b"x", "p")
+    assert clone.ingest_ns == message.ingest_ns and clone.metadata == {"shape": (2, 2)}
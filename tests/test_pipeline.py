@@ -0,0 +1,271 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Pipeline-level tests that run against an in-process fake gateway."""
+from __future__ import annotations
+
+import asyncio
+import gc
+import time
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+from orchestrator import executors
+from orchestrator.actions.base import Action
+from orchestrator.agents.base import Agent
+from orchestrator.batching import MicroBatcher
+from orchestrator.buffers import FramePool
+from orchestrator.config import BatchConfig, CacheConfig, GateConfig, PipelineConfig
+from orchestrator.gateway_pool import InferenceResult
+from orchestrator.messages import EdgeMessage
+from orchestrator.pipeline import Pipeline
+from orchestrator.result_cache import ResultCache
+from tests.conftest import CaptureAgent
+
+
+class EchoGateway:
+    """Returns each request's first input doubled, recording every call."""
+
+    def __init__(self):
+        self.calls = []
+        self.released = 0
+
+    async def infer(self, model_id, arrays):
+        arrays = list(arrays)
+        self.calls.append(arrays)
+        out = (arrays[0] * 2).astype(np.float32)
+        gateway = self
+
+        class _Lease:
+            def release(self):
+                gateway.released += 1
+
+        return InferenceResult(status=0, outputs=[memoryview(out.tobytes())], lease=_Lease())
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_stacks_and_splits_concurrent_requests():
+    gateway = EchoGateway()
+    batcher = MicroBatcher(gateway, "m", BatchConfig(max_batch=3, max_delay_ms=1000), pipeline="p")
+    inputs = [np.full((1, 4), i, dtype=np.float32) for i in range(3)]
+    results = await asyncio.gather(*(batcher.infer([x]) for x in inputs))
+    assert len(gateway.calls) == 1
+    assert gateway.calls[0][0].shape == (3, 4)
+    for i, result in enumerate(results):
+        assert np.frombuffer(result.outputs[0], dtype=np.float32).tolist() == [2.0 * i] * 4
+    for result in results[:-1]:
+        result.release()
+    assert gateway.released == 0
+    results[-1].release()
+    assert gateway.released == 1
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_flushes_partial_batch_after_delay():
+    gateway = EchoGateway()
+    batcher = MicroBatcher(gateway, "m", BatchConfig(max_batch=8, max_delay_ms=5), pipeline="p")
+    a, b = await asyncio.gather(
+        batcher.infer([np.ones((1, 2), dtype=np.float32)]),
+        batcher.infer([np.ones((1, 3), dtype=np.float32)]),
+    )
+    assert len(gateway.calls) == 2  # different shapes never share a batch
+    assert np.frombuffer(b.outputs[0], dtype=np.float32).tolist() == [2.0, 2.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_cancelled_batch_cancels_its_waiters():
+    class StuckGateway:
+        async def infer(self, model_id, arrays):
+            await asyncio.Event().wait()
+
+    batcher = MicroBatcher(StuckGateway(), "m", BatchConfig(max_batch=2, max_delay_ms=1000), pipeline="p")
+    waiters = [asyncio.ensure_future(batcher.infer([np.ones((1, 2), dtype=np.float32)])) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    (task,) = batcher._tasks
+    task.cancel()
+    results = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), 1.0)
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    await asyncio.sleep(0)
+    assert not batcher._tasks
+
+
+def _frame_to_tensor(message, payload):
+    frame = np.frombuffer(payload, dtype=np.uint8).reshape(message.metadata["shape"])
+    message.metadata["image_hw"] = frame.shape[:2]
+    return [frame.astype(np.float32)[None]]
+
+
+def _sum_outputs(result, message):
+    return {"sum": float(np.frombuffer(result.outputs[0], dtype=np.float32).sum()), "hw": message.metadata["image_hw"]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["loop", "thread", "process"])
+async def test_pipeline_stages_run_in_configured_executor(mode):
+    pool = FramePool((4, 6, 3), size=1)
+    frame = pool.acquire()
+    frame[...] = 3
+    message = EdgeMessage(sensor_id="cam", payload=frame.data, encoding="bgr", metadata={"shape": frame.shape})
+    del frame
+    agent = CaptureAgent("capture")
+    cfg = PipelineConfig(id="p", preprocess="x", model="m", executor={"preprocess": mode, "postprocess": mode})
+    pipeline = Pipeline(cfg=cfg, preprocess_fn=_frame_to_tensor, postprocess_fn=_sum_outputs, agents=[agent])
+    gateway = EchoGateway()
+    try:
+        await pipeline.run(message, gateway)
+    finally:
+        executors.shutdown()
+    assert gateway.calls[0][0].shape == (1, 4, 6, 3)
+    assert gateway.released == 1
+    assert agent.events[0]["payload"] == {"sum": 6.0 * 72, "hw": (4, 6)}
+    assert message.metadata["image_hw"] == (4, 6)
+    del message, gateway, agent, pipeline
+    gc.collect()
+    assert pool.available == 1  # no stage kept a reference to the capture buffer
+
+
+def _vector(message, payload):
+    return [np.asarray(payload["values"], dtype=np.float32)[None]]
+
+
+def _sum_outputs_plain(result, message):
+    return float(np.frombuffer(result.outputs[0], dtype=np.float32).sum())
+
+
+@pytest.mark.asyncio
+async def test_result_cache_skips_gateway_for_repeated_inputs():
+    agent = CaptureAgent("capture")
+    cfg = PipelineConfig(id="p", preprocess="x", model="m", cache=CacheConfig(max_entries=2))
+    pipeline = Pipeline(cfg=cfg, preprocess_fn=_vector, postprocess_fn=_sum_outputs_plain, agents=[agent])
+    gateway = EchoGateway()
+    for values in ([1, 2], [1, 2], [3, 4], [5, 6], [1, 2]):
+        message = EdgeMessage(sensor_id="s", payload=b'{"values": %s}' % str(values).encode(), encoding="json")
+        await pipeline.run(message, gateway)
+    # [1, 2] is evicted by the two newer entries before it repeats
+    assert [c[0].tolist() for c in gateway.calls] == [[[1, 2]], [[3, 4]], [[5, 6]], [[1, 2]]]
+    assert [e["payload"] for e in agent.events] == [6.0, 6.0, 14.0, 22.0, 6.0]
+    assert gateway.released == 4  # every gateway lease is released once the outputs are copied
+
+
+def test_result_cache_honours_ttl_byte_limit_and_key_shape(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("orchestrator.result_cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(CacheConfig(max_entries=10, max_bytes=16, ttl_s=1.0), pipeline="p")
+    a = np.zeros((2, 2), dtype=np.float32)
+    assert ResultCache.key("m", [a]) != ResultCache.key("m", [a.reshape(4)])
+    assert ResultCache.key("m", [a]) != ResultCache.key("n", [a])
+    key = ResultCache.key("m", [a])
+    cache.put(key, InferenceResult(status=0, outputs=[memoryview(bytes(8))]))
+    cache.put(b"big", InferenceResult(status=0, outputs=[memoryview(bytes(17))]))
+    cache.put(b"failed", InferenceResult(status=3, outputs=[]))
+    assert len(cache) == 1
+    assert bytes(cache.get(key).outputs[0]) == bytes(8)
+    cache.put(b"other", InferenceResult(status=0, outputs=[memoryview(bytes(12))]))
+    assert cache.get(key) is None  # evicted to stay within max_bytes
+    now[0] += 1.0
+    assert cache.get(b"other") is None  # expired
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def _frame(message, payload):
+    return [np.full((1, 3, 64, 64), message.metadata["level"], dtype=np.float16)]
+
+
+@pytest.mark.asyncio
+async def test_change_gate_reuses_result_until_input_changes_or_goes_stale(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("orchestrator.gating.time.monotonic", lambda: now[0])
+    agent = CaptureAgent("capture")
+    gate = GateConfig(threshold=0.05, size=16, max_stale_ms=1000)
+    cfg = PipelineConfig(id="p", preprocess="x", model="m", gate=gate)
+    pipeline = Pipeline(cfg=cfg, preprocess_fn=_frame, postprocess_fn=_sum_outputs_plain, agents=[agent])
+    gateway = EchoGateway()
+    for sensor, level, at in [("a", 0.5, 0.0), ("a", 0.52, 0.1), ("b", 0.52, 0.2), ("a", 0.6, 0.3), ("a", 0.6, 1.5)]:
+        now[0] = at
+        await pipeline.run(EdgeMessage(sensor_id=sensor, payload=b"", encoding="raw", metadata={"level": level}), gateway)
+    # second frame is within the threshold; sensor b has no history; the last one is stale
+    assert len(gateway.calls) == 4
+    assert agent.events[1]["payload"] is agent.events[0]["payload"]
+
+
+def _noop(message, payload):
+    return []
+
+
+class _SleepyAgent(Agent):
+    def __init__(self, name: str, delay: float, log: list, **kwargs):
+        super().__init__(name, **kwargs)
+        self.delay = delay
+        self.log = log
+        self.active = self.peak = 0
+
+    async def handle(self, *, message, payload, latency_ms):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        self.log.append(self.name)
+        return [Action(dispatcher="none", payload={"agent": self.name})]
+
+
+@pytest.mark.asyncio
+async def test_agents_run_concurrently_with_timeouts_or_in_order_when_sequential(monkeypatch):
+    dispatched = []
+
+    async def _dispatch(action, *, agent, pipeline):
+        dispatched.append(agent)
+
+    monkeypatch.setattr("orchestrator.pipeline.dispatcher.dispatch", _dispatch)
+    order = []
+    slow = _SleepyAgent("slow", 0.06, order)
+    fast = _SleepyAgent("fast", 0.0, order)
+    stuck = _SleepyAgent("stuck", 5.0, order, timeout_ms=30)
+    message = EdgeMessage(sensor_id="s", payload=b"", encoding="raw")
+    cfg = PipelineConfig(id="agents", preprocess="x")
+    pipeline = Pipeline(cfg=cfg, preprocess_fn=_noop, postprocess_fn=None, agents=[slow, fast, stuck])
+    timeouts = REGISTRY.get_sample_value("eig_agent_timeouts_total", {"pipeline": "agents", "agent": "stuck"}) or 0.0
+    start = time.perf_counter()
+    await pipeline.run(message, EchoGateway())
+    assert time.perf_counter() - start < 0.09  # max(slow, stuck timeout), not their sum
+    assert order == ["fast", "slow"] and sorted(dispatched) == ["fast", "slow"]
+    assert REGISTRY.get_sample_value("eig_agent_timeouts_total", {"pipeline": "agents", "agent": "stuck"}) == timeouts + 1
+
+    order.clear()
+    cfg = PipelineConfig(id="ordered", preprocess="x", agent_mode="sequential")
+    await Pipeline(cfg=cfg, preprocess_fn=_noop, postprocess_fn=None, agents=[slow, fast]).run(message, EchoGateway())
+    assert order == ["slow", "fast"]
+
+    limited = _SleepyAgent("limited", 0.01, order, max_concurrency=1)
+    cfg = PipelineConfig(id="limited", preprocess="x")
+    pipeline = Pipeline(cfg=cfg, preprocess_fn=_noop, postprocess_fn=None, agents=[limited])
+    await asyncio.gather(*(pipeline.run(message, EchoGateway()) for _ in range(4)))
+    assert limited.peak == 1
+
+
+class _RaisingAgent(Agent):
+    async def handle(self, *, message, payload, latency_ms):
+        raise TimeoutError("upstream HTTP call timed out")
+
+
+@pytest.mark.asyncio
+async def test_agent_errors_and_dispatch_failures_stay_with_their_agent(monkeypatch):
+    dispatched = []
+
+    async def _dispatch(action, *, agent, pipeline):
+        if action.payload["agent"] == "slow":
+            raise ConnectionError("inline dispatcher down")
+        dispatched.append(agent)
+
+    monkeypatch.setattr("orchestrator.pipeline.dispatcher.dispatch", _dispatch)
+    order = []
+    agents = [_RaisingAgent("raises"), _RaisingAgent("raises-budget", timeout_ms=1000)]
+    agents += [_SleepyAgent("slow", 0.01, order), _SleepyAgent("fast", 0.0, order)]
+    cfg = PipelineConfig(id="errors", preprocess="x")
+    pipeline = Pipeline(cfg=cfg, preprocess_fn=_noop, postprocess_fn=None, agents=agents)
+    await pipeline.run(EdgeMessage(sensor_id="s", payload=b"", encoding="raw"), EchoGateway())
+    assert dispatched == ["fast"] and sorted(order) == ["fast", "slow"]
+    # the agents' own TimeoutErrors are failures, not timeouts of their budget
+    for name in ("raises", "raises-budget"):
+        assert not REGISTRY.get_sample_value("eig_agent_timeouts_total", {"pipeline": "errors", "agent": name})
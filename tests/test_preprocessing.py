@@ -0,0 +1,136 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Fused preprocessing against each model's classic chain and models.yaml specs, and sensor feature schemas."""
+from __future__ import annotations
+
+import pickle
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from orchestrator.config import PipelineConfig, load_config
+from orchestrator.messages import EdgeMessage
+from orchestrator.pipeline import PipelineFactory
+from orchestrator.preprocessing import FusedPreprocessor, InputSpec, load_model_specs
+
+MODELS_YAML = Path(__file__).resolve().parent.parent / "config" / "models.yaml"
+
+
+def _letterbox(img, size, dtype):
+    # YOLOv5: letterbox with 114 grey, RGB scaled to [0, 1]
+    h, w = img.shape[:2]
+    r = min(size / h, size / w)
+    new_unpad = (int(round(w * r)), int(round(h * r)))
+    dw, dh = (size - new_unpad[0]) // 2, (size - new_unpad[1]) // 2
+    img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+    img = cv2.copyMakeBorder(img, dh, dh, dw, dw, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    arr = img[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return arr.astype(dtype)[None], (r, dw, dh, (h, w))
+
+
+def _ssd(img, size, dtype):
+    # clients/python/examples/detect_stream_ssd.py: plain resize, RGB scaled to [0, 1]
+    h, w = img.shape[:2]
+    x = cv2.resize(img, (size, size), interpolation=cv2.INTER_LINEAR)[:, :, ::-1].transpose(2, 0, 1)
+    x = np.ascontiguousarray(x, dtype=np.float32) / 255.0
+    return x.astype(dtype)[None], (min(size / h, size / w), 0, 0, (h, w))
+
+
+def _imagenet(img, size, dtype):
+    # clients/python/examples/classify_image.py: plain resize, ImageNet mean/std
+    h, w = img.shape[:2]
+    x = cv2.resize(img, (size, size), interpolation=cv2.INTER_LINEAR)[:, :, ::-1].astype(np.float32) / 255.0
+    x = (x - np.array([0.485, 0.456, 0.406], dtype=np.float32)) / np.array([0.229, 0.224, 0.225], dtype=np.float32)
+    return x.transpose(2, 0, 1).astype(dtype)[None], (min(size / h, size / w), 0, 0, (h, w))
+
+
+REFERENCES = {
+    "yolov5n_coco": _letterbox,
+    "yolov5s_coco": _letterbox,
+    "ssd_mobilenet_coco": _ssd,
+    "mobilenet_v2_cls": _imagenet,
+}
+
+
+def test_every_model_has_a_reference_chain():
+    assert set(load_model_specs(MODELS_YAML)) == set(REFERENCES)
+
+
+@pytest.mark.parametrize("model", sorted(REFERENCES))
+@pytest.mark.parametrize("hw", [(720, 1280), (480, 640), (224, 224)])
+def test_fused_matches_each_models_classic_chain_bit_for_bit(model, hw):
+    spec = load_model_specs(MODELS_YAML)[model]
+    size = spec.shape[2]
+    img = np.random.default_rng(0).integers(0, 256, (*hw, 3), dtype=np.uint8)
+    fused = FusedPreprocessor(spec)
+    out, params = fused(img)
+    ref, ref_params = REFERENCES[model](img, size, out.dtype)
+    assert out.shape == tuple(spec.shape)
+    assert params == ref_params
+    assert np.array_equal(out[..., : ref.shape[2], : ref.shape[3]], ref)
+    again, _ = fused(img[::-1].copy())  # same geometry reuses the canvas border
+    assert not np.shares_memory(again, out)
+
+
+def test_nhwc_layout_with_mean_std():
+    spec = InputSpec("m", dtype="fp32", layout="NHWC", shape=(1, 4, 4, 3), resize="stretch", mean=(0.5, 0.5, 0.5), std=(0.25, 0.25, 0.25))
+    img = np.zeros((8, 8, 3), dtype=np.uint8)
+    img[..., 2] = 255  # red in BGR
+    out, _ = FusedPreprocessor(spec)(img)
+    assert out.shape == (1, 4, 4, 3)
+    assert np.allclose(out[0, 0, 0], [2.0, -2.0, -2.0])
+
+
+def test_factory_binds_model_spec_to_spec_aware_preprocessors():
+    specs = load_model_specs(MODELS_YAML)
+    cfg = PipelineConfig(id="door", preprocess="vision.bgr_frame_to_tensor", model="ssd_mobilenet_coco")
+    pipeline = PipelineFactory(cfg, specs).build({})
+    frame = np.full((120, 160, 3), 50, dtype=np.uint8)
+    message = EdgeMessage(sensor_id="cam", payload=frame.tobytes(), encoding="bgr", metadata={"shape": frame.shape})
+    (tensor,) = list(pipeline.preprocess_fn(message, message.payload))
+    assert tensor.shape == (1, 3, 300, 300) and tensor.dtype == np.float32
+    assert message.metadata["letterbox"][0] == pytest.approx(300 / 160)
+    with pytest.raises(ValueError):
+        PipelineFactory(cfg).build({})
+
+
+def test_feature_schema_rows_follow_declared_order_with_defaults_and_scaling(tmp_path):
+    path = tmp_path / "pipelines.yaml"
+    path.write_text(
+        """
+version: 1
+gateway: {host: 127.0.0.1, port: 1}
+connectors: []
+pipelines:
+  - id: env
+    preprocess: env.vector_to_tensor
+    features:
+      dtype: fp32
+      fields:
+        - co2_ppm
+        - {name: temperature_c, scale: 0.1, offset: -2}
+        - {name: humidity, default: 50}
+agents: {}
+actions: {}
+"""
+    )
+    cfg = load_config(path).pipelines["env"]
+    pipeline = PipelineFactory(cfg).build({})
+    message = EdgeMessage(sensor_id="node", payload=b"", encoding="json")
+    reading = {"humidity": 41.0, "temperature_c": 25.0, "co2_ppm": 812, "node": "n7", "rssi": -67}
+    (row,) = pipeline.preprocess_fn(message, reading)
+    assert row.dtype == np.float32 and row.tolist() == [[812.0, 0.5, 41.0]]
+    (first,) = pipeline.preprocess_fn(message, reading)
+    (row,) = pipeline.preprocess_fn(message, {"co2_ppm": 400, "temperature_c": 20})
+    assert row.tolist() == [[400.0, 0.0, 50.0]]  # missing humidity takes its default
+    assert first.tolist() == [[812.0, 0.5, 41.0]]  # rows are retained downstream: never reused
+    with pytest.raises(ValueError, match="temperature_c"):
+        list(pipeline.preprocess_fn(message, {"co2_ppm": 400}))
+    readings = [reading, {"co2_ppm": 400, "temperature_c": 20}, reading]
+    (matrix,) = pipeline.preprocess_fn(message, readings)
+    assert matrix.shape == (3, 3)
+    rows = [next(pipeline.preprocess_fn(message, r)) for r in readings]
+    assert np.array_equal(matrix, np.concatenate(rows))
+    restored = pickle.loads(pickle.dumps(pipeline.preprocess_fn))  # process executors ship the bound schema
+    assert np.array_equal(next(restored(message, reading)), rows[0])
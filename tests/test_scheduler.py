@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Ordering and load-shedding behaviour of the per-pipeline scheduler."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from orchestrator.config import PipelineConfig
+from orchestrator.messages import EdgeMessage
+from orchestrator.scheduler import PipelineScheduler
+
+
+def _msg(sensor: str, age_ms: float = 0.0) -> EdgeMessage:
+    ts = datetime.now(timezone.utc) - timedelta(milliseconds=age_ms)
+    return EdgeMessage(sensor_id=sensor, payload=b"", encoding="raw", timestamp=ts)
+
+
+async def _drain(scheduler: PipelineScheduler, n: int):
+    return [await asyncio.wait_for(scheduler.next(), 1.0) for _ in range(n)]
+
+
+@pytest.mark.asyncio
+async def test_earliest_deadline_served_first_across_pipelines():
+    scheduler = PipelineScheduler(
+        [
+            PipelineConfig(id="slow", preprocess="p", deadline_ms=500),
+            PipelineConfig(id="fast", preprocess="p", deadline_ms=50),
+        ]
+    )
+    assert scheduler.offer("slow", _msg("a")) is None
+    assert scheduler.offer("fast", _msg("b")) is None
+    assert scheduler.offer("slow", _msg("c")) is None
+    order = [(pid, m.sensor_id) for pid, m in await _drain(scheduler, 3)]
+    assert order == [("fast", "b"), ("slow", "a"), ("slow", "c")]
+
+
+@pytest.mark.asyncio
+async def test_priority_beats_deadline():
+    scheduler = PipelineScheduler(
+        [
+            PipelineConfig(id="urgent", preprocess="p", deadline_ms=20),
+            PipelineConfig(id="safety", preprocess="p", priority=1),
+        ]
+    )
+    scheduler.offer("urgent", _msg("a"))
+    scheduler.offer("safety", _msg("b"))
+    assert [pid for pid, _ in await _drain(scheduler, 2)] == ["safety", "urgent"]
+
+
+@pytest.mark.asyncio
+async def test_sheds_load_at_enqueue_and_on_expiry():
+    scheduler = PipelineScheduler(
+        [
+            PipelineConfig(id="cam", preprocess="p", deadline_ms=100, max_queue_depth=2),
+            PipelineConfig(id="env", preprocess="p"),
+        ]
+    )
+    scheduler.record_service("cam", 30.0)
+    assert scheduler.offer("cam", _msg("stale", age_ms=80)) == "deadline"
+    assert scheduler.offer("cam", _msg("expiring", age_ms=65)) is None
+    assert scheduler.offer("cam", _msg("fresh")) is None
+    assert scheduler.offer("cam", _msg("overflow")) == "queue_full"
+    assert scheduler.offer("env", _msg("old", age_ms=5000)) is None  # no deadline, never dropped
+    await asyncio.sleep(0.01)
+    items = await _drain(scheduler, 2)
+    # "expiring" ran out of budget while queued; the overdue no-deadline message goes first
+    assert [m.sensor_id for _, m in items] == ["old", "fresh"]
+    assert scheduler.qsize("cam") == 0
+
+
+@pytest.mark.asyncio
+async def test_close_wakes_every_worker():
+    scheduler = PipelineScheduler([PipelineConfig(id="p", preprocess="p")])
+    waiters = [asyncio.create_task(scheduler.next()) for _ in range(3)]
+    await asyncio.sleep(0)
+    scheduler.close()
+    assert await asyncio.wait_for(asyncio.gather(*waiters), 1.0) == [None, None, None]
+
+
+@pytest.mark.asyncio
+async def test_conflate_latest_replaces_queued_frame_per_sensor():
+    scheduler = PipelineScheduler(
+        [PipelineConfig(id="cam", preprocess="p", conflate="latest", max_queue_depth=2)]
+    )
+    for i in range(5):
+        assert scheduler.offer("cam", _msg("front")) is None
+    frames = [_msg("back"), _msg("front")]
+    for msg in frames:
+        assert scheduler.offer("cam", msg) is None
+    assert scheduler.qsize("cam") == 2
+    items = await _drain(scheduler, 2)
+    assert [m for _, m in items] == [frames[1], frames[0]]  # newest front frame kept its queue slot
+    # once a frame has been handed to a worker the next one queues normally
+    assert scheduler.offer("cam", _msg("front")) is None
+    assert scheduler.qsize("cam") == 1
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Payload codec registry and per-message decode caching."""
+from __future__ import annotations
+
+import io
+import json
+
+import numpy as np
+import pytest
+
+from orchestrator import serialization
+from orchestrator.messages import EdgeMessage
+from orchestrator.plugins.env import vector_to_tensor
+from orchestrator.serialization import decode_payload, decode_tensors, encode_tensors
+
+READING = {"co2_ppm": 812, "temperature_c": 22.5, "humidity": 41.0, "node": "floor1-07"}
+
+
+def test_json_and_passthrough_codecs():
+    assert decode_payload(EdgeMessage("s", json.dumps(READING).encode(), "JSON")) == READING
+    assert decode_payload(EdgeMessage("s", memoryview(json.dumps(READING).encode()), "json")) == READING
+    frame = memoryview(bytes(12))
+    assert decode_payload(EdgeMessage("cam", frame, "bgr")) is frame
+
+
+@pytest.mark.parametrize("codec", ["json", "stdlib"])
+def test_json_accepts_what_the_stdlib_accepts(codec, monkeypatch):
+    if codec == "stdlib":
+        monkeypatch.setitem(serialization.CODECS, "json", serialization._json)
+    big = 123456789012345678901234567890
+    nan = decode_payload(EdgeMessage("s", b'{"t": NaN, "h": Infinity}', "json"))
+    assert np.isnan(nan["t"]) and nan["h"] == float("inf")
+    decoded = decode_payload(EdgeMessage("s", memoryview(b'{"seq": [%d, -%d], "v": 1e30}' % (big, big)), "json"))
+    assert decoded == {"seq": [big, -big], "v": 1e30} and type(decoded["seq"][0]) is int
+    with pytest.raises(ValueError):
+        decode_payload(EdgeMessage("s", b'{"t": ', "json"))
+
+
+@pytest.mark.parametrize("codec, module, dumps", [("msgpack", "msgpack", "packb"), ("cbor", "cbor2", "dumps")])
+def test_binary_codecs(codec, module, dumps):
+    lib = pytest.importorskip(module)
+    assert decode_payload(EdgeMessage("s", getattr(lib, dumps)(READING), codec)) == READING
+
+
+def test_payload_is_decoded_once_across_fan_out(monkeypatch):
+    calls = []
+    monkeypatch.setitem(serialization.CODECS, "counted", lambda payload: calls.append(payload) or {"n": len(calls)})
+    message = EdgeMessage("s", b"x", "counted")
+    copies = [message.with_pipeline(p) for p in ("a", "b")]
+    assert [decode_payload(m) for m in [message, *copies, message]] == [{"n": 1}] * 4
+    assert calls == [b"x"]
+
+
+def test_npz_codec_and_missing_optional_package():
+    buf = io.BytesIO()
+    np.savez(buf, x=np.arange(3))
+    assert decode_payload(EdgeMessage("s", buf.getvalue(), "npz"))["x"].tolist() == [0, 1, 2]
+    decode = serialization._unavailable("cbor", "cbor2")
+    with pytest.raises(RuntimeError, match="pip install cbor2"):
+        decode(b"")
+
+
+def test_tensor_payload_round_trip_is_aligned_and_zero_copy():
+    arrays = [np.arange(6, dtype=np.float32).reshape(2, 3), np.array([-1, 2, 3], dtype=">i2"), np.zeros(5, np.uint8)]
+    payload = bytearray(encode_tensors(arrays))
+    decoded = decode_payload(EdgeMessage("s", payload, "tensor"))
+    assert [a.tolist() for a in decoded] == [a.tolist() for a in arrays]
+    base = np.frombuffer(payload, dtype=np.uint8).ctypes.data
+    assert all((a.ctypes.data - base) % 8 == 0 for a in decoded)
+    payload[-1] = 9  # the arrays are views of the received payload, not copies
+    assert decoded[2][-1] == 9
+
+
+def test_multi_tensor_payload_feeds_env_plugin_one_input_per_tensor():
+    arrays = [np.array([1.0, 2.0], dtype=np.float32), np.arange(6, dtype=np.int16).reshape(3, 2)]
+    message = EdgeMessage("s", encode_tensors(arrays), "tensor")
+    inputs = list(vector_to_tensor(message, decode_payload(message)))
+    assert [t.shape for t in inputs] == [(1, 2), (3, 2)]
+    assert all(t.dtype == np.float32 for t in inputs) and inputs[1].tolist() == arrays[1].tolist()
+    with pytest.raises(TypeError, match="mixes tensors"):
+        list(vector_to_tensor(message, [arrays[0], 3.0]))
+
+
+def test_single_tensor_feeds_env_plugin_without_copy():
+    payload = encode_tensors([np.array([812.0, 41.2, 22.5], dtype=np.float32)])
+    message = EdgeMessage("s", payload, "tensor")
+    vector = decode_payload(message)
+    (tensor,) = vector_to_tensor(message, vector)
+    assert tensor.shape == (1, 3) and np.shares_memory(tensor, vector)
+    batched = np.arange(6, dtype=np.float32).reshape(2, 3)
+    (tensor,) = vector_to_tensor(message, decode_payload(EdgeMessage("s", encode_tensors([batched]), "tensor")))
+    assert tensor.shape == (2, 3) and tensor.tolist() == batched.tolist()  # [N, F] stays N rows
+    with pytest.raises(ValueError, match="tensor payload"):
+        decode_tensors(payload[:-1])
+    with pytest.raises(ValueError, match="unsupported tensor dtype"):
+        encode_tensors([np.zeros(2)])
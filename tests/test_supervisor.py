@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Sharding of connectors and sensors across supervised orchestrator workers."""
+from __future__ import annotations
+
+import zlib
+
+import pytest
+
+from orchestrator import app
+from orchestrator.app import EdgeOrchestrator
+from orchestrator.config import load_config
+from orchestrator.messages import EdgeMessage
+from orchestrator.utils import shard_of
+
+CONFIG = """
+version: 1
+gateway: {host: 127.0.0.1, port: 1}
+connectors:
+  - {id: broker, type: mqtt, topics: [{filter: "sensors/#", pipeline: raw}]}
+  - {id: cam-1, type: camera, source: 0, pipeline: raw}
+  - {id: cam-2, type: camera, source: 1, pipeline: raw}
+  - {id: cam-3, type: camera, source: 2, pipeline: raw}
+  - {id: cam-4, type: camera, source: 3, pipeline: raw, shard: sensor}
+pipelines:
+  - {id: raw, preprocess: env.vector_to_tensor}
+agents: {}
+actions: {log: {type: log}}
+metrics_port: 0
+"""
+
+
+class _IdleConnector:
+    def __init__(self, cfg, on_message):
+        self.cfg = cfg
+        self.on_message = on_message
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+def test_shard_of_is_stable_and_spreads_keys():
+    keys = [f"sensors/floor1/{i}/env" for i in range(400)]
+    shards = [shard_of(k, 4) for k in keys]
+    assert shards == [shard_of(k, 4) for k in keys]
+    assert shard_of("cam-1", 4) == zlib.crc32(b"cam-1") % 4  # not the per-process salted hash()
+    assert all(70 < shards.count(i) < 130 for i in range(4))
+
+
+@pytest.mark.asyncio
+async def test_workers_partition_connectors_and_sensors(tmp_path, monkeypatch):
+    path = tmp_path / "pipelines.yaml"
+    path.write_text(CONFIG)
+    config = load_config(path)
+    assert [c.shard for c in config.connectors] == ["sensor", "connector", "connector", "connector", "sensor"]
+    monkeypatch.setattr(app, "create_connector", lambda cfg, on_message: _IdleConnector(cfg, on_message))
+    owners = {}
+    sensors = [f"sensors/{i}" for i in range(20)]
+    queued = 0
+    for index in range(2):
+        orchestrator = EdgeOrchestrator(load_config(path), shard=(index, 2))
+        await orchestrator.start()
+        try:
+            for connector in orchestrator.connectors:
+                owners.setdefault(connector.cfg.id, []).append(index)
+            broker = next(c for c in orchestrator.connectors if c.cfg.id == "broker")
+            for sensor in sensors:
+                message = EdgeMessage(sensor_id=sensor, payload=b"{}", encoding="json", pipeline_override="raw")
+                await broker.on_message(message)
+            expected = sum(shard_of(s, 2) == index for s in sensors)
+            assert orchestrator.scheduler.qsize("raw") == expected
+            queued += expected
+        finally:
+            await orchestrator.stop()
+    assert queued == len(sensors)
+    # sensor-sharded connectors run in every worker, device connectors in exactly one
+    assert owners.pop("broker") == [0, 1] and owners.pop("cam-4") == [0, 1]
+    assert {cid: shard_of(cid, 2) for cid in owners} == {cid: idx for cid, (idx,) in owners.items()}
@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: Apache-2.0
+"""YOLO decode and NMS checked against the original full-tensor, per-box-loop implementation."""
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+from orchestrator.gateway_pool import InferenceResult
+from orchestrator.messages import EdgeMessage
+from orchestrator.nms import nms
+from orchestrator.plugins import vision
+from orchestrator.preprocessing import FusedPreprocessor
+
+
+def _reference_nms(boxes, scores, iou_th):
+    idxs = scores.argsort()[::-1]
+    keep = []
+    while idxs.size > 0:
+        i = idxs[0]
+        keep.append(i)
+        if idxs.size == 1:
+            break
+        b0, rest = boxes[i], boxes[idxs[1:]]
+        inter_w = np.maximum(0, np.minimum(b0[2], rest[:, 2]) - np.maximum(b0[0], rest[:, 0]))
+        inter_h = np.maximum(0, np.minimum(b0[3], rest[:, 3]) - np.maximum(b0[1], rest[:, 1]))
+        inter = inter_w * inter_h
+        area0 = (b0[2] - b0[0]) * (b0[3] - b0[1])
+        area = (rest[:, 2] - rest[:, 0]) * (rest[:, 3] - rest[:, 1])
+        idxs = idxs[1:][inter / (area0 + area - inter + 1e-6) < iou_th]
+    return keep
+
+
+def _reference_yolo_nms(result, message, conf_th=0.25, iou_th=0.45):
+    preds = np.frombuffer(result.outputs[0], dtype=np.float16).astype(np.float32).reshape(1, -1, 85)[0]
+    boxes = preds[:, :4]
+    cls_scores = vision._sigmoid(preds[:, 5:])
+    cls_ids = cls_scores.argmax(axis=1)
+    conf = vision._sigmoid(preds[:, 4]) * cls_scores.max(axis=1)
+    mask = conf >= conf_th
+    boxes, conf, cls_ids = boxes[mask], conf[mask], cls_ids[mask]
+    if boxes.size == 0:
+        return []
+    xyxy = vision._xywh_to_xyxy(boxes)
+    keep = _reference_nms(xyxy, conf, iou_th)
+    ih, iw = message.metadata.get("image_hw", (640, 640))
+    gain, pad_w, pad_h, _ = message.metadata.get("letterbox", (1.0, 0.0, 0.0, (ih, iw)))
+    detections = []
+    for i in keep:
+        x1, y1, x2, y2 = xyxy[i]
+        x1 = max(0.0, min((x1 - pad_w) / gain, iw))
+        x2 = max(0.0, min((x2 - pad_w) / gain, iw))
+        y1 = max(0.0, min((y1 - pad_h) / gain, ih))
+        y2 = max(0.0, min((y2 - pad_h) / gain, ih))
+        detections.append({"label": int(cls_ids[i]), "confidence": float(conf[i]), "bbox": [float(x1), float(y1), float(x2), float(y2)]})
+    return detections
+
+
+def synthetic_preds(rng: np.random.Generator, candidates: int, rows: int = 25200) -> np.ndarray:
+    """YOLOv5-shaped fp16 output with `candidates` confident rows spread over the frame."""
+    preds = np.empty((rows, 85), dtype=np.float32)
+    preds[:, 0:2] = rng.uniform(0, 640, (rows, 2))
+    preds[:, 2:4] = rng.uniform(8, 160, (rows, 2))
+    preds[:, 4] = rng.normal(-9, 2, rows)
+    preds[:, 5:] = rng.normal(-6, 3, (rows, 80))
+    hot = rng.choice(rows, candidates, replace=False)
+    preds[hot, 4] = rng.uniform(-1, 12, candidates)
+    preds[hot, 5 + rng.integers(0, 80, candidates)] = rng.uniform(-1, 20, candidates)  # saturating logits tie at 1.0
+    return preds.astype(np.float16)
+
+
+@pytest.mark.parametrize("candidates", [0, 12, 3000])
+def test_yolo_decode_matches_full_tensor_reference(candidates):
+    preds = synthetic_preds(np.random.default_rng(candidates), candidates)
+    result = InferenceResult(status=0, outputs=[memoryview(preds.tobytes())])
+    message = EdgeMessage(
+        sensor_id="cam",
+        payload=b"",
+        encoding="bgr",
+        metadata={"image_hw": (720, 1280), "letterbox": (0.5, 0, 140, (720, 1280))},
+    )
+    expected = _reference_yolo_nms(result, message)
+    got = vision.yolo_nms(result, message, agnostic=True, max_det=None)
+    if not expected:
+        assert got == []
+    else:
+        assert got["detections"] == expected
+
+
+def test_nms_blocks_match_reference_loop():
+    rng = np.random.default_rng(7)
+    xy = rng.uniform(0, 600, (2500, 2)).astype(np.float32)
+    boxes = np.concatenate([xy, xy + rng.uniform(10, 120, (2500, 2)).astype(np.float32)], axis=1)
+    scores = rng.random(2500, dtype=np.float32)
+    expected = _reference_nms(boxes, scores, 0.45)
+    for block in (64, 1024, 4096):
+        assert nms(boxes, scores, 0.45, max_det=None, block=block).tolist() == expected
+
+
+def test_nms_is_class_aware_and_capped():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [0, 0, 10, 9], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    classes = np.array([0, 1, 0, 1])
+    assert nms(boxes, scores, 0.5).tolist() == [0, 3]
+    assert nms(boxes, scores, 0.5, classes=classes).tolist() == [0, 1, 3]
+    assert nms(boxes, scores, 0.5, classes=classes, max_det=2).tolist() == [0, 1]
+    assert nms(boxes, scores, 0.5, classes=classes, max_candidates=2).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("cap", [{"max_det": 0}, {"max_det": -1}, {"max_candidates": 0}, {"max_candidates": -1}])
+def test_nms_zero_or_negative_cap_keeps_nothing(cap):
+    boxes = np.array([[0, 0, 10, 10], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.9, 0.8], dtype=np.float32)
+    keep = nms(boxes, scores, 0.5, **cap)
+    assert keep.size == 0 and keep.dtype == np.intp
+
+
+def _scene(h, w):
+    yy, xx = np.mgrid[0:h, 0:w]
+    img = np.dstack([xx * 255 // w, yy * 255 // h, (xx // 40 + yy // 40) % 2 * 200]).astype(np.uint8)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+@pytest.mark.parametrize(
+    "hw, flag",
+    [
+        ((480, 640), cv2.IMREAD_COLOR),
+        ((1080, 1920), cv2.IMREAD_REDUCED_COLOR_2),
+        ((2160, 3840), cv2.IMREAD_REDUCED_COLOR_4),
+    ],
+)
+def test_jpeg_decodes_at_reduced_scale_with_full_size_letterbox(monkeypatch, hw, flag):
+    payload = _scene(*hw)
+    assert vision.jpeg_size(payload) == hw
+    flags = []
+    imdecode = cv2.imdecode
+    monkeypatch.setattr(vision.cv2, "imdecode", lambda data, f: flags.append(f) or imdecode(data, f))
+    message = EdgeMessage(sensor_id="cam", payload=payload, encoding="jpeg")
+    (tensor,) = vision.jpeg_to_tensor(message, payload, vision.YOLOV5_INPUT)
+    assert flags == [flag]
+    full = imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+    expected, params = FusedPreprocessor(vision.YOLOV5_INPUT)(full)
+    assert message.metadata["image_hw"] == hw
+    assert message.metadata["letterbox"] == params
+    assert np.abs(tensor.astype(np.float32) - expected.astype(np.float32)).mean() < 0.01
+
+
+def test_jpeg_size_rejects_non_jpeg_and_truncated_headers():
+    payload = _scene(48, 64)
+    assert vision.jpeg_size(cv2.imencode(".png", np.zeros((4, 4, 3), np.uint8))[1].tobytes()) is None
+    assert vision.jpeg_size(payload[:20]) is None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Decode throughput per payload codec on typical env-sensor readings, structured and numeric."""
+from __future__ import annotations
+
+import argparse
+import importlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.messages import EdgeMessage  # noqa: E402
+from orchestrator.serialization import CODECS, decode_payload, encode_tensors  # noqa: E402
+
+READING = {
+    "node": "floor1-node07",
+    "co2_ppm": 812,
+    "temperature_c": 22.53,
+    "humidity": 41.2,
+    "voc_index": 105,
+    "pm25": 6.4,
+    "battery_v": 3.71,
+    "rssi": -67,
+    "seq": 48213,
+}
+
+
+def encoders() -> dict:
+    found = {"stdlib json": (json.dumps(READING).encode(), json.loads)}
+    for label, module, dumps, loads in (
+        ("orjson", "orjson", "dumps", "loads"),
+        ("msgpack", "msgpack", "packb", "unpackb"),
+        ("cbor", "cbor2", "dumps", "loads"),
+    ):
+        try:
+            lib = importlib.import_module(module)
+        except ImportError:
+            print(f"{label}: {module} not installed, skipped")
+            continue
+        found[label] = (getattr(lib, dumps)(READING), getattr(lib, loads))
+    return found
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=200_000)
+    args = ap.parse_args()
+
+    n = args.messages
+    print(f"{'codec':<12} {'bytes':>6} {'decode_ns':>10} {'msgs/s':>10}")
+    for label, (blob, loads) in encoders().items():
+        t = time.perf_counter_ns()
+        for _ in range(n):
+            loads(blob)
+        per_msg = (time.perf_counter_ns() - t) / n
+        print(f"{label:<12} {len(blob):>6} {per_msg:>10.0f} {1e9 / per_msg:>10.0f}")
+    # numeric payloads: one float32 vector per reading
+    vector = np.asarray([v for v in READING.values() if isinstance(v, (int, float))], dtype=np.float32)
+    buf = io.BytesIO()
+    np.savez(buf, x=vector)
+    for label, codec, blob in (("npz", "npz", buf.getvalue()), ("tensor", "tensor", encode_tensors([vector]))):
+        decode = CODECS[codec]
+        t = time.perf_counter_ns()
+        for _ in range(n // 10):
+            decode(blob)
+        per_msg = (time.perf_counter_ns() - t) / (n // 10)
+        print(f"{label:<12} {len(blob):>6} {per_msg:>10.0f} {1e9 / per_msg:>10.0f}")
+    # what a pipeline pays through the registry: lookup + decode + cache on the message
+    blob = json.dumps(READING).encode()
+    t = time.perf_counter_ns()
+    for _ in range(n):
+        message = EdgeMessage("bench", blob, "json")
+        decode_payload(message)
+        decode_payload(message)
+    per_msg = (time.perf_counter_ns() - t) / n
+    print(f"{'registry':<12} {len(blob):>6} {per_msg:>10.0f} {1e9 / per_msg:>10.0f}  (json, new message, decoded twice)")
+
+
+if __name__ == "__main__":
+    main()
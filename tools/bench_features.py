@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Env-sensor vectorization cost: sorted-key path vs. a compiled feature schema, per message and in bulk."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.config import FeatureConfig, FeatureField  # noqa: E402
+from orchestrator.features import FeatureSchema  # noqa: E402
+from orchestrator.messages import EdgeMessage  # noqa: E402
+from orchestrator.plugins.env import vector_to_tensor  # noqa: E402
+
+FIELDS = ("co2_ppm", "temperature_c", "humidity", "voc_index", "pm25", "battery_v", "rssi")
+
+
+def reading(i: int) -> dict:
+    return {
+        "node": f"floor1-node{i % 100:02d}",
+        "co2_ppm": 700 + i % 300,
+        "temperature_c": 21.0 + (i % 50) / 10,
+        "humidity": 40.0 + i % 20,
+        "voc_index": 100 + i % 7,
+        "pm25": 6.4,
+        "battery_v": 3.71,
+        "rssi": -67,
+        "seq": i,
+    }
+
+
+def per_row(label: str, fn, payloads, rows: int) -> None:
+    t = time.perf_counter_ns()
+    fn(payloads)
+    per = (time.perf_counter_ns() - t) / rows
+    print(f"{label:<32} {per:>10.0f} {1e9 / per:>12.0f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=100_000)
+    ap.add_argument("--bulk", type=int, default=256, help="readings per bulk call")
+    args = ap.parse_args()
+
+    payloads = [reading(i) for i in range(args.messages)]
+    message = EdgeMessage("bench", b"", "json")
+    plain = FeatureSchema(FeatureConfig([FeatureField(name) for name in FIELDS]))
+    scaled = FeatureSchema(FeatureConfig([FeatureField(name, scale=0.01, offset=-1.0) for name in FIELDS]))
+    batches = [payloads[i : i + args.bulk] for i in range(0, len(payloads), args.bulk)]
+
+    print(f"{'path':<32} {'ns/reading':>10} {'readings/s':>12}")
+    per_row("sorted keys (no schema)", lambda ps: [list(vector_to_tensor(message, p)) for p in ps], payloads, len(payloads))
+    per_row("schema row", lambda ps: [list(vector_to_tensor(message, p, plain)) for p in ps], payloads, len(payloads))
+    per_row("schema row, scaled", lambda ps: [list(vector_to_tensor(message, p, scaled)) for p in ps], payloads, len(payloads))
+    per_row(f"schema matrix x{args.bulk}", lambda bs: [plain.matrix(b) for b in bs], batches, len(payloads))
+    per_row(f"schema matrix x{args.bulk}, scaled", lambda bs: [scaled.matrix(b) for b in bs], batches, len(payloads))
+
+
+if __name__ == "__main__":
+    main()
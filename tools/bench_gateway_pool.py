@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Compare GatewayPool transports and pipeline depths against the stub gateway in tools/stub_gateway.py."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.gateway_pool import GatewayPool  # noqa: E402
+
+
+def _serve_stub(port_conn, output_len: int) -> None:
+    from tools.stub_gateway import StubGateway
+
+    async def run() -> None:
+        gateway = StubGateway({"bench": np.zeros(output_len, dtype=np.float32)})
+        await gateway.start()
+        port_conn.send(gateway.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+async def run_pool(port: int, transport: str, pool_size: int, depth: int, requests: int, x: np.ndarray) -> dict:
+    pool = GatewayPool("127.0.0.1", port, pool_size=pool_size, timeout=5.0, transport=transport, pipeline_depth=depth)
+    await pool.start()
+    latencies: list[float] = []
+    clients = pool_size * depth
+    per_task = max(1, requests // clients)
+
+    async def client() -> None:
+        for _ in range(per_task):
+            t = time.perf_counter()
+            result = await pool.infer("bench", [x])
+            latencies.append((time.perf_counter() - t) * 1000.0)
+            result.release()
+
+    await client()  # warm buffers
+    latencies.clear()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    await pool.close()
+    arr = np.asarray(latencies)
+    return {
+        "qps": len(arr) / wall,
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "cpu_us": cpu / len(arr) * 1e6,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pool-sizes", default="1,2,4,8,16")
+    ap.add_argument("--depths", default="1,4", help="pipeline depths to try with the asyncio transport")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--shape", default="1,3,224,224", help="input tensor shape (float32)")
+    ap.add_argument("--output-len", type=int, default=1000, help="float32 elements returned by the stub")
+    args = ap.parse_args()
+
+    parent, child = mp.Pipe()
+    server = mp.Process(target=_serve_stub, args=(child, args.output_len), daemon=True)
+    server.start()
+    port = parent.recv()
+    x = np.random.rand(*[int(d) for d in args.shape.split(",")]).astype(np.float32)
+    depths = [int(d) for d in args.depths.split(",")]
+    print(f"{'transport':<9} {'pool':>4} {'depth':>5} {'qps':>9} {'p50_ms':>8} {'p95_ms':>8} {'cpu_us/req':>10}")
+    try:
+        for size in [int(s) for s in args.pool_sizes.split(",")]:
+            runs = [("thread", 1)] + [("asyncio", d) for d in depths]
+            for transport, depth in runs:
+                r = asyncio.run(run_pool(port, transport, size, depth, args.requests, x))
+                print(
+                    f"{transport:<9} {size:>4} {depth:>5} {r['qps']:>9.0f} {r['p50']:>8.3f} {r['p95']:>8.3f} {r['cpu_us']:>10.1f}"
+                )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Time JPEG decode + preprocessing at full and reduced scale per source resolution."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.messages import EdgeMessage  # noqa: E402
+from orchestrator.plugins import vision  # noqa: E402
+from orchestrator.preprocessing import engine_for  # noqa: E402
+
+
+def scene(h: int, w: int, quality: int) -> bytes:
+    """Gradients, edges and mild noise so the encoder does realistic work."""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:h, 0:w]
+    img = np.dstack([xx * 255 // w, yy * 255 // h, (xx // 64 + yy // 64) % 2 * 180]).astype(np.int16)
+    img += rng.integers(-12, 13, img.shape, dtype=np.int16)
+    return cv2.imencode(".jpg", np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def timed(fn, iters: int) -> float:
+    for _ in range(3):
+        fn()
+    t = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t) / iters * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sources", default="480x640,720x1280,1080x1920,1944x2592,2160x3840", help="height x width list")
+    ap.add_argument("--quality", type=int, default=90)
+    ap.add_argument("--iters", type=int, default=30)
+    args = ap.parse_args()
+
+    spec = vision.YOLOV5_INPUT
+    engine = engine_for(spec)
+    print(f"{'source':>10} {'decode':>8} {'full_ms':>8} {'reduced_ms':>10} {'speedup':>8}")
+    for source in args.sources.split(","):
+        h, w = (int(v) for v in source.split("x"))
+        payload = scene(h, w, args.quality)
+        data = np.frombuffer(payload, dtype=np.uint8)
+        full_ms = timed(lambda: engine(cv2.imdecode(data, cv2.IMREAD_COLOR)), args.iters)
+        message = EdgeMessage(sensor_id="bench", payload=payload, encoding="jpeg")
+        reduced_ms = timed(lambda: list(vision.jpeg_to_tensor(message, payload, spec)), args.iters)
+        geo = engine.geometry(h, w)
+        factor = next((f for f, _ in vision._REDUCED_DECODE if -(-w // f) >= geo.new_w and -(-h // f) >= geo.new_h), 1)
+        print(f"{f'{w}x{h}':>10} {'1/' + str(factor):>8} {full_ms:>8.2f} {reduced_ms:>10.2f} {full_ms / reduced_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Per-message cost of the EdgeMessage envelope against the original datetime dataclass."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.messages import EdgeMessage  # noqa: E402
+
+
+@dataclass(slots=True)
+class LegacyMessage:
+    sensor_id: str
+    payload: bytes
+    encoding: str
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    pipeline_override: Optional[str] = None
+
+    def with_pipeline(self, pipeline_id: str) -> "LegacyMessage":
+        return LegacyMessage(self.sensor_id, self.payload, self.encoding, self.timestamp, dict(self.metadata), pipeline_id)
+
+    def age_ms(self) -> float:
+        return (datetime.now(timezone.utc) - self.timestamp).total_seconds() * 1000
+
+
+def lifecycle(cls, n: int) -> None:
+    """Create, re-route and measure the latency of `n` messages, as connector + worker do."""
+    for _ in range(n):
+        msg = cls("sensors/floor1/node7/env", b"{}", "json", pipeline_override="env")
+        msg.with_pipeline("env").age_ms()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=200_000)
+    args = ap.parse_args()
+
+    print(f"{'envelope':<12} {'create_ns':>10} {'lifecycle_ns':>13} {'bytes/msg':>10}")
+    for name, cls in (("legacy", LegacyMessage), ("EdgeMessage", EdgeMessage)):
+        n = args.messages
+        t = time.perf_counter_ns()
+        for _ in range(n):
+            cls("sensors/floor1/node7/env", b"{}", "json")
+        create = (time.perf_counter_ns() - t) / n
+        t = time.perf_counter_ns()
+        lifecycle(cls, n)
+        cycle = (time.perf_counter_ns() - t) / n
+        tracemalloc.start()
+        kept = [cls("sensors/floor1/node7/env", b"{}", "json") for _ in range(10_000)]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        print(f"{name:<12} {create:>10.0f} {cycle:>13.0f} {size / 10_000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Time the blocked NMS engine against the original per-box loop."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.nms import nms  # noqa: E402
+
+
+def reference_nms(boxes: np.ndarray, scores: np.ndarray, iou_th: float) -> list:
+    """The original per-box loop over a shrinking index list."""
+    idxs = scores.argsort()[::-1]
+    keep = []
+    while idxs.size > 0:
+        i = idxs[0]
+        keep.append(i)
+        if idxs.size == 1:
+            break
+        b0, rest = boxes[i], boxes[idxs[1:]]
+        inter_w = np.maximum(0, np.minimum(b0[2], rest[:, 2]) - np.maximum(b0[0], rest[:, 0]))
+        inter_h = np.maximum(0, np.minimum(b0[3], rest[:, 3]) - np.maximum(b0[1], rest[:, 1]))
+        inter = inter_w * inter_h
+        area0 = (b0[2] - b0[0]) * (b0[3] - b0[1])
+        area = (rest[:, 2] - rest[:, 0]) * (rest[:, 3] - rest[:, 1])
+        idxs = idxs[1:][inter / (area0 + area - inter + 1e-6) < iou_th]
+    return keep
+
+
+def timed(fn, iters: int) -> tuple[float, object]:
+    out = fn()
+    t = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t) / iters * 1000, out
+
+
+def boxes(rng: np.random.Generator, n: int, classes: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """`n` clustered boxes, as a dense detector produces around each object."""
+    centres = rng.uniform(0, 640, (max(1, n // 20), 2))
+    xy = centres[rng.integers(0, len(centres), n)] + rng.normal(0, 8, (n, 2))
+    wh = rng.uniform(20, 120, (n, 2))
+    xyxy = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1).astype(np.float32)
+    return xyxy, rng.uniform(0.25, 1.0, n).astype(np.float32), rng.integers(0, classes, n)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", default="100,1000,3000,10000", help="boxes entering NMS per frame")
+    ap.add_argument("--classes", type=int, default=80)
+    ap.add_argument("--iou", type=float, default=0.45)
+    ap.add_argument("--iters", type=int, default=10)
+    args = ap.parse_args()
+
+    print(f"{'candidates':>10} {'kept':>6} {'loop_ms':>9} {'blocked_ms':>10} {'match':>6} {'per_class_ms':>12} {'kept':>6}")
+    for n in [int(c) for c in args.candidates.split(",")]:
+        xyxy, conf, cls = boxes(np.random.default_rng(n), n, args.classes)
+        loop_ms, expected = timed(lambda: reference_nms(xyxy, conf, args.iou), args.iters)
+        fast_ms, got = timed(lambda: nms(xyxy, conf, args.iou, max_det=None), args.iters)
+        cls_ms, per_class = timed(lambda: nms(xyxy, conf, args.iou, classes=cls), args.iters)
+        match = got.tolist() == expected
+        print(f"{n:>10} {len(got):>6} {loop_ms:>9.3f} {fast_ms:>10.3f} {str(match):>6} {cls_ms:>12.3f} {len(per_class):>6}")
+
+
+if __name__ == "__main__":
+    main()
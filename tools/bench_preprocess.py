@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Compare the classic resize/normalise chain with the fused preprocessor per models.yaml input spec."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from orchestrator.preprocessing import FusedPreprocessor, load_model_specs  # noqa: E402
+
+
+def classic(img: np.ndarray, spec) -> np.ndarray:
+    th, tw = spec.hw
+    if spec.resize == "stretch":
+        out = cv2.resize(img, (tw, th), interpolation=cv2.INTER_LINEAR)
+    else:
+        h, w = img.shape[:2]
+        r = min(th / h, tw / w)
+        new_unpad = (int(round(w * r)), int(round(h * r)))
+        dw, dh = (tw - new_unpad[0]) // 2, (th - new_unpad[1]) // 2
+        out = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+        out = cv2.copyMakeBorder(out, dh, dh, dw, dw, cv2.BORDER_CONSTANT, value=(spec.pad_value,) * 3)
+    arr = out[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) * np.float32(spec.scale)
+    if spec.mean or spec.std:
+        mean = np.float32(spec.mean or (0.0, 0.0, 0.0))[:, None, None]
+        arr = (arr - mean) / np.float32(spec.std or (1.0, 1.0, 1.0))[:, None, None]
+    return arr.astype(np.float16 if spec.dtype == "fp16" else np.float32)[None]
+
+
+def measure(fn, img: np.ndarray, iters: int) -> tuple[float, float]:
+    for _ in range(5):
+        fn(img)
+    t = time.perf_counter()
+    for _ in range(iters):
+        fn(img)
+    per_frame_ms = (time.perf_counter() - t) / iters * 1000
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(10):
+        fn(img)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_frame_ms, (peak - base) / 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--models", default=str(ROOT / "config" / "models.yaml"))
+    ap.add_argument("--source", default="1080,1920", help="source frame height,width")
+    ap.add_argument("--iters", type=int, default=200)
+    args = ap.parse_args()
+
+    h, w = (int(v) for v in args.source.split(","))
+    img = np.random.default_rng(0).integers(0, 256, (h, w, 3), dtype=np.uint8)
+    specs = load_model_specs(args.models)
+    print(f"source {w}x{h}; peak = largest transient allocation footprint while preprocessing")
+    print(f"{'model':<20} {'path':<8} {'ms/frame':>9} {'peak_MB':>8}")
+    for model, spec in specs.items():
+        fused = FusedPreprocessor(spec)
+        paths = [("classic", lambda x, s=spec: classic(x, s)), ("fused", lambda x: fused(x)[0])]
+        for name, fn in paths:
+            ms, peak = measure(fn, img, args.iters)
+            print(f"{model:<20} {name:<8} {ms:>9.3f} {peak:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
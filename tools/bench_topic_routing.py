@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Time MQTT topic routing: linear filter scan vs. the compiled trie, cold and cached."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.connectors.routing import TopicRouter  # noqa: E402
+
+
+def reference_match(filters, topic):
+    """The original linear scan over filters, re-splitting pattern and topic each time."""
+    for idx, pattern in enumerate(filters):
+        if pattern == topic:
+            return idx
+        pattern_parts = pattern.split("/")
+        topic_parts = topic.split("/")
+        if "#" in pattern_parts:
+            pos = pattern_parts.index("#")
+            if pos != len(pattern_parts) - 1:
+                continue
+            pattern_parts = pattern_parts[:pos]
+            topic_parts = topic_parts[: len(pattern_parts)]
+        if len(pattern_parts) != len(topic_parts):
+            continue
+        if all(pp in {"+", "#"} or pp == tp for pp, tp in zip(pattern_parts, topic_parts)):
+            return idx
+    return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--floors", type=int, default=20)
+    ap.add_argument("--nodes", type=int, default=100, help="nodes per floor; one route each")
+    ap.add_argument("--messages", type=int, default=20000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    filters = [f"sensors/floor{f}/node{n}/env" for f in range(args.floors) for n in range(args.nodes)]
+    filters += [f"sensors/floor{f}/+/cam" for f in range(args.floors)] + ["sensors/#"]
+    kinds = rng.choice(["env", "cam", "diag"], args.messages, p=[0.8, 0.15, 0.05])
+    floors = rng.integers(0, args.floors, args.messages)
+    nodes = rng.integers(0, args.nodes, args.messages)
+    topics = [f"sensors/floor{f}/node{n}/{k}" for f, n, k in zip(floors, nodes, kinds)]
+    print(f"{len(filters)} routes, {len(topics)} messages, {len(set(topics))} distinct topics")
+
+    t = time.perf_counter()
+    expected = [reference_match(filters, topic) for topic in topics]
+    linear = time.perf_counter() - t
+    results = {}
+    for name, cache_size in (("trie", 0), ("trie+lru", 4096)):
+        router = TopicRouter(filters, list(range(len(filters))), cache_size=cache_size)
+        t = time.perf_counter()
+        got = [router.match(topic) for topic in topics]
+        results[name] = (time.perf_counter() - t, got == expected)
+    print(f"{'matcher':<10} {'us/msg':>9} {'match':>6}")
+    print(f"{'linear':<10} {linear / len(topics) * 1e6:>9.2f} {'-':>6}")
+    for name, (elapsed, ok) in results.items():
+        print(f"{name:<10} {elapsed / len(topics) * 1e6:>9.2f} {str(ok):>6}")
+
+
+if __name__ == "__main__":
+    main()
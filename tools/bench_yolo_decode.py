@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""Time YOLOv5 output decoding against the original full-tensor implementation."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator.gateway_pool import InferenceResult  # noqa: E402
+from orchestrator.messages import EdgeMessage  # noqa: E402
+from orchestrator.plugins import vision  # noqa: E402
+
+
+def reference_nms(boxes: np.ndarray, scores: np.ndarray, iou_th: float) -> list:
+    """The original per-box NMS loop over a shrinking index list."""
+    idxs = scores.argsort()[::-1]
+    keep = []
+    while idxs.size > 0:
+        i = idxs[0]
+        keep.append(i)
+        if idxs.size == 1:
+            break
+        b0, rest = boxes[i], boxes[idxs[1:]]
+        inter_w = np.maximum(0, np.minimum(b0[2], rest[:, 2]) - np.maximum(b0[0], rest[:, 0]))
+        inter_h = np.maximum(0, np.minimum(b0[3], rest[:, 3]) - np.maximum(b0[1], rest[:, 1]))
+        inter = inter_w * inter_h
+        area0 = (b0[2] - b0[0]) * (b0[3] - b0[1])
+        area = (rest[:, 2] - rest[:, 0]) * (rest[:, 3] - rest[:, 1])
+        idxs = idxs[1:][inter / (area0 + area - inter + 1e-6) < iou_th]
+    return keep
+
+
+def reference_yolo_nms(result, message, conf_th=0.25, iou_th=0.45):
+    """The original decode: sigmoid and score every row of the tensor, then NMS."""
+    preds = np.frombuffer(result.outputs[0], dtype=np.float16).astype(np.float32).reshape(1, -1, 85)[0]
+    boxes = preds[:, :4]
+    cls_scores = vision._sigmoid(preds[:, 5:])
+    cls_ids = cls_scores.argmax(axis=1)
+    conf = vision._sigmoid(preds[:, 4]) * cls_scores.max(axis=1)
+    mask = conf >= conf_th
+    boxes, conf, cls_ids = boxes[mask], conf[mask], cls_ids[mask]
+    if boxes.size == 0:
+        return []
+    xyxy = vision._xywh_to_xyxy(boxes)
+    keep = reference_nms(xyxy, conf, iou_th)
+    ih, iw = message.metadata.get("image_hw", (640, 640))
+    gain, pad_w, pad_h, _ = message.metadata.get("letterbox", (1.0, 0.0, 0.0, (ih, iw)))
+    detections = []
+    for i in keep:
+        x1, y1, x2, y2 = xyxy[i]
+        x1 = max(0.0, min((x1 - pad_w) / gain, iw))
+        x2 = max(0.0, min((x2 - pad_w) / gain, iw))
+        y1 = max(0.0, min((y1 - pad_h) / gain, ih))
+        y2 = max(0.0, min((y2 - pad_h) / gain, ih))
+        bbox = [float(x1), float(y1), float(x2), float(y2)]
+        detections.append({"label": int(cls_ids[i]), "confidence": float(conf[i]), "bbox": bbox})
+    return detections
+
+
+def synthetic_preds(rng: np.random.Generator, candidates: int, rows: int = 25200) -> np.ndarray:
+    """YOLOv5-shaped fp16 output with `candidates` confident rows spread over the frame."""
+    preds = np.empty((rows, 85), dtype=np.float32)
+    preds[:, 0:2] = rng.uniform(0, 640, (rows, 2))
+    preds[:, 2:4] = rng.uniform(8, 160, (rows, 2))
+    preds[:, 4] = rng.normal(-9, 2, rows)
+    preds[:, 5:] = rng.normal(-6, 3, (rows, 80))
+    hot = rng.choice(rows, candidates, replace=False)
+    preds[hot, 4] = rng.uniform(-1, 12, candidates)
+    preds[hot, 5 + rng.integers(0, 80, candidates)] = rng.uniform(-1, 20, candidates)  # saturating logits tie at 1.0
+    return preds.astype(np.float16)
+
+
+def timed(fn, result, message, iters: int) -> tuple[float, object]:
+    out = fn(result, message)
+    t = time.perf_counter()
+    for _ in range(iters):
+        fn(result, message)
+    return (time.perf_counter() - t) / iters * 1000, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", default="0,20,300,3000", help="rows above the objectness threshold per frame")
+    ap.add_argument("--iters", type=int, default=50)
+    args = ap.parse_args()
+
+    message = EdgeMessage(
+        sensor_id="bench",
+        payload=b"",
+        encoding="bgr",
+        metadata={"image_hw": (1080, 1920), "letterbox": (1 / 3, 0, 140, (1080, 1920))},
+    )
+    print(f"{'candidates':>10} {'dets':>6} {'full_ms':>9} {'filtered_ms':>11} {'match':>6}")
+    for n in [int(c) for c in args.candidates.split(",")]:
+        preds = synthetic_preds(np.random.default_rng(n), n)
+        result = InferenceResult(status=0, outputs=[memoryview(preds.tobytes())])
+        full_ms, expected = timed(reference_yolo_nms, result, message, args.iters)
+        decode = lambda r, m: vision.yolo_nms(r, m, agnostic=True, max_det=None)  # noqa: E731 - reference semantics
+        fast_ms, got = timed(decode, result, message, args.iters)
+        dets = got["detections"] if got else []
+        print(f"{n:>10} {len(dets):>6} {full_ms:>9.3f} {fast_ms:>11.3f} {str(dets == expected):>6}")
+
+
+if __name__ == "__main__":
+    main()
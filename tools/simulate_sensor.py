@@ -8,12 +8,26 @@ import asyncio
 import json
 import math
 import random
+import sys
+from pathlib import Path
 from typing import Iterable
 
+import numpy as np
 from asyncio_mqtt import Client
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-async def publish_env(client: Client, topic: str, interval: float) -> None:
+from orchestrator.serialization import encode_tensors  # noqa: E402
+
+
+def encode_env(payload: dict, fmt: str) -> bytes:
+    if fmt == "tensor":
+        # env.vector_to_tensor orders JSON fields by key; send the same order as one float32 vector
+        return encode_tensors([np.array([payload[k] for k in sorted(payload)], dtype=np.float32)])
+    return json.dumps(payload).encode("utf-8")
+
+
+async def publish_env(client: Client, topic: str, interval: float, fmt: str = "json") -> None:
     t = 0.0
     while True:
         co2 = 500 + 300 * math.sin(t)
@@ -23,7 +37,7 @@ async def publish_env(client: Client, topic: str, interval: float) -> None:
             "temperature_c": round(temp + random.uniform(-0.5, 0.5), 2),
             "humidity_pct": round(45 + random.uniform(-5, 5), 2),
         }
-        await client.publish(topic, json.dumps(payload).encode("utf-8"))
+        await client.publish(topic, encode_env(payload, fmt))
         await asyncio.sleep(interval)
         t += 0.2
 
@@ -47,11 +61,12 @@ async def main() -> None:
     ap.add_argument("--username")
     ap.add_argument("--password")
     ap.add_argument("--interval", type=float, default=1.0)
+    ap.add_argument("--format", choices=["json", "tensor"], default="json", help="env payload encoding (route serializer)")
     args = ap.parse_args()
 
     async with Client(hostname=args.broker, port=args.port, username=args.username, password=args.password) as client:
         if args.mode == "env":
-            await publish_env(client, args.topic, args.interval)
+            await publish_env(client, args.topic, args.interval, args.format)
         else:
             await publish_trigger(client, args.topic, args.interval)
 
@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Minimal stand-in for the TensorRT gateway, shared by the tests and the gateway benchmarks."""
+from __future__ import annotations
+
+import asyncio
+import struct
+from contextlib import suppress
+from typing import Dict
+
+import numpy as np
+
+
+class StubGateway:
+    """Minimal TCP server that mimics the TensorRT gateway protocol for tests and benchmarks."""
+
+    def __init__(self, responses: Dict[str, np.ndarray], host: str = "127.0.0.1", port: int = 0):
+        self._responses = responses
+        self._host = host
+        self._port = port
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def port(self) -> int:
+        if not self._server:
+            raise RuntimeError("gateway not started")
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_client, self._host, self._port)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                length_data = await reader.readexactly(4)
+                (frame_len,) = struct.unpack("<I", length_data)
+                payload = await reader.readexactly(frame_len)
+                magic, version, flags, model_len, tensor_count, _ = struct.unpack_from("<4sHHIII", payload, 0)
+                if magic != b"TRT\x01" or version != 1:
+                    break
+                offset = struct.calcsize("<4sHHIII")
+                model_id = payload[offset : offset + model_len].decode()
+                offset += model_len
+                for _ in range(tensor_count):
+                    _, ndim = struct.unpack_from("<BB", payload, offset)
+                    offset += 2
+                    offset += 4 * ndim  # dims (int32)
+                    (raw_len,) = struct.unpack_from("<I", payload, offset)
+                    offset += 4 + raw_len
+                vector = self._responses.get(model_id, np.zeros((1,), dtype=np.float32))
+                blob = np.asarray(vector, dtype=np.float32).tobytes()
+                body = struct.pack("<III", 1, 0, 1)
+                body += struct.pack("<I", len(blob))
+                body += blob
+                writer.write(struct.pack("<I", len(body)) + body)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()